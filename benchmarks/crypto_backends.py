@@ -0,0 +1,257 @@
+"""Compares the crypto backends on message- and file-sized payloads.
+
+Runs the CryptoUtils operations the client uses (AES-CBC of message texts,
+streamed AES-CBC of files, RSA-OAEP wrapping of chat keys, the private key
+import) with every installed backend and reports which one is faster:
+
+    python benchmarks/crypto_backends.py
+    python benchmarks/crypto_backends.py --quick --json results.json
+    python benchmarks/crypto_backends.py --message-sizes 64,4096 --file-sizes 1,50
+
+Select the backend for a client with CryptoUtils.set_backend(name) or the
+STASHCONNECT_CRYPTO_BACKEND environment variable.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stashconnect.crypto_backends import available_backends  # noqa: E402
+from stashconnect.crypto_utils import CryptoUtils  # noqa: E402
+
+# the chunk size files are uploaded and downloaded in (see files.py)
+FILE_CHUNK_SIZE = 5 * 1024 * 1024
+
+
+def _measure(operation, repeat: int, nbytes: int = 0) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(latencies)
+    result = {
+        "ops": repeat,
+        "seconds": round(total, 6),
+        "ops_per_second": round(repeat / total, 2) if total else None,
+        "mean_us": round(statistics.mean(latencies) * 1e6, 3),
+        "p50_us": round(statistics.median(latencies) * 1e6, 3),
+    }
+    if nbytes:
+        result["megabytes_per_second"] = round(nbytes * repeat / total / 1e6, 2)
+    return result
+
+
+def _stream(factory, data: bytes):
+    cipher = factory()
+    for offset in range(0, len(data), FILE_CHUNK_SIZE):
+        cipher.update(data[offset : offset + FILE_CHUNK_SIZE])
+    cipher.finalize()
+
+
+def run_backend(name: str, args, fixtures: dict) -> dict:
+    """## Runs all operations with one backend.
+
+    #### Args:
+        name (str): The backend name.
+        args (argparse.Namespace): The parsed command line options.
+        fixtures (dict): Keys and payloads shared by all backends.
+
+    #### Returns:
+        dict: Maps operation names to results.
+    """
+    CryptoUtils.set_backend(name)
+    results = {}
+
+    key, iv = fixtures["key"], fixtures["iv"]
+
+    for size in args.message_sizes:
+        plain = os.urandom(size)
+        encrypted = CryptoUtils.encrypt_aes(plain, key, iv)
+
+        results[f"aes.encrypt.{size}B"] = _measure(
+            lambda: CryptoUtils.encrypt_aes(plain, key, iv), args.repeat, size
+        )
+        results[f"aes.decrypt.{size}B"] = _measure(
+            lambda: CryptoUtils.decrypt_aes(encrypted, key, iv), args.repeat, size
+        )
+
+        batch = [(encrypted, key, iv)] * args.batch
+        results[f"aes.decrypt_many.{args.batch}x{size}B"] = _measure(
+            lambda: CryptoUtils.decrypt_aes_many(batch),
+            max(1, args.repeat // args.batch),
+            size * args.batch,
+        )
+
+    for size in args.file_sizes:
+        plain = os.urandom(size * 1024 * 1024)
+        encrypted = CryptoUtils.encrypt_aes(plain, key, iv)
+
+        results[f"aes.stream_encrypt.{size}MB"] = _measure(
+            lambda: _stream(lambda: CryptoUtils.aes_encryptor(key, iv), plain),
+            args.file_repeat,
+            len(plain),
+        )
+        results[f"aes.stream_decrypt.{size}MB"] = _measure(
+            lambda: _stream(lambda: CryptoUtils.aes_decryptor(key, iv), encrypted),
+            args.file_repeat,
+            len(plain),
+        )
+
+    # keys are exchanged between the backends as PEM / DER
+    private_key = CryptoUtils.load_private_key(fixtures["private_der"], None)
+    public_key = CryptoUtils.import_public_key(fixtures["public_pem"])
+    wrapped = fixtures["wrapped_key"]
+
+    results["rsa.encrypt_key"] = _measure(
+        lambda: CryptoUtils.encrypt_key(key, public_key), args.rsa_repeat
+    )
+    results["rsa.decrypt_key"] = _measure(
+        lambda: CryptoUtils.decrypt_key(wrapped, private_key), args.rsa_repeat
+    )
+    results["rsa.import_public_key"] = _measure(
+        lambda: CryptoUtils.import_public_key(fixtures["public_pem"]), args.rsa_repeat
+    )
+    results["rsa.load_private_key"] = _measure(
+        lambda: CryptoUtils.load_private_key(
+            fixtures["private_pem"], fixtures["passphrase"]
+        ),
+        args.load_repeat,
+    )
+    results["random_bytes.32B"] = _measure(
+        lambda: CryptoUtils.random_bytes(32), args.repeat
+    )
+
+    return results
+
+
+def compare(report: dict) -> dict:
+    """## Picks the fastest backend per operation.
+
+    #### Args:
+        report (dict): Maps backend names to their results.
+
+    #### Returns:
+        dict: Maps operation names to the fastest backend and its speedup.
+    """
+    comparison = {}
+    operations = next(iter(report.values()))
+
+    for operation in operations:
+        timings = {
+            backend: results[operation]["mean_us"]
+            for backend, results in report.items()
+        }
+        fastest = min(timings, key=timings.get)
+        slowest = max(timings.values())
+
+        comparison[operation] = {
+            "fastest": fastest,
+            "speedup": (
+                round(slowest / timings[fastest], 2) if timings[fastest] else None
+            ),
+        }
+
+    return comparison
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--backends", help="comma separated, defaults to all installed")
+    parser.add_argument("--quick", action="store_true", help="small sizes and counts")
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--rsa-repeat", type=int, default=200)
+    parser.add_argument("--load-repeat", type=int, default=5)
+    parser.add_argument("--file-repeat", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--message-sizes", default="64,1024,16384", help="bytes")
+    parser.add_argument("--file-sizes", default="1,16,64", help="megabytes")
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--json", nargs="?", const="-", help="write a json report")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat, args.rsa_repeat, args.load_repeat, args.file_repeat = 500, 20, 1, 1
+        args.file_sizes = "1"
+
+    args.message_sizes = [int(size) for size in args.message_sizes.split(",") if size]
+    args.file_sizes = [int(size) for size in str(args.file_sizes).split(",") if size]
+
+    installed = available_backends()
+    backends = args.backends.split(",") if args.backends else installed
+
+    missing = set(backends) - set(installed)
+    if missing:
+        parser.error(f"backends not installed: {', '.join(sorted(missing))}")
+
+    # one key pair and ciphertext for all backends, so they do the same work
+    CryptoUtils.set_backend(backends[0])
+    private_key = CryptoUtils.generate_private_key(args.key_size)
+    public_pem = CryptoUtils.export_public_key(CryptoUtils.public_key(private_key))
+    key = CryptoUtils.random_bytes(32)
+
+    fixtures = {
+        "key": key,
+        "iv": CryptoUtils.random_bytes(16),
+        "passphrase": "benchmark",
+        "private_der": CryptoUtils.export_private_key(private_key),
+        "private_pem": CryptoUtils.export_private_key(private_key, "benchmark"),
+        "public_pem": public_pem,
+        "wrapped_key": CryptoUtils.encrypt_key(
+            key, CryptoUtils.import_public_key(public_pem)
+        ),
+    }
+
+    report = {name: run_backend(name, args, fixtures) for name in backends}
+    comparison = compare(report)
+
+    output = {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "key_size": args.key_size,
+            "message_sizes_bytes": args.message_sizes,
+            "file_sizes_mb": args.file_sizes,
+        },
+        "backends": report,
+        "comparison": comparison,
+    }
+
+    if args.json == "-":
+        print(json.dumps(output, indent=2))
+        return 0
+
+    header = f"{'operation':<30}" + "".join(f"{name:>16}" for name in backends)
+    print(header + f"{'fastest':>16}")
+    for operation, best in comparison.items():
+        cells = []
+        for name in backends:
+            result = report[name][operation]
+            if "megabytes_per_second" in result:
+                cells.append(f"{result['megabytes_per_second']:>11.1f} MB/s")
+            else:
+                cells.append(f"{result['mean_us']:>13.1f} us")
+        print(
+            f"{operation:<30}"
+            + "".join(f"{cell:>16}" for cell in cells)
+            + f"{best['fastest']:>13} x{best['speedup']}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(output, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
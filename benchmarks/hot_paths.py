@@ -0,0 +1,357 @@
+"""Benchmarks the hot paths of the client against the local stand-in server.
+
+Every result reports the number of operations, throughput, latency
+percentiles and the api requests made per endpoint, the --json report can
+be diffed between versions to spot regressions.
+
+    python benchmarks/hot_paths.py
+    python benchmarks/hot_paths.py --quick --json results.json
+    python benchmarks/hot_paths.py --only send,files --sizes 1,50 --latency 0.005
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stashconnect  # noqa: E402
+from stashconnect.models import Message  # noqa: E402
+from stashconnect.standin import StandInServer  # noqa: E402
+
+BENCHMARKS = (
+    "get_messages",
+    "message_init",
+    "send",
+    "files",
+    "create_conversation",
+    "invite",
+    "socket",
+)
+
+
+def _percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def _result(name: str, latencies: list, requests: dict, **extra) -> dict:
+    total = sum(latencies)
+    result = {
+        "name": name,
+        "ops": len(latencies),
+        "seconds": round(total, 6),
+        "ops_per_second": round(len(latencies) / total, 2) if total else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 3),
+            "p50": round(_percentile(latencies, 50) * 1000, 3),
+            "p95": round(_percentile(latencies, 95) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+        "requests": dict(sorted(requests.items())),
+        "requests_per_op": round(sum(requests.values()) / len(latencies), 2),
+    }
+    result.update(extra)
+    return result
+
+
+class Suite:
+    """## Seeds a stand-in server and runs the benchmarks against it.
+
+    #### Args:
+        args (argparse.Namespace): The parsed command line options.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.results = []
+
+        self.server = StandInServer(latency=args.latency, key_size=args.key_size)
+        self.server.start()
+
+        self.alice = self.server.add_user(
+            "alice@standin.local", "pw", encryption_password="enc"
+        )
+        self.bob = self.server.add_user(
+            "bob@standin.local", "pw", encryption_password="enc"
+        )
+        self.members = [
+            self.server.add_user(
+                f"member{i}@standin.local", "pw", encryption_password="enc"
+            )
+            for i in range(args.members)
+        ]
+
+        self.encrypted = self.server.add_conversation(
+            [self.alice["id"], self.bob["id"]]
+        )
+        self.plain = self.server.add_conversation(
+            [self.alice["id"], self.bob["id"]], encrypted=False
+        )
+        self.channel = self.server.add_channel("benchmark", [self.alice["id"]])
+
+        for i in range(args.messages):
+            self.server.post_message(
+                "conversation", self.encrypted["id"], self.bob["id"], f"message {i}"
+            )
+
+        self.client = stashconnect.Client(
+            email="alice@standin.local",
+            password="pw",
+            encryption_password="enc",
+            api_url=self.server.api_url,
+            push_url=self.server.push_url,
+        )
+        self.client.wait_for_private_key()
+
+    def close(self):
+        if getattr(self.client, "sio", None) is not None:
+            self.client.sio.disconnect()
+        self.server.stop()
+
+    def measure(self, name: str, operation, repeat: int, **extra) -> dict:
+        """## Runs an operation and records its latencies and requests.
+
+        #### Args:
+            name (str): The results name.
+            operation (callable): Called with the iteration index.
+            repeat (int): The number of operations.
+
+        #### Returns:
+            dict: The result.
+        """
+        latencies = []
+        before = self.server.requests.copy()
+
+        for i in range(repeat):
+            start = time.perf_counter()
+            operation(i)
+            latencies.append(time.perf_counter() - start)
+
+        requests = self.server.requests - before
+        result = _result(name, latencies, requests, **extra)
+        self.results.append(result)
+
+        if self.args.json != "-":
+            print(
+                f"{name:<32} {result['ops']:>6} ops "
+                f"{result['ops_per_second'] or 0:>10.1f} ops/s "
+                f"p50 {result['latency_ms']['p50']:>9.3f} ms "
+                f"p95 {result['latency_ms']['p95']:>9.3f} ms "
+                f"{result['requests_per_op']:>6} req/op"
+            )
+
+        return result
+
+    # benchmarks
+
+    def get_messages(self):
+        chat_id = self.encrypted["id"]
+        limit = 30
+
+        def operation(i):
+            offset = (i * limit) % max(1, self.args.messages - limit)
+            messages = list(
+                self.client.messages.get_messages(chat_id, limit=limit, offset=offset)
+            )
+            assert all(message.content for message in messages)
+
+        self.measure(
+            "get_messages.encrypted",
+            operation,
+            self.args.repeat,
+            messages_per_op=limit,
+        )
+
+    def message_init(self):
+        payloads = self.client._post(
+            "message/content",
+            data={
+                "conversation_id": self.encrypted["id"],
+                "source": "conversation",
+                "limit": self.args.messages,
+                "offset": 0,
+            },
+        )["messages"]
+
+        def operation(i):
+            Message(self.client, payloads[i % len(payloads)])
+
+        self.measure("message.init", operation, self.args.repeat * 30)
+
+        # fields are resolved on first access, this includes the decryption
+        def operation(i):
+            message = Message(self.client, payloads[i % len(payloads)])
+            message.content, message.author, message.files, message.latitude
+
+        self.measure("message.init.resolved", operation, self.args.repeat * 30)
+
+    def send(self):
+        for name, chat in (("encrypted", self.encrypted), ("plain", self.plain)):
+            self.measure(
+                f"messages.send.{name}",
+                lambda i, chat=chat: self.client.messages.send(
+                    chat["id"],
+                    f"benchmark {i}",
+                    encrypted=chat["encrypted"],
+                    target_type="conversation",
+                ),
+                self.args.repeat,
+            )
+
+    def files(self):
+        for size in self.args.sizes:
+            content = os.urandom(size * 1024 * 1024)
+            file_ids = []
+
+            def upload(i):
+                file = self.client.files.upload(
+                    self.encrypted["id"],
+                    content,
+                    filename=f"benchmark-{size}mb.bin",
+                    preview=False,
+                    target_type="conversation",
+                )
+                file_ids.append(file.id)
+
+            roundtrips = []
+
+            def download(i):
+                roundtrips.append(
+                    self.client.files.download_bytes(file_ids[i]) == content
+                )
+
+            repeat = self.args.file_repeat
+            upload_result = self.measure(f"files.upload.{size}mb", upload, repeat)
+            download_result = self.measure(f"files.download.{size}mb", download, repeat)
+
+            for result in (upload_result, download_result):
+                result["megabytes_per_second"] = round(
+                    size * result["ops"] / result["seconds"], 2
+                )
+            download_result["roundtrip_ok"] = all(roundtrips)
+
+            # the server keeps uploads in memory
+            for file_id in file_ids:
+                self.server.files.pop(int(file_id), None)
+
+    def create_conversation(self):
+        member_ids = [member["id"] for member in self.members]
+
+        self.measure(
+            f"conversations.create.{len(member_ids)}_members",
+            lambda i: self.client.conversations.create(member_ids),
+            self.args.repeat,
+            members=len(member_ids),
+        )
+
+    def invite(self):
+        member_ids = [member["id"] for member in self.members]
+
+        self.measure(
+            f"channels.invite.{len(member_ids)}_members",
+            lambda i: self.client.channels.invite(self.channel["id"], member_ids),
+            self.args.repeat,
+            members=len(member_ids),
+        )
+
+    def socket(self):
+        received = threading.Event()
+
+        @self.client.event("message_sync")
+        def message_received(message):
+            received.set()
+
+        threading.Thread(target=self.client.run, daemon=True).start()
+
+        # wait for the connection, then give the "userid" emit time to join the room
+        while (
+            getattr(self.client, "sio", None) is None or not self.client.sio.connected
+        ):
+            time.sleep(0.01)
+        time.sleep(0.5)
+
+        def operation(i):
+            received.clear()
+            self.server.post_message(
+                "conversation", self.encrypted["id"], self.bob["id"], f"push {i}"
+            )
+            if not received.wait(10):
+                raise RuntimeError("the pushed message was not received")
+
+        self.measure("socket.message_received", operation, self.args.repeat)
+
+    def run(self, names):
+        for name in names:
+            getattr(self, name)()
+
+        return {
+            "version": 1,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": {
+                "latency": self.args.latency,
+                "key_size": self.args.key_size,
+                "members": self.args.members,
+                "messages": self.args.messages,
+                "repeat": self.args.repeat,
+                "sizes_mb": self.args.sizes,
+            },
+            "results": self.results,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--only", help="comma separated: " + ",".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="small sizes and counts")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--file-repeat", type=int, default=1)
+    parser.add_argument("--sizes", default="1,50,500", help="file sizes in MB")
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds/request")
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--json", nargs="?", const="-", help="write a json report")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat, args.members, args.messages = 5, 10, 60
+        args.sizes = "1"
+
+    args.sizes = [int(size) for size in str(args.sizes).split(",") if size]
+    names = args.only.split(",") if args.only else BENCHMARKS
+
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    # keep stdout clean for the json report (the client prints status messages)
+    output = sys.stderr if args.json == "-" else sys.stdout
+
+    with contextlib.redirect_stdout(output):
+        suite = Suite(args)
+        try:
+            report = suite.run(names)
+        finally:
+            suite.close()
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Guards the startup cost of `import stashconnect`.
+
+Runs `python -X importtime -c "import stashconnect"` in fresh interpreters
+and fails (exit code 1) if the fastest run is over the budget or if one of
+the lazily loaded dependencies is imported by the package import.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 300 --runs 10 --json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# only loaded when they are needed (crypto, images, socket.io, the async client)
+DEFERRED = (
+    "Crypto",
+    "cryptography",
+    "PIL",
+    "socketio",
+    "engineio",
+    "aiohttp",
+    "asyncio",
+)
+
+
+def measure(module: str = "stashconnect") -> tuple[float, set]:
+    """## Imports a module in a fresh interpreter.
+
+    #### Args:
+        module (str, optional): The module to import. Defaults to "stashconnect".
+
+    #### Returns:
+        tuple[float, set]: The cumulative import time in ms and the imported modules.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    total = None
+    modules = set()
+
+    # import time: self [us] | cumulative | imported package
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+
+        modules.add(name)
+        if name == module:
+            total = int(cumulative) / 1000
+
+    if total is None:
+        raise RuntimeError(f"{module} was not imported")
+
+    return total, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print a json report")
+    args = parser.parse_args()
+
+    timings = []
+    eager = set()
+
+    for _ in range(args.runs):
+        total, modules = measure()
+        timings.append(total)
+        eager.update(name.split(".")[0] for name in modules)
+
+    eager = sorted(eager.intersection(DEFERRED))
+    best = min(timings)
+    passed = best <= args.budget_ms and not eager
+
+    report = {
+        "best_ms": round(best, 2),
+        "median_ms": round(sorted(timings)[len(timings) // 2], 2),
+        "budget_ms": args.budget_ms,
+        "eager_imports": eager,
+        "passed": passed,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"import stashconnect: best {report['best_ms']} ms, "
+            f"median {report['median_ms']} ms (budget {args.budget_ms} ms)"
+        )
+        if eager:
+            print(f"eagerly imported: {', '.join(eager)}")
+        print("OK" if passed else "FAILED")
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Measures the memory and build time of the model objects.
+
+Builds many User, Channel, Company, File, Conversation and Message objects
+from payloads of the local stand-in server and reports the bytes per object
+traced by tracemalloc. The slotted layout is compared with the same attribute
+values stored in an instance __dict__ (the layout before __slots__). "built"
+is everything a constructor allocates on top of the payload, which raw=True
+(members, visible, joined, infos, get_messages) skips:
+
+    python benchmarks/models_memory.py
+    python benchmarks/models_memory.py --count 50000 --json results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stashconnect  # noqa: E402
+from stashconnect.models import (  # noqa: E402
+    Channel,
+    Company,
+    Conversation,
+    File,
+    Message,
+    User,
+)
+from stashconnect.standin import StandInServer  # noqa: E402
+
+# ids of the copied payloads start here, far from the stand-in ids
+ID_OFFSET = 1_000_000
+
+
+class _DictLayout:
+    # the same attributes in an instance __dict__
+    pass
+
+
+def _attributes(instance) -> dict:
+    attributes = {}
+    for cls in type(instance).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name != "__weakref__" and hasattr(instance, name):
+                attributes[name] = getattr(instance, name)
+    return attributes
+
+
+def _traced(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    result = build()
+
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, seconds
+
+
+def _fixtures(server) -> tuple:
+    alice = server.add_user("alice@example.com", "pw", encryption_password="enc")
+    bob = server.add_user("bob@example.com", "pw", encryption_password="enc")
+    chat = server.add_conversation([alice["id"], bob["id"]], encrypted=False)
+    channel = server.add_channel("directory", [alice["id"], bob["id"]])
+    server.post_message("conversation", chat["id"], bob["id"], "hello alice")
+
+    # no encryption password, so building models never decrypts a chat key
+    client = stashconnect.Client(
+        email="alice@example.com",
+        password="pw",
+        api_url=server.api_url,
+        push_url=server.push_url,
+    )
+
+    path = os.path.join(ROOT, "benchmarks", ".models_memory.txt")
+    with open(path, "w") as file:
+        file.write("benchmark")
+    try:
+        uploaded = client.files.upload(chat["id"], path, encrypted=False)
+    finally:
+        os.remove(path)
+
+    company = client._post("company/details", data={"company_id": channel["company"]})
+
+    templates = {
+        "User": next(client.channels.members(channel["id"], raw=True)),
+        "Channel": client.channels.joined(channel["company"], raw=True)[0],
+        "Company": company["company"],
+        "File": client.files.infos(uploaded.id, raw=True)[0],
+        "Conversation": client._post(
+            "message/conversation", data={"conversation_id": chat["id"]}
+        )["conversation"],
+        "Message": next(client.messages.get_messages(chat["id"], raw=True)),
+    }
+    return client, templates
+
+
+def _copies(objects: list, layout) -> list:
+    # only the containers differ, the attribute values are shared with the objects
+    copies = []
+    for instance in objects:
+        copy = layout.__new__(layout)
+        for name, value in _attributes(instance).items():
+            object.__setattr__(copy, name, value)
+        copies.append(copy)
+    return copies
+
+
+def run(client, templates: dict, count: int) -> dict:
+    models = {
+        "User": User,
+        "Channel": Channel,
+        "Company": Company,
+        "File": File,
+        "Conversation": Conversation,
+        "Message": Message,
+    }
+
+    # the identity map is measured separately, it keeps one entry per shared object
+    identities, client.identities = client.identities, None
+
+    report = {}
+    try:
+        for name, cls in models.items():
+            payloads = [dict(templates[name], id=ID_OFFSET + i) for i in range(count)]
+
+            objects, built, seconds = _traced(
+                lambda: [cls(client, payload) for payload in payloads]
+            )
+            _, slots_size, _ = _traced(lambda: _copies(objects, cls))
+            _, dict_size, _ = _traced(lambda: _copies(objects, _DictLayout))
+
+            report[name] = {
+                "objects": count,
+                "slots_bytes_per_object": round(slots_size / count, 1),
+                "dict_bytes_per_object": round(dict_size / count, 1),
+                "saved_percent": round((1 - slots_size / dict_size) * 100, 1),
+                "built_bytes_per_object": round(built / count, 1),
+                "build_us_per_object": round(seconds / count * 1e6, 3),
+            }
+
+            del objects, payloads
+    finally:
+        client.identities = identities
+
+    # the same users with and without the identity map
+    payloads = [dict(templates["User"], id=2 * ID_OFFSET + i) for i in range(count)]
+    objects, shared, _ = _traced(lambda: [User(client, data) for data in payloads])
+    report["identity_map"] = {
+        "entries": len(client.identities),
+        "bytes_per_entry": round(
+            shared / count - report["User"]["built_bytes_per_object"], 1
+        ),
+    }
+    del objects
+
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--count", type=int, default=10000, help="objects per model")
+    parser.add_argument("--json", nargs="?", const="-", help="write a json report")
+    args = parser.parse_args()
+
+    with StandInServer(push=False) as server:
+        client, templates = _fixtures(server)
+        report = run(client, templates, args.count)
+
+    output = {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "models": report,
+    }
+
+    if args.json == "-":
+        print(json.dumps(output, indent=2))
+        return 0
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(output, file, indent=2)
+
+    print(
+        f"{'model':<14}{'slots B/obj':>13}{'dict B/obj':>13}{'saved':>9}"
+        f"{'built B/obj':>13}{'build us':>11}"
+    )
+    for name, result in report.items():
+        if name == "identity_map":
+            continue
+        print(
+            f"{name:<14}{result['slots_bytes_per_object']:>13.1f}"
+            f"{result['dict_bytes_per_object']:>13.1f}"
+            f"{result['saved_percent']:>8.1f}%"
+            f"{result['built_bytes_per_object']:>13.1f}"
+            f"{result['build_us_per_object']:>11.3f}"
+        )
+
+    shared = report["identity_map"]
+    print(f"identity map: {shared['bytes_per_entry']:.1f} B per shared object")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,6 +37,10 @@ setup(
         "Pillow",
         "websocket-client",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "cryptography": ["cryptography"],
+    },
     project_urls={
         "Bug Tracker": "https://github.com/BuStudios/StashConnect/issues",
         "Documentation": "https://github.com/BuStudios/StashConnect/wiki",
@@ -10,3 +10,15 @@ An API wrapper for [Stashcat](https://stashcat.com/en).
 __version__ = "0.9.7.6"
 
 from .client import *
+from .crypto_utils import CryptoUtils
+from .exceptions import *
+
+
+def __getattr__(name):
+    # the asyncio client needs aiohttp, so it is only imported when requested
+    if name == "AsyncClient":
+        from .aio import AsyncClient
+
+        return AsyncClient
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
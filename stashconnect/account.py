@@ -1,4 +1,3 @@
-from PIL import Image
 import requests
 import io
 import base64
@@ -6,6 +5,31 @@ import base64
 from .models import User
 
 
+def _profile_picture_content(content):
+    # crops the image to 512x512 and returns it as a png data url
+    from PIL import Image
+
+    with Image.open(io.BytesIO(content)) as image:
+
+        min_dimension = min(image.width, image.height)
+        scale_factor = 512 / min_dimension
+
+        new_width = int(image.width * scale_factor)
+        new_height = int(image.height * scale_factor)
+        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+        left, top = (new_width - 512) / 2, (new_height - 512) / 2
+        right, bottom = left + 512, top + 512
+        image = image.crop((left, top, right, bottom))
+
+        buffered = io.BytesIO()
+        image.save(buffered, format="PNG")
+
+        image_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return f"data:image/png;base64,{image_base64}"
+
+
 class AccountManager:
     def __init__(self, client):
         self.client = client
@@ -147,30 +171,12 @@ class AccountManager:
         response = requests.get(url)
         response.raise_for_status()
 
-        with Image.open(io.BytesIO(response.content)) as image:
-
-            min_dimension = min(image.width, image.height)
-            scale_factor = 512 / min_dimension
-
-            new_width = int(image.width * scale_factor)
-            new_height = int(image.height * scale_factor)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            left, top = (new_width - 512) / 2, (new_height - 512) / 2
-            right, bottom = left + 512, top + 512
-            image = image.crop((left, top, right, bottom))
-
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-
-            image_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            response = self.client._post(
-                "account/store_profile_image",
-                data={"imgBase64": f"data:image/png;base64,{image_base64}"},
-            )
+        response = self.client._post(
+            "account/store_profile_image",
+            data={"imgBase64": _profile_picture_content(response.content)},
+        )
 
-            return User(self.client, response["user"])
+        return User(self.client, response["user"])
 
     def statistics(self, company_id: str | int) -> dict:
         """## Gets company statistics.
@@ -0,0 +1,350 @@
+"""A local agent holding an unlocked private key for several client processes.
+
+The agent unlocks the key once and answers RSA operations over a Unix domain
+socket, clients pass Client(key_agent=path) instead of an encryption password
+and start without the slow passphrase import:
+
+    python -m stashconnect.agent ~/.stashconnect/agent.sock
+
+The email, password and encryption password are read from the
+STASHCONNECT_EMAIL, STASHCONNECT_PASSWORD and STASHCONNECT_ENCRYPTION_PASSWORD
+environment variables or prompted for.
+
+The socket is created with 0600 permissions and, where the platform supports
+SO_PEERCRED (Linux), connections of other users are refused.
+"""
+
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+
+
+class AgentError(Exception):
+    # raised for operations the agent refused or failed
+    pass
+
+
+def _peer_uid(connection) -> int | None:
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid
+
+
+class KeyAgent:
+    """## Serves RSA operations of an unlocked private key over a Unix socket.
+
+    #### Args:
+        path (str): The sockets path.
+        private_key: The unlocked RSA private key.
+        allowed_uids (set, optional): User ids allowed to connect. Defaults to the current user.
+
+    #### Operations:
+        decrypt: decrypts base64 OAEP ciphertexts (chat keys).
+        encrypt: encrypts a key for the agents or a given public key.
+        publickey: returns the PEM encoded public key.
+    """
+
+    def __init__(self, path: str, private_key, *, allowed_uids: set = None):
+        self.path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        self.private_key = private_key
+        self.allowed_uids = {os.getuid()} if allowed_uids is None else set(allowed_uids)
+
+        self._socket = None
+        self._thread = None
+
+        from .crypto_utils import CryptoUtils
+
+        self._public_key = CryptoUtils.export_public_key(
+            CryptoUtils.public_key(private_key)
+        )
+
+    @classmethod
+    def from_client(cls, client, path: str, **kwargs) -> "KeyAgent":
+        """## Creates an agent for the private key of a logged in client.
+
+        #### Args:
+            client (Client): A client created with an encryption password.
+            path (str): The sockets path.
+
+        #### Returns:
+            KeyAgent: The agent (not started yet).
+        """
+        if client._private_key is None:
+            raise ValueError("the client has no private key, pass encryption_password")
+
+        return cls(path, client._private_key, **kwargs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> "KeyAgent":
+        """## Listens on the socket and serves clients on background threads.
+
+        #### Returns:
+            KeyAgent: The agent.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # the umask makes the socket 0600 from the start
+        umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.path)
+        finally:
+            os.umask(umask)
+
+        os.chmod(self.path, 0o600)
+        self._socket.listen(64)
+
+        self._thread = threading.Thread(
+            target=self._accept, name="stashconnect-agent", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """## Closes the socket."""
+        if self._socket is None:
+            return
+
+        self._socket.close()
+        self._socket = None
+
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def serve_forever(self) -> None:
+        """## Starts the agent and blocks until interrupted."""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _accept(self):
+        while self._socket is not None:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+
+            uid = _peer_uid(connection)
+            if uid is not None and uid not in self.allowed_uids:
+                connection.close()
+                continue
+
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _serve(self, connection):
+        with connection, connection.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    response = {"result": self._handle(json.loads(line))}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+
+                stream.write(json.dumps(response).encode("utf-8") + b"\n")
+                stream.flush()
+
+    def _handle(self, request):
+        from .crypto_utils import CryptoUtils
+
+        operation = request.get("op")
+
+        if operation == "decrypt":
+            decrypted = []
+            for encrypted_key in request["keys"]:
+                try:
+                    key = CryptoUtils.decrypt_key(encrypted_key, self.private_key)
+                    decrypted.append(base64.b64encode(key).decode("utf-8"))
+                except ValueError:
+                    decrypted.append(None)
+
+            return decrypted
+
+        if operation == "encrypt":
+            public_key = request.get("public_key")
+            public_key = (
+                CryptoUtils.public_key(self.private_key)
+                if public_key is None
+                else CryptoUtils.import_public_key(public_key)
+            )
+            return CryptoUtils.encrypt_key(base64.b64decode(request["key"]), public_key)
+
+        if operation == "publickey":
+            return self._public_key
+
+        raise ValueError(f"unknown operation {operation!r}")
+
+
+class AgentKey:
+    """## Stands in for an unlocked private key by asking a KeyAgent.
+
+    #### Args:
+        path (str): The agents socket path.
+        timeout (float, optional): Seconds to wait for the agent. Defaults to 30.
+
+    #### Info:
+        :CryptoUtils.decrypt_key() accepts it in place of an RSA key object and
+        publickey() returns the real public key. The connection is shared by all threads.
+    """
+
+    def __init__(self, path: str, *, timeout: float = 30):
+        self.path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._stream = None
+        self._public_key = None
+
+    def _request(self, request: dict):
+        payload = json.dumps(request).encode("utf-8") + b"\n"
+
+        with self._lock:
+            # one reconnect if the agent was restarted
+            for attempt in range(2):
+                try:
+                    if self._stream is None:
+                        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        connection.settimeout(self.timeout)
+                        connection.connect(self.path)
+                        self._stream = connection.makefile("rwb")
+                        connection.close()  # the file keeps the socket open
+
+                    self._stream.write(payload)
+                    self._stream.flush()
+                    line = self._stream.readline()
+                    if not line:
+                        raise ConnectionError("the key agent closed the connection")
+                    break
+                except OSError:
+                    self.close()
+                    if attempt == 1:
+                        raise
+
+        response = json.loads(line)
+        if "error" in response:
+            raise AgentError(response["error"])
+
+        return response["result"]
+
+    def close(self) -> None:
+        """## Closes the connection to the agent."""
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+    def decrypt(self, encrypted_key: str | bytes) -> bytes:
+        """## Decrypts an RSA encrypted key.
+
+        #### Args:
+            encrypted_key (str | bytes): The base64 encoded ciphertext.
+
+        #### Returns:
+            bytes: The decrypted key.
+        """
+        key = self.decrypt_many([encrypted_key])[0]
+        if key is None:
+            raise ValueError("the key agent could not decrypt the key")
+
+        return key
+
+    def decrypt_many(self, encrypted_keys: list) -> list:
+        """## Decrypts many RSA encrypted keys in one round trip.
+
+        #### Args:
+            encrypted_keys (list): The base64 encoded ciphertexts.
+
+        #### Returns:
+            list: The decrypted keys in the same order, None where decryption failed.
+        """
+        keys = [
+            key.decode("utf-8") if isinstance(key, bytes) else key
+            for key in encrypted_keys
+        ]
+        decrypted = self._request({"op": "decrypt", "keys": keys})
+        return [None if key is None else base64.b64decode(key) for key in decrypted]
+
+    def encrypt(self, key: bytes, public_key: str = None) -> str:
+        """## Encrypts a key with the agents (or another) public key.
+
+        #### Args:
+            key (bytes): The plain key.
+            public_key (str, optional): A PEM encoded public key. Defaults to the agents key.
+
+        #### Returns:
+            str: The encrypted key as base64.
+        """
+        request = {"op": "encrypt", "key": base64.b64encode(key).decode("utf-8")}
+        if public_key is not None:
+            request["public_key"] = public_key
+
+        return self._request(request)
+
+    def publickey(self):
+        """## Returns the agents public key.
+
+        #### Returns:
+            The RSA public key object.
+        """
+        if self._public_key is None:
+            from .crypto_utils import CryptoUtils
+
+            self._public_key = CryptoUtils.import_public_key(
+                self._request({"op": "publickey"})
+            )
+
+        return self._public_key
+
+
+def main() -> int:
+    import getpass
+
+    from .client import Client
+
+    if len(sys.argv) != 2:
+        print("usage: python -m stashconnect.agent SOCKET_PATH")
+        return 2
+
+    client = Client(
+        email=os.environ.get("STASHCONNECT_EMAIL") or input("Email: "),
+        password=os.environ.get("STASHCONNECT_PASSWORD")
+        or getpass.getpass("Password: "),
+        encryption_password=os.environ.get("STASHCONNECT_ENCRYPTION_PASSWORD")
+        or getpass.getpass("Encryption password: "),
+        base_url=os.environ.get("STASHCONNECT_BASE_URL", "stashcat.com"),
+        api_url=os.environ.get("STASHCONNECT_API_URL"),
+    )
+
+    agent = KeyAgent.from_client(client, sys.argv[1])
+    print(f"Serving the private key on {agent.path}")
+    agent.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
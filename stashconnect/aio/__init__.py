@@ -0,0 +1,8 @@
+"""
+StashConnect asyncio client
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+An asyncio version of the StashConnect client built on aiohttp
+and the python-socketio AsyncClient.
+"""
+
+from .client import AsyncClient
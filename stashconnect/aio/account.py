@@ -0,0 +1,172 @@
+from ..account import _profile_picture_content
+from ..models import User
+
+
+class AsyncAccountManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def change_status(self, status: str) -> dict:
+        """## Changes the users status.
+
+        #### Args:
+            status (str): The new status
+
+        #### Returns:
+            dict: The new status.
+        """
+        response = await self.client._post(
+            "account/change_status", data={"status": status}
+        )
+        return response
+
+    async def change_email(self, email: str) -> dict:
+        """## Changes the users email.
+
+        #### Args:
+            email (str): The new email.
+
+        #### Returns:
+            dict: The new email.
+        """
+        response = await self.client._post(
+            "/account/change_email", data={"email": email}
+        )
+        return response
+
+    async def resend_validation_email(self, email: str) -> str:
+        """## Resends a validation email.
+
+        #### Args:
+            email (str): The used email.
+
+        #### Returns:
+            str: The success status.
+        """
+        response = await self.client._post(
+            "/register/resend_validation_email", data={"email": email}
+        )
+        return response
+
+    async def change_password(self, new_password: str, old_password: str) -> dict:
+        """## Changes a users password.
+
+        #### Args:
+            new_password (str): The new password.
+            old_password (str): The old password.
+
+        #### Returns:
+            dict: The success status.
+        """
+        data = {"new_password": new_password, "old_password": old_password}
+        response = await self.client._post("/account/change_password", data=data)
+        return response
+
+    async def settings(self) -> dict:
+        """## Gets the users settings.
+
+        #### Returns:
+            dict: The settings
+        """
+        response = await self.client._post("/account/settings", data={})
+        return response["settings"]
+
+    async def active_devices(self) -> dict:
+        """## Gets a users active devices.
+
+        #### Returns:
+            dict: The active devices.
+        """
+        response = await self.client._post("/account/list_active_devices", data={})
+        return response["devices"]
+
+    async def remove_device(self, device_id: str | int) -> dict:
+        """## Deactivates an active device.
+
+        #### Args:
+            device_id (str | int): The device id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        response = await self.client._post(
+            "account/deactivate_device", data={"device_to_remove": device_id}
+        )
+        return response
+
+    async def notifications(self, limit: int = 20, offset: int = 0) -> dict:
+        """## Gets a users notifications.
+
+        #### Args:
+            limit (int, optional): The response limit. Defaults to 20.
+            offset (int, optional): The response offset. Defaults to 0.
+
+        #### Returns:
+            dict: The notifications.
+        """
+        data = {"limit": limit, "offset": offset}
+        response = await self.client._post("notifications/get", data=data)
+        return response["notifications"]
+
+    async def notification_count(self) -> int:
+        """## Gets the notification count.
+
+        #### Returns:
+            int: The notification count.
+        """
+        response = await self.client._post("notifications/count", data={})
+        return int(response["count"])
+
+    async def location(self) -> dict:
+        """## Gets the users location information.
+
+        #### Returns:
+            dict: The information.
+        """
+        response = await self.client._post("/location/get", data={})
+        return response["location"]
+
+    async def reset_profile_picture(self) -> dict:
+        """## Resets the users profile picture.
+
+        #### Returns:
+            dict: The success status.
+        """
+        response = await self.client._post("account/reset_profile_image", data={})
+        return response
+
+    async def change_profile_picture(self, url: str) -> User:
+        """## Changes the users profile picture.
+
+        #### Args:
+            url (str): A image url.
+
+        #### Returns:
+            User: A user object.
+        """
+        async with self.client._open_session().get(url) as response:
+            response.raise_for_status()
+            content = await response.read()
+
+        content = await self.client.run_crypto(_profile_picture_content, content)
+
+        response = await self.client._post(
+            "account/store_profile_image",
+            data={"imgBase64": content},
+        )
+
+        return User(self.client, response["user"])
+
+    async def statistics(self, company_id: str | int) -> dict:
+        """## Gets company statistics.
+
+        #### Args:
+            company_id (str | int): The companies id.
+
+        #### Returns:
+            dict: The companies statistics
+        """
+        response = await self.client._post(
+            "manage/accounts", data={"company_id": company_id}
+        )
+        return response
@@ -0,0 +1,25 @@
+from ..authentication import AuthManager
+
+
+class AsyncAuthManager(AuthManager):
+    async def _login(self, email: str, password: str, app_name: str) -> dict:
+        """## Logs into a account.
+
+        #### Args:
+            email (str): The users email.
+            password (str): The users password.
+            app_name (str): The app name to be used.
+
+        #### Returns:
+            dict: User data.
+        """
+        data = {
+            "email": email,
+            "password": password,
+            "app_name": app_name,
+            "encrypted": "true",
+            "callable": "true",
+        }
+
+        response = await self.client._post("auth/login", data=data, auth=False)
+        return response
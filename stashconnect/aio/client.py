@@ -0,0 +1,852 @@
+import aiohttp
+import asyncio
+import base64
+import contextlib
+import functools
+import json
+import os
+import ssl
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .messages import AsyncMessageManager
+from .account import AsyncAccountManager
+from .users import AsyncUserManager
+from .conversations import AsyncConversationManager
+from .companies import AsyncCompanyManager
+from .channels import AsyncChannelManager
+from .files import AsyncFileManager
+from .authentication import AsyncAuthManager
+from .sync import AsyncSyncManager
+from .tools import AsyncTools
+
+from ..agent import AgentKey
+from ..crypto_utils import TimedCrypto
+from ..client import headers
+from ..scheduler import RequestScheduler
+from ..metrics import MetricsRegistry
+from ..session import SessionStore
+from ..identity import IdentityMap
+from ..keycache import ConversationKeyCache, PublicKeyCache, decrypt_keys
+from ..exceptions import (
+    APIError,
+    ConnectError,
+    FatalError,
+    NetworkError,
+    NetworkTimeout,
+    raise_for_status,
+)
+from ..messages import _chat
+from ..models import Message, _register_client
+
+from .. import __version__
+
+# aiohttp can only decode brotli when the optional brotli package is installed
+async_headers = {**headers, "Accept-Encoding": "gzip, deflate"}
+
+# failures to open the connection (ConnectionTimeoutError exists since aiohttp 3.10)
+_CONNECT_ERRORS = (
+    aiohttp.ClientConnectorError,
+    getattr(aiohttp, "ConnectionTimeoutError", aiohttp.ClientConnectorError),
+)
+
+
+def _network_error(error, url) -> NetworkError:
+    # a connection that could not be opened never sent the request, so it is always safe to retry
+    if isinstance(error, _CONNECT_ERRORS):
+        return ConnectError(str(error), url=url)
+
+    if isinstance(error, asyncio.TimeoutError):
+        return NetworkTimeout(str(error), url=url)
+
+    return NetworkError(str(error), url=url)
+
+
+def _form_fields(data):
+    # mirror the form encoding of requests: None is skipped and lists repeat the key
+    fields = []
+
+    for key, value in data.items():
+        values = value if isinstance(value, list | tuple) else [value]
+
+        for item in values:
+            if item is None:
+                continue
+
+            if not isinstance(item, str | bytes):
+                item = str(item)
+
+            fields.append((key, item))
+
+    return fields
+
+
+class AsyncClient:
+    """## Represents an asyncio client connection to Stashcat API.
+
+    #### Usage:
+        async with AsyncClient(email=..., password=...) as client:
+            await client.messages.send("conversation_id", "hello")
+
+    #### Attributes:
+        .email (str): The user's email used for authentication.
+        .password (str): The user's password.
+        .device_id (str): The device_id used to log in, defaults to "stashconnect".
+        .client_key (str): The key used in submitting requests.
+        .socket_id (str): The ID for the websocket connection.
+        .user_id (str): The unique ID of the connected user's account.
+        .image_url (str): URL to the user's profile image.
+        .first_name (str): User's first name.
+        .last_name (str): User's last name.
+
+    #### Info:
+        :Model objects built by this client never perform requests while
+        being constructed, fields missing from a payload stay unset.
+        :Model methods (message.like(), ...) return coroutines.
+    """
+
+    is_async = True
+
+    def __init__(
+        self,
+        *,
+        email,
+        password,
+        base_url="stashcat.com",
+        api_url=None,
+        push_url=None,
+        proxy=None,
+        cert_path=None,
+        encryption_password=None,
+        device_id=None,
+        app_name=None,
+        type_cache_size=4096,
+        type_cache_ttl=3600,
+        max_connections=100,
+        crypto_workers=None,
+        scheduler=None,
+        metrics=None,
+        session_store=None,
+        key_cache_size=4096,
+        key_cache=None,
+        public_key_ttl=3600,
+        identity_ttl=300,
+        key_agent=None,
+        sync_store=None,
+    ):
+
+        self.messages = AsyncMessageManager(self)
+        self.tools = AsyncTools(self, type_cache_size, type_cache_ttl)
+        self.account = AsyncAccountManager(self)
+        self.users = AsyncUserManager(self)
+        self.files = AsyncFileManager(self)
+        self.conversations = AsyncConversationManager(self)
+        self.companies = AsyncCompanyManager(self)
+        self.channels = AsyncChannelManager(self)
+        self.auth = AsyncAuthManager(self)
+        self.sync = AsyncSyncManager(self, sync_store)
+
+        self.email = email
+        self.password = password
+        self.encryption_password = encryption_password
+        self.proxy = proxy
+
+        self.device_id = "stashconnect" if device_id is None else device_id
+        self.app_name = (
+            f"stashconnect v.{__version__}" if app_name is None else app_name
+        )
+
+        # api_url / push_url replace the urls derived from base_url (e.g. a local server)
+        self._main_url = f"https://api.{base_url}/"
+        self._push_url = f"https://push.{base_url}/"
+        if api_url is not None:
+            self._main_url = api_url.rstrip("/") + "/"
+        if push_url is not None:
+            self._push_url = push_url.rstrip("/") + "/"
+
+        self.scheduler = RequestScheduler() if scheduler is None else scheduler
+
+        if metrics is True:
+            metrics = MetricsRegistry()
+        self.metrics = metrics or None
+
+        # crypto timings go to this clients registry only
+        self.crypto = TimedCrypto(self.metrics)
+
+        self._headers = async_headers
+        self._cert_path = cert_path
+        self._max_connections = max_connections
+        self._session = None
+
+        # aiohttp takes a single proxy url per request
+        if proxy is not None:
+            self._proxy = proxy.get("https", proxy.get("http"))
+        else:
+            self._proxy = None
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=crypto_workers, thread_name_prefix="stashconnect-crypto"
+        )
+
+        if isinstance(session_store, str | os.PathLike):
+            session_store = SessionStore(session_store)
+        self.session_store = session_store
+        self._stored_session = {}
+
+        self.client_key = None
+        # a path or a ConversationKeyCache, a path is encrypted with the encryption password
+        if isinstance(key_cache, str | os.PathLike):
+            key_cache = ConversationKeyCache(
+                key_cache_size, path=key_cache, password=encryption_password
+            )
+        elif key_cache is None:
+            key_cache = ConversationKeyCache(key_cache_size)
+        self.conversation_keys = key_cache
+        self.public_keys = PublicKeyCache(ttl=public_key_ttl, crypto=self.crypto)
+        # one shared User / Channel / Company / File object per id
+        self.identities = IdentityMap(ttl=identity_ttl)
+
+        # unpickled models attach to the client of their account
+        _register_client(self)
+
+        self.events = {}
+        self.listeners = {}
+        self.loops = []
+
+        self._key_requests = {}
+
+        # a key agent holds the unlocked private key, no encryption password is needed
+        self.key_agent = None if key_agent is None else AgentKey(key_agent)
+        self._private_key = self.key_agent
+        self._ping_target = None
+        self._end_time = None
+        self._latency_ws = None
+
+        self.sio = None
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _open_session(self):
+        if self._session is not None and not self._session.closed:
+            return self._session
+
+        ssl_context = None
+        if self._cert_path is not None:
+            ssl_context = ssl.create_default_context(cafile=self._cert_path)
+
+        connector = aiohttp.TCPConnector(
+            limit=self._max_connections, ssl=ssl_context, keepalive_timeout=30
+        )
+        self._session = aiohttp.ClientSession(
+            headers=self._headers, connector=connector
+        )
+        return self._session
+
+    async def login(self) -> dict:
+        """## Logs in and imports the private key if a password was given.
+
+        #### Returns:
+            dict: The login response (the stored session if it was resumed).
+        """
+        response = await self._resume_session()
+        if response is None:
+            response = await self._login()
+
+        if self.encryption_password is not None and self.key_agent is None:
+            await self.get_private_key(encryption_password=self.encryption_password)
+
+        return response
+
+    async def close(self) -> None:
+        """## Closes the socket connection, the http session and the crypto executor."""
+        if self.sio is not None and self.sio.connected:
+            await self.sio.disconnect()
+
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+        self._executor.shutdown(wait=False)
+
+    async def _login(self):
+        response = await self.auth._login(self.email, self.password, self.app_name)
+
+        self.client_key = response["client_key"]
+        self._set_userinfo(response["userinfo"])
+
+        if self.encryption_password is None and self.key_agent is None:
+            print(
+                f"Logged in as {self.first_name} {self.last_name}! "
+                "No encryption password was provided so some features won't work"
+            )
+        else:
+            print(f"Logged in as {self.first_name} {self.last_name}!")
+
+        self._save_session()
+        return response
+
+    def _set_userinfo(self, userinfo):
+        self.socket_id = userinfo["socket_id"]
+        self.user_id = userinfo["id"]
+        self.image_url = userinfo["image"]
+
+        self.first_name = userinfo["first_name"]
+        self.last_name = userinfo["last_name"]
+
+    def _session_account(self):
+        return {
+            "email": self.email,
+            "url": self._main_url,
+            "device_id": self.device_id,
+        }
+
+    async def _resume_session(self):
+        if self.session_store is None:
+            return None
+
+        session = self.session_store.load()
+        if session is None or session.get("account") != self._session_account():
+            return None
+
+        self.client_key = session["client_key"]
+
+        try:
+            user = (await self._post("users/me", data={}))["user"]
+        except FatalError:
+            self.session_store.clear()
+            self.client_key = None
+            return None
+
+        # users/me does not contain the socket_id
+        self._set_userinfo({**session["userinfo"], **user})
+        self._stored_session = session
+
+        print(f"Resumed session as {self.first_name} {self.last_name}!")
+        return session
+
+    def _save_session(self, **values):
+        if self.session_store is None:
+            return
+
+        if not values:
+            self._stored_session = {
+                "account": self._session_account(),
+                "client_key": self.client_key,
+                "userinfo": {
+                    "id": self.user_id,
+                    "socket_id": self.socket_id,
+                    "image": self.image_url,
+                    "first_name": self.first_name,
+                    "last_name": self.last_name,
+                },
+            }
+
+        self._stored_session.update(values)
+        self.session_store.save(self._stored_session)
+
+    async def _post(
+        self,
+        url,
+        *,
+        data,
+        auth=True,
+        return_all=False,
+        files=None,
+        idempotent=None,
+        **kwargs,
+    ):
+        """## Sends a request to the api.
+
+        #### Info:
+            :With return_all the raw response body is returned as bytes.
+            :idempotent=True lets the scheduler resend a write after a 5xx or timeout.
+        """
+        data["device_id"] = self.device_id
+
+        if auth is True:
+            data["client_key"] = self.client_key
+
+        return await self.scheduler.call_async(
+            url,
+            lambda: self._send(url, data, return_all, files, **kwargs),
+            idempotent,
+        )
+
+    @contextlib.asynccontextmanager
+    async def _stream(self, url, *, data, auth=True):
+        """## Sends a request and yields the open response to read its body in chunks.
+
+        #### Info:
+            :Only opening the response is retried, reading the body is not.
+        """
+        data["device_id"] = self.device_id
+
+        if auth is True:
+            data["client_key"] = self.client_key
+
+        response = await self.scheduler.call_async(
+            url, lambda: self._open_response(url, data)
+        )
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def _open_response(self, url, data):
+        session = self._open_session()
+
+        start = time.perf_counter()
+        error = None
+
+        try:
+            response = await session.post(
+                f"{self._main_url}{url}", data=_form_fields(data), proxy=self._proxy
+            )
+
+            try:
+                raise_for_status(
+                    response.status, response.headers, url, response.reason
+                )
+            except Exception:
+                response.release()
+                raise
+
+            return response
+
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            error = _network_error(e, url)
+            raise error from e
+
+        except Exception as e:
+            error = e
+            raise
+
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_request(
+                    url, time.perf_counter() - start, error=error
+                )
+
+    async def _send(self, url, data, return_all, files, **kwargs):
+        session = self._open_session()
+        fields = _form_fields(data)
+
+        # multipart forms can only be sent once, so they are built per attempt
+        if files is not None:
+            form = aiohttp.FormData()
+            for key, value in fields:
+                form.add_field(key, value)
+
+            for key, (filename, content, content_type) in files.items():
+                form.add_field(
+                    key, content, filename=filename, content_type=content_type
+                )
+        else:
+            form = fields
+
+        start = time.perf_counter()
+        bytes_in = 0
+        error = None
+
+        try:
+            async with session.post(
+                f"{self._main_url}{url}", data=form, proxy=self._proxy, **kwargs
+            ) as response:
+
+                raise_for_status(
+                    response.status, response.headers, url, response.reason
+                )
+
+                body = await response.read()
+                bytes_in = len(body)
+
+                if return_all:
+                    return body
+
+                response = json.loads(body)
+
+            status = response["status"]
+            payload = response["payload"]
+
+            if status["value"] != "OK":
+                raise APIError(status["message"], url=url, status=status)
+
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            error = _network_error(e, url)
+            raise error from e
+
+        except Exception as e:
+            error = e
+            raise
+
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_request(
+                    url, time.perf_counter() - start, bytes_in=bytes_in, error=error
+                )
+
+        return payload
+
+    async def run_crypto(self, func, *args, **kwargs):
+        """## Runs a cpu bound crypto function on the crypto executor.
+
+        #### Args:
+            func (callable): The function to run.
+            *args: The functions arguments.
+            **kwargs: The functions keyword arguments.
+
+        #### Returns:
+            The functions result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get_private_key(self, *, encryption_password: str) -> None:
+
+        stored_key = self._stored_session.get("private_key")
+        if stored_key is not None:
+            self._private_key = await self.run_crypto(
+                self.crypto.load_private_key, base64.b64decode(stored_key), None
+            )
+            return
+
+        print("Importing private key. Please wait...")
+        private_key = self._stored_session.get("encrypted_private_key")
+
+        if private_key is not None:
+            try:
+                self._private_key = await self.run_crypto(
+                    self.crypto.load_private_key,
+                    json.loads(private_key)["private"],
+                    encryption_password,
+                )
+            except (ValueError, KeyError, TypeError):
+                private_key = None
+
+        if private_key is None:
+            response = await self._post("security/get_private_key", data={})
+            private_key = response["keys"]["private_key"]
+
+            self._private_key = await self.run_crypto(
+                self.crypto.load_private_key,
+                json.loads(private_key)["private"],
+                encryption_password,
+            )
+
+        if self.session_store is None:
+            return
+
+        if self.session_store.store_private_key:
+            self._save_session(
+                encrypted_private_key=private_key,
+                private_key=base64.b64encode(
+                    self.crypto.export_private_key(self._private_key)
+                ).decode("utf-8"),
+            )
+        else:
+            self._save_session(encrypted_private_key=private_key)
+
+    async def get_conversation_key(self, target, target_type, key=None):
+
+        if self._private_key is None:
+            return None
+
+        conversation_key = self.conversation_keys.get(target)
+        if conversation_key is not None:
+            return conversation_key
+
+        # concurrent misses for the same chat share one request
+        request = self._key_requests.get(str(target))
+        if request is None:
+            request = asyncio.ensure_future(
+                self._fetch_conversation_key(target, target_type, key)
+            )
+            self._key_requests[str(target)] = request
+
+        return await asyncio.shield(request)
+
+    async def _fetch_conversation_key(self, target, target_type, key):
+        try:
+            return await self._decrypt_conversation_key(target, target_type, key)
+        finally:
+            self._key_requests.pop(str(target), None)
+
+    async def _decrypt_conversation_key(self, target, target_type, key):
+        encrypted_key = key
+
+        if encrypted_key is None:
+            if target_type == "conversation":
+                response = await self._post(
+                    "message/conversation", data={"conversation_id": target}
+                )
+                encrypted_key = response["conversation"]["key"]
+            else:
+                response = await self._post(
+                    "channels/info",
+                    data={"channel_id": target, "without_members": True},
+                )
+                encrypted_key = response["channels"]["key"]
+
+        decrypted_key = await self.run_crypto(
+            self.crypto.decrypt_key, encrypted_key, self._private_key
+        )
+
+        self.conversation_keys[target] = decrypted_key
+        return decrypted_key
+
+    async def prefetch_keys(self, targets: list = None, workers: int = None) -> int:
+        """## Fetches and decrypts the keys of the users conversations and channels.
+
+        #### Args:
+            targets (list, optional): Only warms these chat ids. Defaults to all chats.
+            workers (int, optional): The number of decryption threads. Defaults to the cpu count.
+
+        #### Returns:
+            int: The number of keys added to the cache.
+        """
+        if self._private_key is None:
+            return 0
+
+        wanted = None if targets is None else {str(target) for target in targets}
+        encrypted_keys = {}
+
+        def collect(target_id, target_type, key):
+            self.tools.types.set(target_id, target_type)
+
+            if not key or str(target_id) in self.conversation_keys:
+                return
+            if wanted is None or str(target_id) in wanted:
+                encrypted_keys[str(target_id)] = key
+
+        offset = 0
+        while True:
+            response = await self._post(
+                "message/conversations",
+                data={"limit": 100, "offset": offset, "archive": 0},
+            )
+            conversations = response["conversations"]
+
+            for conversation in conversations:
+                collect(conversation["id"], "conversation", conversation.get("key"))
+
+            offset += len(conversations)
+            if len(conversations) < 100:
+                break
+
+        companies = await self._post("company/member", data={"no_cache": True})
+        responses = await asyncio.gather(
+            *(
+                self._post("channels/subscripted", data={"company": company["id"]})
+                for company in companies["companies"]
+            )
+        )
+
+        for response in responses:
+            for channel in response["channels"]:
+                collect(channel["id"], "channel", channel.get("key"))
+
+        decrypted = await self.run_crypto(
+            decrypt_keys, encrypted_keys, self._private_key, workers, crypto=self.crypto
+        )
+        self.conversation_keys.update(decrypted)
+        return len(decrypted)
+
+    async def _build_message(self, data):
+        target_type, target = _chat(data)
+
+        await self.get_conversation_key(target, target_type)
+        return Message(self, data)
+
+    def event(self, name):
+
+        def decorator(func):
+            async def wrapper(*args):
+
+                if func.__name__ == "message_received":
+                    result = func(await self._build_message(args[0]["message"]))
+
+                else:
+                    if len(args) == 1:
+                        result = func(args[0])
+                    else:
+                        result = func(args)
+
+                if asyncio.iscoroutine(result):
+                    await result
+
+            self.events[name] = wrapper
+            return wrapper
+
+        return decorator
+
+    def add_listener(self, name: str, callback) -> None:
+        """## Calls a function with the raw arguments of a socket event.
+
+        #### Args:
+            name (str): The socket events name (e.g. "message_sync").
+            callback (callable): Called (and awaited if async) before the events handler.
+        """
+        self.listeners.setdefault(name, []).append(callback)
+
+    def remove_listener(self, name: str, callback) -> None:
+        """## Removes a function added with add_listener().
+
+        #### Args:
+            name (str): The socket events name.
+            callback (callable): The function.
+        """
+        callbacks = self.listeners.get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _dispatcher(self, name):
+        handler = self.events.get(name)
+
+        async def dispatch(*args):
+            for listener in list(self.listeners.get(name, ())):
+                try:
+                    result = listener(*args)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    print(f"A listener of {name} failed: {e!r}")
+
+            if handler is not None:
+                await handler(*args)
+
+        return dispatch
+
+    def loop(self, seconds):
+        def decorator(func):
+            async def run():
+                await asyncio.sleep(2)
+                while True:
+                    result = func()
+                    if asyncio.iscoroutine(result):
+                        await result
+                    await asyncio.sleep(seconds)
+
+            self.loops.append(run)
+            return func
+
+        return decorator
+
+    def event_modifier(self):
+        def decorator(func):
+            async def wrapper(*args):
+                if str(args[2]) == str(self.user_id) and str(args[1]) == str(
+                    self._ping_target
+                ):
+                    self._end_time = time.perf_counter()
+                await func(*args)
+
+            return wrapper
+
+        return decorator
+
+    def _timed_event(self, name, handler):
+        async def wrapper(*args):
+            with self.metrics.time_event(name):
+                await handler(*args)
+
+        return wrapper
+
+    async def _run(self, debug=False):
+
+        import socketio
+
+        self.sio = socketio.AsyncClient(
+            logger=debug, engineio_logger=debug, http_session=self._open_session()
+        )
+
+        @self.sio.event
+        async def connect():
+
+            print("Connected to the server.")
+
+            data = {
+                "hidden_id": self.socket_id,
+                "device_id": self.device_id,
+                "client_key": self.client_key,
+            }
+
+            await self.sio.emit("userid", data)
+
+        @self.sio.event
+        async def disconnect(*args):
+            print("Disconnected from the server")
+
+        for event_name in {**self.events, **self.listeners}:
+            event_handler = self._dispatcher(event_name)
+
+            if event_name == "user-started-typing":
+                event_handler = self.event_modifier()(event_handler)
+
+            if self.metrics is not None:
+                event_handler = self._timed_event(event_name, event_handler)
+
+            self.sio.on(event_name)(event_handler)
+
+        await self.sio.connect(self._push_url)
+        await self.sio.wait()
+
+    async def run(self, debug=False, prefetch_keys=True):
+        """## Runs the registered loops and socket events until disconnected.
+
+        #### Args:
+            debug (bool, optional): Enables socket.io logging. Defaults to False.
+            prefetch_keys (bool, optional): Decrypts all chat keys before the first event. Defaults to True.
+        """
+        if self.client_key is None:
+            await self.login()
+
+        if prefetch_keys and self._private_key is not None:
+            await self.prefetch_keys()
+
+        tasks = [asyncio.ensure_future(loop()) for loop in self.loops]
+
+        try:
+            if self.events or self.listeners:
+                await self._run(debug=debug)
+            elif tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def ws_latency(self, target, target_type=None):
+        """## Gets the websockets latency (currently broken).
+
+        #### Args:
+            target (int | str): A conversation to use. (Use the messages destination chat)
+            target_type (str, optional): The targets type, skips the type lookup.
+
+        #### Returns:
+            int: The websockets latency.
+            str: Error.
+        """
+        target_type = await self.tools.get_type(target, target_type)
+
+        start_time = time.perf_counter()
+        self._end_time = None
+        self._ping_target = target
+
+        await self.sio.emit(
+            "started-typing", (self.device_id, self.client_key, target_type, target)
+        )
+
+        await asyncio.sleep(2)
+
+        if self._end_time is None:
+            self._latency_ws = None
+            return "-"
+        else:
+            self._latency_ws = (round((self._end_time - start_time) * 100000)) / 100
+            return self._latency_ws
@@ -0,0 +1,149 @@
+import json
+
+from ..crypto_utils import CryptoUtils
+from ..keycache import wrap_keys
+from ..models import Conversation
+
+
+class AsyncConversationManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def _build(self, data: dict) -> Conversation:
+        # the conversation key has to be cached before the model is built
+        await self.client.get_conversation_key(
+            data["id"], "conversation", key=data["key"]
+        )
+        return Conversation(self.client, data)
+
+    async def archive(self, conversation_id: str | int) -> dict:
+        """## Archives a conversation.
+
+        #### Args:
+            conversation_id (str | int): The conversations id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post(
+            "message/archiveConversation", data={"conversation_id": conversation_id}
+        )
+
+    async def favorite(self, conversation_id: str | int) -> dict:
+        """## Favorites a conversation.
+
+        #### Args:
+            conversation_id (str | int): The conversations id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post(
+            "message/set_favorite",
+            data={"conversation_id": conversation_id, "favorite": True},
+        )
+
+    async def unfavorite(self, conversation_id: str | int) -> dict:
+        """## Unfavorites a conversation.
+
+        #### Args:
+            conversation_id (str | int): The conversations id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post(
+            "message/set_favorite",
+            data={"conversation_id": conversation_id, "favorite": False},
+        )
+
+    async def disable_notifications(
+        self, conversation_id: int | str, duration: int | str
+    ) -> str:
+        """## Disables notifications for a conversation.
+
+        #### Args:
+            conversation_id (int | str): The conversations id.
+            duration (int | str): how long the block should last (seconds).
+
+        #### Returns:
+            str: The end timestamp.
+        """
+        return await self.client._post(
+            "push/disable_notifications",
+            data={
+                "type": "conversation",
+                "content_id": conversation_id,
+                "duration": duration,
+            },
+        )
+
+    async def enable_notifications(self, conversation_id: int | str) -> dict:
+        """## Enables notifications for a conversation.
+
+        #### Args:
+            conversation_id (int | str): The conversations id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post(
+            "push/enable_notifications",
+            data={"type": "conversation", "content_id": conversation_id},
+        )
+
+    async def create(self, members: str | int | list) -> Conversation:
+        """## Creates a conversation with users.
+
+        #### Args:
+            members (str | int | list): The members of the conversation.
+
+        #### Returns:
+            Conversation: A conversation object.
+        """
+        conversation_key = CryptoUtils.random_bytes(32)
+
+        # encrypt conversation key using private key
+        users = [
+            {
+                "id": int(self.client.user_id),
+                "key": await self.client.run_crypto(
+                    self.client.crypto.encrypt_key,
+                    conversation_key,
+                    CryptoUtils.public_key(self.client._private_key),
+                ),
+            }
+        ]
+
+        if isinstance(members, str | int):
+            members = [members]
+
+        # encrypt conversation key using public key for all members
+        public_keys = await self.client.users.public_keys(members)
+        encrypted_keys = await self.client.run_crypto(
+            wrap_keys, conversation_key, public_keys, crypto=self.client.crypto
+        )
+
+        for member in public_keys:
+            users.append({"id": int(member), "key": encrypted_keys[member]})
+
+        response = await self.client._post(
+            "message/createEncryptedConversation",
+            data={"members": json.dumps(users), "unique_identifier": conversation_key},
+        )
+
+        return await self._build(response["conversation"])
+
+    async def info(self, conversation_id: str | int) -> Conversation:
+        """## Fetches the info of a conversation.
+
+        #### Args:
+            conversation_id (str | int): The conversations info.
+
+        #### Returns:
+            Conversation: A conversation object.
+        """
+        response = await self.client._post(
+            "message/conversation", data={"conversation_id": conversation_id}
+        )
+        return await self._build(response["conversation"])
@@ -0,0 +1,542 @@
+import os
+import mimetypes
+import time
+import uuid
+from io import BytesIO
+import json
+
+from ..crypto_utils import CryptoUtils
+from ..files import _image_dimensions, _preview_content, _seekable
+from ..models import Channel, Conversation, File
+
+
+def _open_input(file_input, filename):
+    # (stream, filename, opened), the input handling of FileManager.upload
+    if isinstance(file_input, bytes):
+        return BytesIO(file_input), filename, False
+
+    if hasattr(file_input, "read"):
+        # pipes (e.g. subprocess stdout) are named by their file descriptor
+        name = getattr(file_input, "name", None)
+        if isinstance(name, str):
+            # only the name, the local directories are none of the servers business
+            filename = os.path.basename(name)
+
+        return _seekable(file_input), filename, False
+
+    # if the file_input is a filepath
+    if filename != "stashconnect_file":
+        extension = os.path.splitext(file_input)[1]
+        filename += extension
+    else:
+        filename = os.path.basename(file_input)
+
+    return open(file_input, "rb"), filename, True
+
+
+def _inspect(stream):
+    # (start, size, width, height), leaves the stream at its start
+    stream_start = stream.tell()
+    image_width, image_height = _image_dimensions(stream)
+
+    file_size = stream.seek(0, os.SEEK_END) - stream_start
+    stream.seek(stream_start)
+
+    return stream_start, file_size, image_width, image_height
+
+
+class AsyncFileManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def quota(self) -> dict:
+        """## Gets the users quota.
+
+        #### Returns:
+            dict: The users quota.
+        """
+        response = await self.client._post(
+            "file/quota", data={"type": "personal", "type_id": self.client.user_id}
+        )
+        return response["quota"]
+
+    async def upload(
+        self,
+        target: str | int,
+        file_input: str | BytesIO | bytes,
+        filename: str = "stashconnect_file",
+        encrypted: bool = True,
+        preview: bool = True,
+        target_type: str = None,
+    ) -> File:
+        """## Uploads a file to a target location.
+
+        #### Args:
+            target (str | int): The upolads target id.
+            filepath (str | BytesIO | bytes): The files location path or a file-like object or bytes.
+            filename(str): Only needed for bytes and BytesIO. Defaults to "file".
+            encrypted (bool, optional): Sets whether a file should be encrypted. Defaults to True.
+            preview (bool, optional): Sets whether a preview image should be set. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            File: A file object.
+        """
+        if encrypted and self.client._private_key is None:
+            print(
+                "Could not upload encrypted file as no encryption password was provided"
+            )
+            return
+
+        start = time.perf_counter()
+        run = self.client.run_crypto
+
+        stream, filename, opened = await run(_open_input, file_input, filename)
+
+        if encrypted:
+            # generate random iv and file key
+            iv = CryptoUtils.random_bytes(16)
+            file_key = CryptoUtils.random_bytes(32)
+
+        # guess content type from extension
+        content_type = mimetypes.guess_type(filename)[0]
+        if not content_type:
+            content_type = "application/octet-stream"
+
+        max_chunk_size = 5 * 1024 * 1024  # limit chunk upload size to 5MB
+        upload_identifier = str(uuid.uuid4())  # the uploads id
+
+        try:
+            # the file is read chunk by chunk, only its size is needed up front
+            stream_start, file_size, image_width, image_height = await run(
+                _inspect, stream
+            )
+
+            # a single CBC stream over the whole file, only the last chunk is padded
+            if encrypted:
+                encryptor = CryptoUtils.aes_encryptor(file_key, iv)
+                upload_size = CryptoUtils.padded_size(file_size)
+            else:
+                encryptor = None
+                upload_size = file_size
+
+            total_chunks = max(1, -(-upload_size // max_chunk_size))
+            target_type = await self.client.tools.get_type(target, target_type)
+
+            for i in range(total_chunks):
+                data_chunk = await run(stream.read, max_chunk_size)
+
+                # encrypt the chunk
+                if encryptor is not None:
+                    encrypted_chunk = await run(encryptor.update, data_chunk)
+                    if i == total_chunks - 1:
+                        encrypted_chunk += encryptor.finalize()
+                else:
+                    encrypted_chunk = data_chunk
+
+                data = {
+                    "resumableChunkNumber": i,
+                    "resumableChunkSize": max_chunk_size,
+                    "resumableCurrentChunkSize": len(encrypted_chunk),
+                    "resumableTotalSize": upload_size,
+                    "resumableType": content_type,
+                    "resumableIdentifier": upload_identifier,
+                    "resumableFilename": filename,
+                    "resumableRelativePath": filename,
+                    "resumableTotalChunks": total_chunks,
+                    "folder": 0,
+                    "type": target_type,
+                    "type_id": target,
+                    "encrypted": encrypted,
+                    "media_width": image_width,
+                    "media_height": image_height,
+                }
+
+                if encrypted:
+                    data["iv"] = iv.hex()
+
+                files = {
+                    "file": (
+                        "[object Object]",
+                        encrypted_chunk,
+                        "application/octet-stream",
+                    )
+                }
+
+                # upload the current chunk
+                response = await self.client._post(
+                    "file/upload", data=data, files=files
+                )
+                file = response["file"]
+
+            if preview and not opened:
+                stream.seek(stream_start)
+        finally:
+            if opened:
+                stream.close()
+
+        file_id = file["id"]
+
+        if encrypted:
+            # sets a file access key for encrypted files
+
+            iv = CryptoUtils.random_bytes(16)
+            conversation_key = await self.client.get_conversation_key(
+                target, target_type
+            )
+
+            data = {
+                "file_id": file_id,
+                "target": target_type,
+                "target_id": target,
+                "key": self.client.crypto.encrypt_aes(
+                    file_key, conversation_key, iv
+                ).hex(),
+                "iv": iv.hex(),
+            }
+
+            response = await self.client._post(
+                "security/set_file_access_key", data=data
+            )
+
+        if self.client.metrics is not None:
+            self.client.metrics.observe_transfer(
+                "upload", file_size, time.perf_counter() - start
+            )
+
+        if preview:
+            await self.store_preview_image(file_id, file_input if opened else stream)
+
+        return File(self.client, file)
+
+    async def store_preview_image(
+        self, file_id: str | int, filepath: str | BytesIO
+    ) -> File | dict:
+        """## Stores a preview image for a file.
+
+        #### Args:
+            file_id (str | int): The files id.
+            filepath (str | BytesIO): The images file path or a file-like object.
+
+        #### Returns:
+            File | dict: A file object or a status: false dict.
+        """
+        try:
+            content = await self.client.run_crypto(_preview_content, filepath)
+
+            data = {"file_id": file_id, "content": content}
+
+            response = await self.client._post("file/storePreviewImage", data=data)
+            return File(self.client, response["file"])
+
+        except Exception:
+            return {"success": False}
+
+    async def _file_key(self, file_info: dict) -> bytes:
+        # the file key, encrypted with the key of the chat the file was shared in
+        key_info = file_info["keys"][0]
+
+        conversation_key = await self.client.get_conversation_key(
+            key_info["chat_id"], key_info["type"], key=key_info["chat_key"]
+        )
+        return self.client.crypto.decrypt_aes(
+            bytes.fromhex(key_info["key"]),
+            conversation_key,
+            bytes.fromhex(key_info["iv"]),
+        )
+
+    async def _download_chunks(self, id: str | int, file_info: dict, chunk_size: int):
+        # yields the (decrypted) content in chunks, the response is never held at once
+        start = time.perf_counter()
+        received = 0
+
+        if file_info["encrypted"]:
+            decryptor = CryptoUtils.aes_decryptor(
+                await self._file_key(file_info), bytes.fromhex(file_info["e2e_iv"])
+            )
+        else:
+            decryptor = None
+
+        async with self.client._stream(f"file/download?id={id}", data={}) as response:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                received += len(chunk)
+
+                if decryptor is None:
+                    yield chunk
+                else:
+                    yield await self.client.run_crypto(decryptor.update, chunk)
+
+        if decryptor is not None:
+            yield decryptor.finalize()
+
+        if self.client.metrics is not None:
+            self.client.metrics.observe_transfer(
+                "download", received, time.perf_counter() - start
+            )
+
+    async def download(
+        self,
+        id: str | int,
+        directory: str = "",
+        filename: str = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> str:
+        """## Downloads a file to a local location.
+
+        #### Args:
+            id (str | int): The files id.
+            directory (str, optional): The download dir. Defaults to main.
+            filename (str, optional): The new filename. Defaults to the main name.
+            chunk_size (int, optional): Bytes read and decrypted at once. Defaults to 1 MB.
+
+        #### Returns:
+            str: The path of the saved file.
+        """
+        file_info = await self._info(id)
+
+        if filename is None:
+            file_path = os.path.join(directory, file_info["name"])
+        else:
+            file_path = os.path.join(directory, filename + "." + file_info["ext"])
+
+        if file_info["encrypted"] and self.client._private_key is None:
+            print(
+                "Could not download encrypted content as no encryption password was provided"
+            )
+            return
+
+        # a failed decryption must not leave a truncated file at file_path
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, "xb") as file:
+                async for chunk in self._download_chunks(id, file_info, chunk_size):
+                    await self.client.run_crypto(file.write, chunk)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return file_path
+
+    async def download_bytes(
+        self, id: str | int, chunk_size: int = 1024 * 1024
+    ) -> bytes:
+        """## Downloads a file and returns its content as bytes.
+
+        #### Args:
+            id (str | int): The file's id.
+            chunk_size (int, optional): Bytes read and decrypted at once. Defaults to 1 MB.
+
+        #### Returns:
+            bytes: The files content.
+        """
+        file_info = await self._info(id)
+
+        if file_info["encrypted"] and self.client._private_key is None:
+            print(
+                "Could not download encrypted content as no encryption password was provided"
+            )
+            return
+
+        content = bytearray()
+        async for chunk in self._download_chunks(id, file_info, chunk_size):
+            content += chunk
+
+        return bytes(content)
+
+    async def _info(self, id: str | int) -> dict:
+        """## Fetches the info of a file (dict).
+
+        #### Args:
+            id (str | int): The files id.
+
+        #### Returns:
+            dict: The files dict.
+        """
+        response = await self.client._post("file/info", data={"file_id": id})
+        return response["file"]
+
+    async def info(self, id: str | int) -> File:
+        """## Fetches the info of a file.
+
+        #### Args:
+            id (str | int): The files id.
+
+        #### Returns:
+            File: A file object.
+        """
+        return File(self.client, await self._info(id))
+
+    async def infos(self, ids: str | int | list, *, raw: bool = False) -> list:
+        """## Fetches mutliple files.
+
+        #### Args:
+            ids (str | int | list): The files ids.
+            raw (bool, optional): Returns the payloads (dict) without building objects. Defaults to False.
+
+        #### Returns:
+            list: A list of files.
+        """
+        if isinstance(ids, str | int):
+            ids_sent = [ids]
+        else:
+            ids_sent = ids
+
+        response = await self.client._post(
+            "file/infos", data={"file_ids": json.dumps(ids_sent)}
+        )
+
+        if raw:
+            return response["files"]
+
+        return [File(self.client, file) for file in response["files"]]
+
+    async def delete(self, ids: str | int | list) -> dict:
+        """## Deletes specified files.
+
+        #### Args:
+            ids (str | int | list): The file or files ids
+
+        #### Returns:
+            dict: The success status.
+        """
+        if isinstance(ids, str | int):
+            ids_sent = [ids]
+        else:
+            ids_sent = ids
+
+        response = await self.client._post(
+            "file/delete", data={"file_ids": json.dumps(ids_sent)}
+        )
+        return response
+
+    async def move(self, id: str | int, folder_id: str | int) -> dict:
+        """## Moves a file into a specified folder.
+
+        #### Args:
+            id (str | int): The files id.
+            folder_id (str | int): The folders id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        data = {"file_id": id, "parent_id": folder_id}
+        return await self.client._post("file/move", data=data)
+
+    async def rename(self, id: str | int, name: str) -> dict:
+        """## Renames a file.
+
+        #### Args:
+            id (str | int): The files id.
+            name (str): The files new name.
+
+        #### Returns:
+            dict: The success status
+        """
+        data = {"file_id": id, "name": name}
+        return await self.client._post("file/rename", data=data)
+
+    async def copy(
+        self,
+        id: str | int,
+        folder_id: str | int = 0,
+        type_id: str | int = None,
+        target_type: str = None,
+    ) -> File:
+        """## Copies a file to a folder.
+
+        #### Args:
+            id (str | int): The files id.
+            folder_id (str | int, optional): The new folders id. Defaults to main.
+            type_id (str | int, optional): The destinations type id. Defaults to client.user_id.
+            target_type (str, optional): The destinations type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            File: A file object.
+        """
+        if type_id is None:
+            type_id = self.client.user_id
+
+        target_type = await self.client.tools.get_type(type_id, target_type)
+
+        data = {
+            "file_id": id,
+            "folder_id": folder_id,
+            "type": target_type,
+            "type_id": type_id,
+        }
+        response = await self.client._post("file/copy", data=data)
+        return File(self.client, response["file"])
+
+    async def shares(self, id: str | int) -> dict:
+        """## Get a files shares.
+
+        #### Args:
+            id (str | int): The files id.
+
+        #### Returns:
+            dict: The files shares as a dict.
+        """
+        response = (await self.client._post("file/shares", data={"file_id": id}))[
+            "shares"
+        ]
+
+        for conversation in response["conversations"]:
+            await self.client.get_conversation_key(
+                conversation["id"], "conversation", key=conversation["key"]
+            )
+
+        response["channels"] = [
+            Channel(self.client, channel) for channel in response["channels"]
+        ]
+        response["conversations"] = [
+            Conversation(self.client, conversation)
+            for conversation in response["conversations"]
+        ]
+
+        return response
+
+    async def get(
+        self,
+        folder_id: str | int = 0,
+        type_id: str | int = None,
+        folder_only: str = "no",
+        offset: int | str = 0,
+        limit: int | str = 75,
+        search: str = None,
+        sorting: str = "created_asc",
+        target_type: str = None,
+    ) -> dict:
+        """## Gets the files and folders in a dir.
+
+        #### Args:
+            folder_id (str | int, optional): The folders id. Defaults to 0 (personal).
+            type_id (str | int, optional): The type id. Defaults to None.
+            folder_only (str, optional): Folder only response. Defaults to "no".
+            offset (int | str, optional): The response offset. Defaults to 0.
+            limit (int | str, optional): The response limit. Defaults to 75.
+            search (str, optional): The search prompt. Defaults to None.
+            sorting (str, optional): The sorting setting. Defaults to "created_asc".
+            target_type (str, optional): The type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            dict: A dictonary containing folder and file objects.
+        """
+        if type_id is None:
+            type_id = self.client.user_id
+
+        target_type = await self.client.tools.get_type(type_id, target_type)
+        data = {
+            "folder_id": folder_id,
+            "type": target_type,
+            "type_id": type_id,
+            "folder_only": folder_only,
+            "offset": offset,
+            "limit": limit,
+            "search": search,
+            "sorting": sorting,
+        }
+
+        response = await self.client._post("folder/get", data=data)
+        return response["content"]
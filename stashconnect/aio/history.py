@@ -0,0 +1,81 @@
+import asyncio
+
+# put by a reader task after the last page
+_END = object()
+
+
+class AsyncPageReader:
+    """## Fetches history pages on a background task, a bounded number ahead.
+
+    #### Args:
+        fetch (callable): Awaited with (offset, limit), returns the raw payloads of a page.
+        page_size (int, optional): The messages per page. Defaults to 100.
+        read_ahead (int, optional): Pages fetched ahead, 0 fetches on demand. Defaults to 2.
+        offset (int, optional): The offset of the first page. Defaults to 0.
+
+    #### Info:
+        :The asyncio counterpart of stashconnect.history.PageReader (use: async for).
+    """
+
+    def __init__(
+        self, fetch, page_size: int = 100, read_ahead: int = 2, offset: int = 0
+    ):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.read_ahead = read_ahead
+        self.offset = offset
+
+        self._task = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __aiter__(self):
+        if self.read_ahead <= 0:
+            async for page in self._fetch_pages():
+                yield page
+            return
+
+        pages = asyncio.Queue(maxsize=self.read_ahead)
+        self._task = asyncio.create_task(self._read(pages))
+
+        try:
+            while True:
+                page = await pages.get()
+                if page is _END:
+                    return
+                if isinstance(page, BaseException):
+                    raise page
+                yield page
+        finally:
+            await self.close()
+
+    async def _fetch_pages(self):
+        offset = self.offset
+        while True:
+            page = await self.fetch(offset, self.page_size)
+            if page:
+                yield page
+            if len(page) < self.page_size:
+                return
+            offset += len(page)
+
+    async def _read(self, pages):
+        try:
+            async for page in self._fetch_pages():
+                await pages.put(page)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await pages.put(e)
+        else:
+            await pages.put(_END)
+
+    async def close(self) -> None:
+        """## Stops fetching pages."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,482 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from ..crypto_utils import CryptoUtils
+from ..history import HistoryWindow
+from ..messages import (
+    _chat,
+    _ciphertexts,
+    _decoded,
+    _decoded_messages,
+    _needs_key,
+)
+from ..models import Message
+from .history import AsyncPageReader
+
+
+class AsyncMessageManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def _build(self, messages: list) -> list:
+        # chat keys have to be cached before the models are built
+        chats = {}
+        for message in messages:
+            target_type, target = _chat(message)
+            chats[target] = target_type
+
+        for target, target_type in chats.items():
+            await self.client.get_conversation_key(target, target_type)
+
+        return [Message(self.client, message) for message in messages]
+
+    async def send(
+        self,
+        target: str | int,
+        text: str,
+        *,
+        markdown: bool = True,
+        files: str | int | list = None,
+        urls: str | list = "",
+        location: bool | tuple | list = None,
+        encrypted: bool = True,
+        target_type: str = None,
+        **kwargs,
+    ) -> Message:
+        """## Sends a message.
+
+        #### Args:
+            target (str | int): The messages target location.
+            text (str): The text to send.
+            markdown (bool): Add markdown support. Defaults to True.
+            files (str | int | list, optional): Files to send. Defaults to None.
+            urls (str | list, optional): Url's to append to the message. Defaults to "".
+            location (bool | tuple | list, optional): The location of the message. Defaults to None.
+            encrypted (bool, optional): If the message should be encrypted. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Info:
+            :The location needs to be set to (lat, lng) in a tuple or None.
+
+        #### Returns:
+            Message: A message object.
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+
+        if encrypted:
+            if self.client._private_key is None:
+                print(
+                    "Could not send encrypted message as no encryption password was provided"
+                )
+                return
+
+            iv = CryptoUtils.random_bytes(16)
+            conversation_key = await self.client.get_conversation_key(
+                target, target_type
+            )
+
+            text_bytes = text.encode("utf-8")
+            text = self.client.crypto.encrypt_aes(text_bytes, conversation_key, iv)
+
+        files_sent = []
+
+        if files is not None:
+
+            if isinstance(files, str | int):
+                files = [files]
+
+            for file in files:
+                if isinstance(file, str):
+                    if file.isnumeric():
+                        files_sent.append(int(file))
+                    else:
+                        file = await self.client.files.upload(
+                            target, file, encrypted=encrypted, target_type=target_type
+                        )
+                        files_sent.append(int(file.id))
+
+                elif isinstance(file, int):
+                    files_sent.append(int(file))
+
+                else:
+                    file = await self.client.files.upload(
+                        target, file, encrypted=encrypted, target_type=target_type
+                    )
+                    files_sent.append(int(file.id))
+
+        if isinstance(urls, str):
+            sent_urls = [urls]
+        else:
+            sent_urls = urls
+
+        data = {
+            "target": target_type,
+            f"{target_type}_id": target,
+            "text": text,
+            "files": json.dumps(files_sent),
+            "url": json.dumps(sent_urls),
+            "encrypted": encrypted,
+            "verification": "",
+            "type": "text",
+            "is_forwarded": False,
+        }
+
+        if encrypted:
+            data["iv"] = iv.hex()
+            data["text"] = text.hex()
+
+        if markdown:
+            data["metainfo"] = json.dumps({"v": 1, "style": "md"})
+
+        data.update(kwargs)
+
+        if location is True:
+            location = await self.client.account.location()
+            location = (location["latitude"], location["longitude"])
+
+        if isinstance(location, tuple | list):
+
+            if encrypted:
+                data["latitude"] = self.client.crypto.encrypt_aes(
+                    str(location[0]).encode("utf-8"), conversation_key, iv=iv
+                ).hex()
+
+                data["longitude"] = self.client.crypto.encrypt_aes(
+                    str(location[1]).encode("utf-8"), conversation_key, iv=iv
+                ).hex()
+            else:
+                data["latitude"] = str(location[0])
+                data["longitude"] = str(location[1])
+
+        data = (await self.client._post("message/send", data=data))["message"]
+        return (await self._build([data]))[0]
+
+    async def decode(
+        self,
+        target: str,
+        text: bytes,
+        iv: bytes,
+        key: bytes = None,
+        target_type: str = None,
+    ) -> str:
+        """## Decode a encrypted message.
+
+        #### Args:
+            target (str): The types id.
+            text (bytes): The encrypted text.
+            iv (bytes): The iv of the text.
+            key (bytes, optional): The conversation key. Defaults to None.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            str: The decrypted key.
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+
+        if text == "":
+            return text
+        else:
+            try:
+                if self.client._private_key is None:
+                    return text
+                else:
+                    conversation_key = await self.client.get_conversation_key(
+                        target, target_type, key=key
+                    )
+
+                    text = self.client.crypto.decrypt_aes(
+                        bytes.fromhex(text), conversation_key, bytes.fromhex(iv)
+                    )
+                    return text.decode("utf-8")
+            except Exception:
+                return text
+
+    async def decode_many(self, payloads: list) -> list:
+        """## Decrypts the texts and locations of many raw message payloads.
+
+        #### Args:
+            payloads (list): Message payloads (e.g. from message/content or events).
+
+        #### Returns:
+            list: Copies of the payloads with plain texts / locations, marked as not encrypted.
+            The replaced values are kept under "ciphertext".
+        """
+        keys = {}
+
+        if self.client._private_key is not None:
+            chats = list(
+                {_chat(payload) for payload in payloads if _needs_key(payload)}
+            )
+            results = await asyncio.gather(
+                *(
+                    self.client.get_conversation_key(target, target_type)
+                    for target_type, target in chats
+                ),
+                return_exceptions=True,
+            )
+
+            for chat, key in zip(chats, results):
+                if not isinstance(key, BaseException):
+                    keys[chat] = key
+
+        items, slots = _ciphertexts(payloads, keys)
+        plaintexts = await self.client.run_crypto(
+            self.client.crypto.decrypt_aes_many, items
+        )
+        return _decoded(payloads, slots, plaintexts)
+
+    async def like(self, message_id: str | int) -> dict:
+        """## Likes a message.
+
+        #### Args:
+            message_id (str | int): The messages id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post("message/like", data={"message_id": message_id})
+
+    async def unlike(self, message_id: str | int) -> dict:
+        """## Unlikes a message.
+
+        #### Args:
+            message_id (str | int): The messages id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        return await self.client._post(
+            "message/unlike", data={"message_id": message_id}
+        )
+
+    async def delete(self, message_id: str | int) -> dict:
+        """## Deletes a message.
+
+        #### Args:
+            message_id (str | int): The messages id.
+
+        #### Returns:
+            dict: The succes status.
+        """
+        return await self.client._post(
+            "message/delete", data={"message_id": message_id}
+        )
+
+    async def infos(self, message_ids: str | int | list, *, raw: bool = False) -> list:
+        """## Gets the infos of messages.
+
+        #### Args:
+            message_ids (str | int | list): The message ids.
+            raw (bool, optional): Returns the payloads (dict, still encrypted) without building objects. Defaults to False.
+
+        #### Returns:
+            list: Message objects.
+        """
+        if isinstance(message_ids, str | int):
+            ids = [message_ids]
+        else:
+            ids = message_ids
+        messages = await self.client._post(
+            "message/infos", data={"message_ids": json.dumps(ids)}
+        )
+        if raw:
+            return messages["messages"]
+
+        return await self._build(messages["messages"])
+
+    async def get_messages(
+        self,
+        type_id: str | int,
+        limit: int = 30,
+        offset: int = 0,
+        target_type: str = None,
+        raw: bool = False,
+    ) -> AsyncGenerator[Message, None]:
+        """## Gets the messages of a channel or conversation.
+
+        #### Args:
+            type_id (str | int): The types id
+            limit (int, optional): The responses limit. Defaults to 30.
+            offset (int, optional): The responses offset. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+            raw (bool, optional): Yields the payloads (dict, still encrypted, see decode_many) without building objects. Defaults to False.
+
+        #### Yields:
+            AsyncGenerator[Message, None]: Message objects (use: async for).
+        """
+        target_type = await self.client.tools.get_type(type_id, target_type)
+
+        data = {
+            f"{target_type}_id": type_id,
+            "source": target_type,
+            "limit": limit,
+            "offset": offset,
+        }
+
+        response = await self.client._post("message/content", data=data)
+        response = [
+            message for message in response["messages"] if message["kind"] == "message"
+        ]
+
+        if raw:
+            for message in response:
+                yield message
+            return
+
+        for message in await self._build(response):
+            yield message
+
+    async def history_pages(
+        self,
+        target: str | int,
+        *,
+        page_size: int = 100,
+        read_ahead: int = 2,
+        offset: int = 0,
+        target_type: str = None,
+    ) -> AsyncPageReader:
+        """## Gets the raw message/content pages of a chat, newest page first.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            page_size (int, optional): The messages per request. Defaults to 100.
+            read_ahead (int, optional): Pages fetched in the background ahead of the caller. Defaults to 2.
+            offset (int, optional): The offset of the first page. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            AsyncPageReader: Iterate it for the lists of raw payloads (use: async for).
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+
+        async def fetch(offset, limit):
+            data = {
+                f"{target_type}_id": target,
+                "source": target_type,
+                "limit": limit,
+                "offset": offset,
+            }
+            response = await self.client._post("message/content", data=data)
+            return response["messages"]
+
+        return AsyncPageReader(fetch, page_size, read_ahead, offset)
+
+    async def history(
+        self,
+        target: str | int,
+        *,
+        after=None,
+        before=None,
+        after_id: int = None,
+        before_id: int = None,
+        limit: int = None,
+        page_size: int = 100,
+        read_ahead: int = 2,
+        target_type: str = None,
+    ) -> AsyncGenerator[Message, None]:
+        """## Iterates the history of a chat, newest message first.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            after (int | float | datetime, optional): Stops at messages sent at or before this time.
+            before (int | float | datetime, optional): Skips messages sent at or after this time.
+            after_id (int, optional): Stops at this message id.
+            before_id (int, optional): Skips messages with this or a greater id.
+            limit (int, optional): The maximum number of messages. Defaults to None.
+            page_size (int, optional): The messages per request. Defaults to 100.
+            read_ahead (int, optional): Pages fetched in the background ahead of the caller. Defaults to 2.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Yields:
+            AsyncGenerator[Message, None]: Message objects (use: async for).
+        """
+        window = HistoryWindow(
+            after=after,
+            before=before,
+            after_id=after_id,
+            before_id=before_id,
+            limit=limit,
+        )
+        if window.done:
+            return
+
+        pages = await self.history_pages(
+            target,
+            page_size=page_size,
+            read_ahead=read_ahead,
+            target_type=target_type,
+        )
+        async with pages:
+            async for page in pages:
+                selected = window.select(page)
+
+                decoded = await self.decode_many(selected)
+                for message in _decoded_messages(self.client, selected, decoded):
+                    yield message
+
+                if window.done:
+                    return
+
+    async def get_flagged(
+        self,
+        type_id: str | int,
+        limit: int = 100,
+        offset: int = 0,
+        target_type: str = None,
+    ) -> AsyncGenerator[Message, None]:
+        """## Gets the flagged messages of a channel.
+
+        #### Args:
+            type_id (str | int): The types id.
+            limit (int, optional): The responses limit. Defaults to 100.
+            offset (int, optional): The responses offset. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Yields:
+            AsyncGenerator[Message, None]: Message objects (use: async for).
+        """
+        target_type = await self.client.tools.get_type(type_id, target_type)
+
+        data = {
+            "type": target_type,
+            "type_id": type_id,
+            "offset": offset,
+            "limit": limit,
+        }
+
+        response = await self.client._post("message/list_flagged_messages", data=data)
+        response = [
+            message for message in response["messages"] if message["kind"] == "message"
+        ]
+
+        for message in await self._build(response):
+            yield message
+
+    async def flag(self, message_id: str | int) -> dict:
+        """## Flags a message.
+
+        #### Args:
+            message_id (str | int): The messages id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        response = await self.client._post(
+            "message/flag", data={"message_id": message_id}
+        )
+        return response
+
+    async def unflag(self, message_id: str | int) -> dict:
+        """## Unflags a message.
+
+        #### Args:
+            message_id (str | int): The messages id.
+
+        #### Returns:
+            dict: The success status.
+        """
+        response = await self.client._post(
+            "message/unflag", data={"message_id": message_id}
+        )
+        return response
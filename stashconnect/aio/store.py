@@ -0,0 +1,52 @@
+from ..history import HistoryWindow
+from ..store import MessageStore
+
+
+class AsyncMessageStore(MessageStore):
+    """## Stores decrypted messages in SQLite and searches them locally.
+
+    #### Info:
+        :The asyncio counterpart of stashconnect.store.MessageStore, only fill()
+        is awaited. Reads and writes are local and stay synchronous.
+    """
+
+    async def fill(
+        self,
+        client,
+        target: str | int,
+        *,
+        full: bool = False,
+        page_size: int = 200,
+        read_ahead: int = 2,
+        target_type: str = None,
+    ) -> int:
+        """## Stores the history of a chat.
+
+        #### Args:
+            client (AsyncClient): The client to read the history with.
+            target (str | int): The channel or conversation id.
+            full (bool, optional): Reads the whole history instead of the messages after the newest stored one. Defaults to False.
+            page_size (int, optional): The messages per request. Defaults to 200.
+            read_ahead (int, optional): Pages fetched in the background. Defaults to 2.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            int: The number of stored messages.
+        """
+        target_type = await client.tools.get_type(target, target_type)
+        newest = None if full else self.newest_id(target, target_type)
+        window = HistoryWindow(after_id=newest)
+
+        stored = 0
+        pages = await client.messages.history_pages(
+            target, page_size=page_size, read_ahead=read_ahead, target_type=target_type
+        )
+        async with pages:
+            async for page in pages:
+                selected = window.select(page)
+                stored += self.add_many(await client.messages.decode_many(selected))
+
+                if window.done:
+                    break
+
+        return stored
@@ -0,0 +1,120 @@
+from ..history import HistoryWindow
+from ..messages import _decoded_messages
+from ..sync import SyncManager, _chat_key, _cursor
+
+
+class AsyncSyncManager(SyncManager):
+    """## Fetches only the messages that are newer than the last synced one.
+
+    #### Info:
+        :The asyncio counterpart of stashconnect.sync.SyncManager, commit() and
+        the cursor stores are shared with it.
+    """
+
+    async def cursor(self, target: str | int, target_type: str = None) -> dict | None:
+        """## Returns the cursor of a chat.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            dict | None: {"message_id", "time", "updated_at"} or None if the chat was never synced.
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+        return self.store.get(_chat_key(target_type, target))
+
+    async def reset(self, target: str | int, target_type: str = None) -> None:
+        """## Forgets the cursor of a chat, the next sync starts over.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+        self.store.delete(_chat_key(target_type, target))
+
+    async def fetch(
+        self,
+        target: str | int,
+        *,
+        initial: int = 0,
+        page_size: int = 20,
+        commit: bool = True,
+        target_type: str = None,
+    ) -> list:
+        """## Returns the messages of a chat that are newer than its cursor.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            initial (int, optional): Messages returned by the first sync of a chat. Defaults to 0.
+            page_size (int, optional): The messages per request. Defaults to 20.
+            commit (bool, optional): Moves the cursor to the newest message. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            list: Message objects, oldest first.
+        """
+        target_type = await self.client.tools.get_type(target, target_type)
+        chat = _chat_key(target_type, target)
+        cursor = self.store.get(chat)
+
+        if cursor is None:
+            window = HistoryWindow(limit=max(1, initial))
+            page_size = min(page_size, window.limit)
+        else:
+            window = HistoryWindow(after_id=cursor["message_id"])
+
+        selected = []
+        pages = await self.client.messages.history_pages(
+            target, page_size=page_size, read_ahead=0, target_type=target_type
+        )
+        async with pages:
+            async for page in pages:
+                selected.extend(window.select(page))
+                if window.done:
+                    break
+
+        if not selected:
+            return []
+
+        if commit:
+            self.store.set(chat, _cursor(selected[0]))
+
+        if cursor is None:
+            selected = selected[:initial]
+
+        selected.reverse()
+        decoded = await self.client.messages.decode_many(selected)
+        return _decoded_messages(self.client, selected, decoded)
+
+    async def fetch_all(self, targets: list = None, **kwargs) -> dict:
+        """## Syncs many chats.
+
+        #### Args:
+            targets (list, optional): (target, target_type) tuples or ids. Defaults to all chats with a cursor.
+            **kwargs: Passed to fetch().
+
+        #### Returns:
+            dict: Maps (target_type, target) to the new messages, chats without new messages are left out.
+        """
+        if targets is None:
+            targets = [
+                (int(target), target_type)
+                for target_type, target in (
+                    chat.split(":") for chat, _ in self.store.items()
+                )
+            ]
+
+        changes = {}
+        for target in targets:
+            target, target_type = (
+                target if isinstance(target, tuple) else (target, None)
+            )
+            target_type = await self.client.tools.get_type(target, target_type)
+
+            messages = await self.fetch(target, target_type=target_type, **kwargs)
+            if messages:
+                changes[target_type, int(target)] = messages
+
+        return changes
@@ -0,0 +1,46 @@
+from ..tools import Tools
+
+
+class AsyncTools(Tools):
+    async def get_type(self, type_id, target_type=None):
+        """## Returns a location type.
+
+        #### Args:
+            type_id (int | str): The conversation or channel id
+            target_type (str, optional): A known type, skips the lookup. Defaults to None.
+        """
+        if target_type is not None:
+            if target_type in ("conversation", "channel"):
+                self.types.set(type_id, target_type)
+            return target_type
+
+        if str(type_id) == str(self.client.user_id):
+            return "personal"
+
+        cached = self.types.get(type_id)
+        if cached is not None:
+            return cached
+
+        conversation_data = {
+            "conversation_id": type_id,
+            "source": "conversation",
+            "limit": 0,
+            "offset": 0,
+        }
+        channel_data = {
+            "channel_id": type_id,
+            "source": "channel",
+            "limit": 0,
+            "offset": 0,
+        }
+        try:
+            await self.client._post("message/content", data=conversation_data)
+            self.types.set(type_id, "conversation")
+            return "conversation"
+        except Exception:
+            try:
+                await self.client._post("message/content", data=channel_data)
+                self.types.set(type_id, "channel")
+                return "channel"
+            except Exception:
+                return "404"
@@ -0,0 +1,72 @@
+import asyncio
+
+from ..models import User
+
+
+class AsyncUserManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def _info(self, user_id: str | int, withkey: bool = True) -> dict:
+        """## Gets a users user info as a dict.
+
+        #### Args:
+            user_id (str | int): The users id
+            withkey (bool, optional): Return key. Defaults to True.
+
+        #### Returns:
+            dict: A user as a dict.
+        """
+        response = await self.client._post(
+            "users/info", data={"user_id": user_id, "withkey": withkey}
+        )
+        return response["user"]
+
+    async def public_keys(self, user_ids: list) -> dict:
+        """## Gets the parsed public keys of users, uncached ones are fetched concurrently.
+
+        #### Args:
+            user_ids (list): The users ids.
+
+        #### Returns:
+            dict: Maps the user ids to RSA public key objects.
+        """
+        keys = {}
+        missing = []
+
+        for user_id in dict.fromkeys(user_ids):
+            key = self.client.public_keys.get(user_id)
+            if key is None:
+                missing.append(user_id)
+            else:
+                keys[user_id] = key
+
+        users = await asyncio.gather(*(self._info(user_id) for user_id in missing))
+
+        for user_id, user in zip(missing, users):
+            keys[user_id] = await self.client.run_crypto(
+                self.client.public_keys.put, user["id"], user["public_key"]
+            )
+
+        return keys
+
+    async def info(self, user_id: str | int, withkey: bool = True) -> User:
+        """## Gets a users user info.
+
+        #### Args:
+            user_id (str | int): The users id
+            withkey (bool, optional): Return key. Defaults to True.
+
+        #### Returns:
+            User: A user object.
+        """
+        return User(self.client, await self._info(user_id, withkey))
+
+    async def me(self) -> User:
+        """## Gets the clients user object.
+
+        #### Returns:
+            User: A user object.
+        """
+        response = await self.client._post("users/me", data={})
+        return User(self.client, response["user"])
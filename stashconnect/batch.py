@@ -0,0 +1,147 @@
+import threading
+import types
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+
+class _ManagerProxy:
+    # forwards method calls of a manager to the batch
+    def __init__(self, batch, manager):
+        self._batch = batch
+        self._manager = manager
+
+    def __getattr__(self, name):
+        attribute = getattr(self._manager, name)
+
+        if not callable(attribute):
+            return attribute
+
+        def submit(*args, **kwargs):
+            return self._batch.submit(attribute, *args, **kwargs)
+
+        submit.__name__ = name
+        submit.__doc__ = attribute.__doc__
+        return submit
+
+
+class Batch:
+    """## Runs independent api calls concurrently on a bounded thread pool.
+
+    #### Usage:
+        with client.batch(max_concurrency=16) as batch:
+            for message_id in message_ids:
+                batch.messages.delete(message_id)
+
+        results = batch.results()
+
+    #### Args:
+        client (Client): The client to send the calls with.
+        max_concurrency (int, optional): The number of parallel requests. Defaults to 8.
+
+    #### Info:
+        :Calls through batch.messages, batch.files, ... return futures.
+        :Generators (get_messages, members, ...) are collected into lists.
+    """
+
+    _managers = (
+        "messages",
+        "account",
+        "users",
+        "files",
+        "conversations",
+        "companies",
+        "channels",
+    )
+
+    def __init__(self, client, max_concurrency: int = 8):
+        self.client = client
+        self.max_concurrency = max_concurrency
+
+        self.futures = []
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="stashconnect-batch"
+        )
+
+        for name in self._managers:
+            setattr(self, name, _ManagerProxy(self, getattr(client, name)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _call(func, args, kwargs):
+        result = func(*args, **kwargs)
+
+        # generators would otherwise send their request on the callers thread
+        if isinstance(result, types.GeneratorType):
+            result = list(result)
+
+        return result
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """## Queues a call.
+
+        #### Args:
+            func (callable): The function to call (e.g. client.messages.like).
+            *args, **kwargs: The functions arguments.
+
+        #### Returns:
+            Future: The future of the calls result.
+        """
+        future = self._executor.submit(self._call, func, args, kwargs)
+
+        with self._lock:
+            self.futures.append(future)
+
+        return future
+
+    def map(self, func, *iterables) -> list:
+        """## Queues a call for every item of the iterables.
+
+        #### Args:
+            func (callable): The function to call.
+            *iterables: The positional arguments per call.
+
+        #### Returns:
+            list: The futures in order.
+        """
+        return [self.submit(func, *args) for args in zip(*iterables)]
+
+    def wait(self) -> None:
+        """## Blocks until all queued calls are done."""
+        with self._lock:
+            futures = list(self.futures)
+
+        wait(futures)
+
+    def results(self, return_exceptions: bool = False) -> list:
+        """## Returns the results of all calls in submission order.
+
+        #### Args:
+            return_exceptions (bool, optional): Return errors instead of raising the first one. Defaults to False.
+
+        #### Returns:
+            list: The results.
+        """
+        self.wait()
+
+        results = []
+        for future in self.futures:
+            error = future.exception()
+
+            if error is not None and not return_exceptions:
+                raise error
+
+            results.append(error if error is not None else future.result())
+
+        return results
+
+    def close(self) -> None:
+        """## Waits for all queued calls and stops the worker threads."""
+        self.wait()
+        self._executor.shutdown(wait=True)
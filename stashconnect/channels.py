@@ -1,14 +1,7 @@
-import Crypto.Cipher
-import Crypto.Cipher.AES
-import Crypto.Cipher.PKCS1_OAEP
-import Crypto.PublicKey
-import Crypto.PublicKey.RSA
-import Crypto.Random
-import Crypto
-
-import base64
 import json
 
+from .crypto_utils import CryptoUtils
+from .keycache import wrap_keys
 from .models import User, Channel
 from typing import Generator
 
@@ -48,10 +41,10 @@ class ChannelManager:
         #### Returns:
             Channel: A channel object.
         """
-        conversation_key = Crypto.Random.get_random_bytes(32)
-        encryptor = Crypto.Cipher.PKCS1_OAEP.new(self.client._private_key.publickey())
-
-        encrypted_key = encryptor.encrypt(conversation_key)
+        conversation_key = CryptoUtils.random_bytes(32)
+        encrypted_key = self.client.crypto.encrypt_key(
+            conversation_key, CryptoUtils.public_key(self.client._private_key)
+        )
 
         data = {
             "channel_name": channel_name,
@@ -62,7 +55,7 @@ class ChannelManager:
             "type": channel_type,
             "visible": visible,
             "writable": writable,
-            "encryption_key": base64.b64encode(encrypted_key).decode("utf-8"),
+            "encryption_key": encrypted_key,
             "inviteable": inviteable,
             "show_activities": show_activities,
             "show_membership_activities": show_membership_activities,
@@ -314,17 +307,16 @@ class ChannelManager:
         if isinstance(members, str | int):
             members = [members]
 
-        for member in members:
-            user = self.client.users._info(member)
-
-            publickey = Crypto.PublicKey.RSA.import_key(user["public_key"])
-            encryptor = Crypto.Cipher.PKCS1_OAEP.new(publickey)
-            encrypted_key = encryptor.encrypt(conversation_key)
+        public_keys = self.client.users.public_keys(members)
+        encrypted_keys = wrap_keys(
+            conversation_key, public_keys, crypto=self.client.crypto
+        )
 
+        for member in public_keys:
             users.append(
                 {
-                    "id": int(user["id"]),
-                    "key": base64.b64encode(encrypted_key).decode("utf-8"),
+                    "id": int(member),
+                    "key": encrypted_keys[member],
                     "expiry": expiry,
                     "userVerified": True,
                 }
@@ -347,7 +339,8 @@ class ChannelManager:
         *,
         search: str | int = None,
         limit: int | str = 40,
-        offset: int | str = 0
+        offset: int | str = 0,
+        raw: bool = False
     ) -> Generator[User, None, None]:
         """## Lists the members if a channel as a generator.
 
@@ -356,6 +349,7 @@ class ChannelManager:
             search (str | int, optional): The search keyword that is used. Defaults to None.
             limit (int | str, optional): Limit of answer. Defaults to 40.
             offset (int | str, optional): Offset of answer. Defaults to 0.
+            raw (bool, optional): Yields the payloads (dict) without building objects. Defaults to False.
 
         #### Yields:
             Generator[User, None, None]: A generator object with a User object
@@ -372,8 +366,14 @@ class ChannelManager:
 
         response = self.client._post("channels/members", data=data)
 
-        for member in response["members"]:
-            yield User(self.client, member)
+        if raw:
+            yield from response["members"]
+            return
+
+        with self.client.resolver.collect():
+            members = [User(self.client, member) for member in response["members"]]
+
+        yield from members
 
     def join(self, channel_id: int | str, *, password: str | int = "") -> Channel:
         """## Joins a channel.
@@ -390,19 +390,20 @@ class ChannelManager:
         )
         return Channel(self.client, response["channel"])
 
-    def recommendations(self, company_id: int | str) -> Channel:
+    def recommendations(self, company_id: int | str, *, raw: bool = False) -> list:
         """## Gets custom channel recommendations.
 
         #### Args:
             company_id (int | str): The companies id.
+            raw (bool, optional): Returns the payloads (dict) without building objects. Defaults to False.
 
         #### Returns:
-            Channel: A channel object.
+            list: Channel objects.
         """
         response = self.client._post(
             "channels/recommendations", data={"company": company_id}
         )
-        return Channel(self.client, response["channels"])
+        return self._channels(response["channels"], raw)
 
     def visible(
         self,
@@ -410,8 +411,9 @@ class ChannelManager:
         *,
         limit: int | str = 30,
         offset: int | str = 0,
-        search: str | int = ""
-    ) -> Channel:
+        search: str | int = "",
+        raw: bool = False
+    ) -> list:
         """## Gets all visible channels.
 
         #### Args:
@@ -419,9 +421,10 @@ class ChannelManager:
             limit (int | str, optional): The returned limit. Defaults to 30.
             offset (int | str, optional): The returned offset. Defaults to 0.
             search (str | int, optional): The search keyword. Defaults to "".
+            raw (bool, optional): Returns the payloads (dict) without building objects. Defaults to False.
 
         #### Returns:
-            Channel: A channel object.
+            list: Channel objects.
         """
         response = self.client._post(
             "channels/visible",
@@ -432,21 +435,29 @@ class ChannelManager:
                 "search": search,
             },
         )
-        return Channel(self.client, response["channels"])
+        return self._channels(response["channels"], raw)
 
-    def joined(self, company_id: int | str) -> Channel:
+    def joined(self, company_id: int | str, *, raw: bool = False) -> list:
         """## Gets all joined channels.
 
         #### Args:
             company_id (int | str): The companies id.
+            raw (bool, optional): Returns the payloads (dict) without building objects. Defaults to False.
 
         #### Returns:
-            Channel: A channel object.
+            list: Channel objects.
         """
         response = self.client._post(
             "channels/subscripted", data={"company": company_id}
         )
-        return Channel(self.client, response["channels"])
+        return self._channels(response["channels"], raw)
+
+    def _channels(self, channels: list, raw: bool) -> list:
+        if raw:
+            return channels
+
+        with self.client.resolver.collect():
+            return [Channel(self.client, channel) for channel in channels]
 
     def accept_invite(self, invite_id: int | str) -> dict:
         """## Accepts an invite.
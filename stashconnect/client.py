@@ -1,21 +1,42 @@
 import requests
+import urllib3
+import base64
 import json
+import os
 import time
 import threading
-import socketio
 
 from .messages import MessageManager
 from .account import AccountManager
 from .users import UserManager
-from .crypto_utils import CryptoUtils
+from .crypto_utils import TimedCrypto
 from .conversations import ConversationManager
 from .companies import CompanyManager
 from .channels import ChannelManager
 from .files import FileManager
 from .authentication import AuthManager
+from .sync import SyncManager
 
 from .tools import Tools
-from .models import Message
+from .models import Message, _register_client
+from .scheduler import RequestScheduler
+from .batch import Batch
+from .agent import AgentKey
+from .metrics import MetricsRegistry
+from .session import SessionStore
+from .identity import IdentityMap
+from .resolver import Resolver
+from .keycache import ConversationKeyCache, PublicKeyCache, decrypt_keys
+from .exceptions import (
+    APIError,
+    ConnectError,
+    FatalError,
+    NetworkError,
+    NetworkTimeout,
+    raise_for_status,
+)
+
+from concurrent.futures import Future
 
 from . import __version__
 
@@ -30,6 +51,40 @@ headers = {
 }
 
 
+def _network_error(error, url) -> NetworkError:
+    # a connection that could not be opened never sent the request, so it is always safe to retry
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+
+    if isinstance(error, requests.ConnectTimeout) or isinstance(
+        reason, urllib3.exceptions.NewConnectionError
+    ):
+        return ConnectError(str(error), url=url)
+
+    if isinstance(error, requests.Timeout):
+        return NetworkTimeout(str(error), url=url)
+
+    return NetworkError(str(error), url=url)
+
+
+def _transfer_sizes(response, streamed):
+    # (request body bytes, response body bytes) of a requests response
+    if response is None:
+        return 0, 0
+
+    body = response.request.body
+    bytes_out = len(body) if body else 0
+
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        bytes_in = int(length)
+    elif not streamed:
+        bytes_in = len(response.content)
+    else:
+        bytes_in = 0
+
+    return bytes_out, bytes_in
+
+
 class Client:
     """## Represents a client connection to Stashcat API.
 
@@ -43,23 +98,50 @@ class Client:
         .image_url (str): URL to the user's profile image.
         .first_name (str): User's first name.
         .last_name (str): User's last name.
+
+    #### Info:
+        :With lazy=True the constructor returns without any request. The login
+        happens on the first request or when one of the account attributes above
+        is read, the private key is imported on a background thread and only
+        code that needs it (encrypted messages, files and chat keys) waits for it.
     """
 
+    is_async = False
+
+    # attributes set by the login, reading them logs a lazy client in
+    _login_attributes = frozenset(
+        ("client_key", "socket_id", "user_id", "image_url", "first_name", "last_name")
+    )
+
     def __init__(
         self,
         *,
         email,
         password,
         base_url="stashcat.com",
+        api_url=None,
+        push_url=None,
         proxy=None,
         cert_path=None,
         encryption_password=None,
         device_id=None,
         app_name=None,
+        type_cache_size=4096,
+        type_cache_ttl=3600,
+        scheduler=None,
+        metrics=None,
+        session_store=None,
+        key_cache_size=4096,
+        key_cache=None,
+        public_key_ttl=3600,
+        identity_ttl=300,
+        key_agent=None,
+        sync_store=None,
+        lazy=False,
     ):
 
         self.messages = MessageManager(self)
-        self.tools = Tools(self)
+        self.tools = Tools(self, type_cache_size, type_cache_ttl)
         self.account = AccountManager(self)
         self.users = UserManager(self)
         self.files = FileManager(self)
@@ -67,6 +149,7 @@ class Client:
         self.companies = CompanyManager(self)
         self.channels = ChannelManager(self)
         self.auth = AuthManager(self)
+        self.sync = SyncManager(self, sync_store)
 
         self.email = email
         self.password = password
@@ -78,8 +161,23 @@ class Client:
             f"stashconnect v.{__version__}" if app_name is None else app_name
         )
 
+        # api_url / push_url replace the urls derived from base_url (e.g. a local server)
         self._main_url = f"https://api.{base_url}/"
         self._push_url = f"https://push.{base_url}/"
+        if api_url is not None:
+            self._main_url = api_url.rstrip("/") + "/"
+        if push_url is not None:
+            self._push_url = push_url.rstrip("/") + "/"
+
+        self.scheduler = RequestScheduler() if scheduler is None else scheduler
+
+        # metrics are opt-in: True creates a registry, a registry can be shared
+        if metrics is True:
+            metrics = MetricsRegistry()
+        self.metrics = metrics or None
+
+        # crypto timings go to this clients registry only
+        self.crypto = TimedCrypto(self.metrics)
 
         self._headers = headers
         self._session = requests.Session()
@@ -88,33 +186,132 @@ class Client:
             self._session.proxies.update(proxy)
         if cert_path is not None:
             self._session.verify = cert_path
-
-        self._login()
-
-        self.conversation_keys = {}
+        self._pool_size = requests.adapters.DEFAULT_POOLSIZE
+
+        # a path or a SessionStore, skips auth/login while the stored session is valid
+        if isinstance(session_store, str | os.PathLike):
+            session_store = SessionStore(session_store)
+        self.session_store = session_store
+        self._stored_session = {}
+
+        self._logged_in = False
+        self._login_lock = threading.Lock()
+        self._unlocked_key = None
+        self._private_key_future = None
+
+        # a key agent holds the unlocked private key, no encryption password is needed
+        self.key_agent = None if key_agent is None else AgentKey(key_agent)
+        if self.key_agent is not None:
+            self._unlocked_key = self.key_agent
+
+        # a path or a ConversationKeyCache, a path is encrypted with the encryption password
+        if isinstance(key_cache, str | os.PathLike):
+            key_cache = ConversationKeyCache(
+                key_cache_size, path=key_cache, password=encryption_password
+            )
+        elif key_cache is None:
+            key_cache = ConversationKeyCache(key_cache_size)
+        self.conversation_keys = key_cache
+        self.public_keys = PublicKeyCache(ttl=public_key_ttl, crypto=self.crypto)
+        # one shared User / Channel / Company / File object per id
+        self.identities = IdentityMap(ttl=identity_ttl)
+        self.resolver = Resolver(self)
+
+        # unpickled models attach to the client of their account
+        _register_client(self)
         self.events = {}
+        self.listeners = {}
         self.loops = []
 
-        self._private_key = None
         self._ping_target = None
         self._end_time = None
         self._latency_ws = None
 
-        if encryption_password is not None:
-            self.get_private_key(encryption_password=self.encryption_password)
+        if lazy:
+            if encryption_password is not None and self.key_agent is None:
+                self._private_key_future = self._import_private_key_in_background()
+        else:
+            self._ensure_login()
+
+            if encryption_password is not None and self.key_agent is None:
+                self.get_private_key(encryption_password=self.encryption_password)
+
+    def __getattr__(self, name):
+        # only called for missing attributes, i.e. before a lazy client logged in
+        if name in type(self)._login_attributes and not self.__dict__.get(
+            "_logged_in", True
+        ):
+            self._ensure_login()
+            return self.__dict__[name]
+
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    @property
+    def _private_key(self):
+        # waits for a private key import running in the background
+        if self._private_key_future is not None:
+            self._private_key_future.result()
+
+        return self._unlocked_key
+
+    @_private_key.setter
+    def _private_key(self, private_key):
+        self._unlocked_key = private_key
+
+    def _ensure_login(self):
+        if self._logged_in:
+            return
+
+        with self._login_lock:
+            if not self._logged_in:
+                if not self._resume_session():
+                    self._login()
+
+                self._logged_in = True
+
+    def _import_private_key_in_background(self):
+        future = Future()
+
+        def run():
+            try:
+                # a resumed session may hold the key, load it before reading it
+                self._ensure_login()
+                self.get_private_key(encryption_password=self.encryption_password)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+        thread = threading.Thread(
+            target=run, name="stashconnect-private-key", daemon=True
+        )
+        thread.start()
+
+        return future
+
+    def wait_for_private_key(self, timeout: float = None) -> bool:
+        """## Waits until the private key is imported.
+
+        #### Args:
+            timeout (float, optional): The maximum wait in seconds. Defaults to None.
+
+        #### Returns:
+            bool: Whether a private key is available.
+        """
+        if self._private_key_future is not None:
+            self._private_key_future.result(timeout)
+
+        return self._unlocked_key is not None
 
     def _login(self):
         response = self.auth._login(self.email, self.password, self.app_name)
 
         self.client_key = response["client_key"]
-        self.socket_id = response["userinfo"]["socket_id"]
-        self.user_id = response["userinfo"]["id"]
-        self.image_url = response["userinfo"]["image"]
+        self._set_userinfo(response["userinfo"])
 
-        self.first_name = response["userinfo"]["first_name"]
-        self.last_name = response["userinfo"]["last_name"]
-
-        if self.encryption_password is None:
+        if self.encryption_password is None and self.key_agent is None:
             print(
                 f"Logged in as {self.first_name} {self.last_name}! "
                 "No encryption password was provided so some features won't work"
@@ -122,51 +319,214 @@ class Client:
         else:
             print(f"Logged in as {self.first_name} {self.last_name}!")
 
+        self._save_session()
         return response
 
-    def _post(self, url, *, data, auth=True, return_all=False, **kwargs):
+    def _set_userinfo(self, userinfo):
+        self.socket_id = userinfo["socket_id"]
+        self.user_id = userinfo["id"]
+        self.image_url = userinfo["image"]
+
+        self.first_name = userinfo["first_name"]
+        self.last_name = userinfo["last_name"]
+
+    def _session_account(self):
+        # a stored session is only used by a client logging into the same account
+        return {
+            "email": self.email,
+            "url": self._main_url,
+            "device_id": self.device_id,
+        }
+
+    def _resume_session(self):
+        if self.session_store is None:
+            return False
+
+        session = self.session_store.load()
+        if session is None or session.get("account") != self._session_account():
+            return False
+
+        self.client_key = session["client_key"]
+
+        try:
+            # the cheapest authenticated request, fails if the session was revoked
+            # (auth=False as the login is still in progress)
+            user = self._post(
+                "users/me", data={"client_key": self.client_key}, auth=False
+            )["user"]
+        except FatalError:
+            self.session_store.clear()
+            return False
+
+        # users/me does not contain the socket_id
+        self._set_userinfo({**session["userinfo"], **user})
+        self._stored_session = session
+
+        print(f"Resumed session as {self.first_name} {self.last_name}!")
+        return True
+
+    def _save_session(self, **values):
+        if self.session_store is None:
+            return
+
+        if not values:
+            self._stored_session = {
+                "account": self._session_account(),
+                "client_key": self.client_key,
+                "userinfo": {
+                    "id": self.user_id,
+                    "socket_id": self.socket_id,
+                    "image": self.image_url,
+                    "first_name": self.first_name,
+                    "last_name": self.last_name,
+                },
+            }
+
+        self._stored_session.update(values)
+        self.session_store.save(self._stored_session)
+
+    def _post(
+        self, url, *, data, auth=True, return_all=False, idempotent=None, **kwargs
+    ):
+        # idempotent=True lets the scheduler resend a write after a 5xx or timeout
 
         data["device_id"] = self.device_id
 
         if auth is True:
+            self._ensure_login()
             data["client_key"] = self.client_key
 
-        response = self._session.post(f"{self._main_url}{url}", data=data, **kwargs)
+        return self.scheduler.call(
+            url, lambda: self._send(url, data, return_all, **kwargs), idempotent
+        )
+
+    def _send(self, url, data, return_all, **kwargs):
+        start = time.perf_counter()
+        response = error = None
+
+        try:
+            response = self._session.post(f"{self._main_url}{url}", data=data, **kwargs)
+
+            raise_for_status(
+                response.status_code,
+                response.headers,
+                url,
+                response.reason,
+                response=response,
+            )
 
-        response.raise_for_status()
+            if return_all:
+                return response
 
-        if not return_all:
-            response = response.json()
-            status = response["status"]
-            payload = response["payload"]
+            response_data = response.json()
+            status = response_data["status"]
+            payload = response_data["payload"]
 
             if status["value"] != "OK":
-                # create custom exceptions
-                raise Exception(status["message"])
+                raise APIError(status["message"], url=url, status=status)
 
             return payload
 
-        else:
-            return response
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = _network_error(e, url)
+            raise error from e
+
+        except Exception as e:
+            error = e
+            raise
+
+        finally:
+            if self.metrics is not None:
+                bytes_out, bytes_in = _transfer_sizes(
+                    response, kwargs.get("stream", False)
+                )
+                self.metrics.observe_request(
+                    url,
+                    time.perf_counter() - start,
+                    bytes_out=bytes_out,
+                    bytes_in=bytes_in,
+                    error=error,
+                )
+
+    def _resize_pool(self, size: int) -> None:
+        # every concurrent request needs its own kept-alive connection
+        if size <= self._pool_size:
+            return
+
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._pool_size = size
+
+    def batch(self, max_concurrency: int = 8) -> Batch:
+        """## Creates a batch that runs manager calls concurrently.
+
+        #### Args:
+            max_concurrency (int, optional): The number of parallel requests. Defaults to 8.
+
+        #### Usage:
+            with client.batch(max_concurrency=16) as batch:
+                futures = [batch.messages.delete(id) for id in message_ids]
+
+            results = batch.results()
+
+        #### Returns:
+            Batch: The batch, calls through batch.messages etc. return futures.
+        """
+        self._resize_pool(max_concurrency)
+        return Batch(self, max_concurrency)
 
     def get_private_key(self, *, encryption_password: str) -> None:
 
+        stored_key = self._stored_session.get("private_key")
+        if stored_key is not None:
+            self._private_key = self.crypto.load_private_key(
+                base64.b64decode(stored_key), None
+            )
+            return
+
         print("Importing private key. Please wait...")
-        response = self._post("security/get_private_key", data={})
-        encrypted_key = json.loads(response["keys"]["private_key"])
+        private_key = self._stored_session.get("encrypted_private_key")
+
+        if private_key is not None:
+            try:
+                unlocked_key = self.crypto.load_private_key(
+                    json.loads(private_key)["private"], encryption_password
+                )
+            except (ValueError, KeyError, TypeError):
+                # the stored key is outdated, fetch the current one
+                private_key = None
+
+        if private_key is None:
+            response = self._post("security/get_private_key", data={})
+            private_key = response["keys"]["private_key"]
+
+            unlocked_key = self.crypto.load_private_key(
+                json.loads(private_key)["private"], encryption_password
+            )
 
-        self._private_key = CryptoUtils.load_private_key(
-            encrypted_key["private"], encryption_password
-        )
+        # not the _private_key property, a background import would wait for itself
+        self._private_key = unlocked_key
+
+        if self.session_store is None:
+            return
+
+        if self.session_store.store_private_key:
+            self._save_session(
+                encrypted_private_key=private_key,
+                private_key=base64.b64encode(
+                    self.crypto.export_private_key(unlocked_key)
+                ).decode("utf-8"),
+            )
+        else:
+            self._save_session(encrypted_private_key=private_key)
 
     def get_conversation_key(self, target, target_type, key=None):
 
         if self._private_key is None:
             return None
 
-        try:
-            return self.conversation_keys[target]
-        except KeyError:
+        def fetch():
             encrypted_key = key
 
             if encrypted_key is None:
@@ -182,10 +542,68 @@ class Client:
                     )
                     encrypted_key = response["channels"]["key"]
 
-            decrypted_key = CryptoUtils.decrypt_key(encrypted_key, self._private_key)
+            return self.crypto.decrypt_key(encrypted_key, self._private_key)
+
+        # concurrent misses for the same chat share one request and decryption
+        return self.conversation_keys.get_or_fetch(target, fetch)
+
+    def prefetch_keys(self, targets: list = None, workers: int = None) -> int:
+        """## Fetches and decrypts the keys of the users conversations and channels.
+
+        #### Args:
+            targets (list, optional): Only warms these chat ids. Defaults to all chats.
+            workers (int, optional): The number of decryption threads. Defaults to the cpu count.
+
+        #### Returns:
+            int: The number of keys added to the cache.
+
+        #### Info:
+            :The keys come from the conversation list and the subscribed channels
+            of each company (a few requests instead of one per chat). Chats not
+            found there are still fetched on first use.
+        """
+        if self._private_key is None:
+            return 0
+
+        wanted = None if targets is None else {str(target) for target in targets}
+        encrypted_keys = {}
+
+        def collect(target_id, target_type, key):
+            self.tools.types.set(target_id, target_type)
 
-            self.conversation_keys[target] = decrypted_key
-            return self.conversation_keys[target]
+            if not key or str(target_id) in self.conversation_keys:
+                return
+            if wanted is None or str(target_id) in wanted:
+                encrypted_keys[str(target_id)] = key
+
+        offset = 0
+        while True:
+            conversations = self._post(
+                "message/conversations",
+                data={"limit": 100, "offset": offset, "archive": 0},
+            )["conversations"]
+
+            for conversation in conversations:
+                collect(conversation["id"], "conversation", conversation.get("key"))
+
+            offset += len(conversations)
+            if len(conversations) < 100:
+                break
+
+        companies = self._post("company/member", data={"no_cache": True})
+        for company in companies["companies"]:
+            channels = self._post(
+                "channels/subscripted", data={"company": company["id"]}
+            )["channels"]
+
+            for channel in channels:
+                collect(channel["id"], "channel", channel.get("key"))
+
+        decrypted = decrypt_keys(
+            encrypted_keys, self._private_key, workers, crypto=self.crypto
+        )
+        self.conversation_keys.update(decrypted)
+        return len(decrypted)
 
     def event(self, name):
 
@@ -206,6 +624,45 @@ class Client:
 
         return decorator
 
+    def add_listener(self, name: str, callback) -> None:
+        """## Calls a function with the raw arguments of a socket event.
+
+        #### Args:
+            name (str): The socket events name (e.g. "message_sync").
+            callback (callable): Called before the events handler, with the same arguments.
+
+        #### Info:
+            :Listeners let extensions (e.g. a MessageStore) follow events next to
+            the handler registered with @client.event. Add them before run().
+        """
+        self.listeners.setdefault(name, []).append(callback)
+
+    def remove_listener(self, name: str, callback) -> None:
+        """## Removes a function added with add_listener().
+
+        #### Args:
+            name (str): The socket events name.
+            callback (callable): The function.
+        """
+        callbacks = self.listeners.get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _dispatcher(self, name):
+        handler = self.events.get(name)
+
+        def dispatch(*args):
+            for listener in list(self.listeners.get(name, ())):
+                try:
+                    listener(*args)
+                except Exception as e:
+                    print(f"A listener of {name} failed: {e!r}")
+
+            if handler is not None:
+                handler(*args)
+
+        return dispatch
+
     def loop(self, seconds):
         def decorator(func):
             def wrapped_func():
@@ -235,8 +692,17 @@ class Client:
 
         return decorator
 
+    def _timed_event(self, name, handler):
+        def wrapper(*args):
+            with self.metrics.time_event(name):
+                handler(*args)
+
+        return wrapper
+
     def _run(self, debug=False):
 
+        import socketio
+
         self.sio = socketio.Client(logger=debug, engineio_logger=debug)
 
         @self.sio.event
@@ -257,19 +723,27 @@ class Client:
             print("Disconnected from the server")
             self.sio.disconnect()
 
-        for event_name, event_handler in self.events.items():
+        for event_name in {**self.events, **self.listeners}:
+            event_handler = self._dispatcher(event_name)
+
             if event_name == "user-started-typing":
-                event_modifier = self.event_modifier()(event_handler)
-                self.sio.on(event_name)(event_modifier)
-            else:
-                self.sio.on(event_name)(event_handler)
+                event_handler = self.event_modifier()(event_handler)
+
+            if self.metrics is not None:
+                event_handler = self._timed_event(event_name, event_handler)
+
+            self.sio.on(event_name)(event_handler)
 
         self.sio.connect(self._push_url)
         self.sio.wait()
 
-    def run(self, debug=False):
+    def run(self, debug=False, prefetch_keys=True):
+        # decrypt all chat keys before the first event (skipped without a private key)
+        if prefetch_keys:
+            self.prefetch_keys()
+
         self._run_loops()
-        if len(self.events) != 0:
+        if self.events or self.listeners:
             self._run(debug=debug)
 
     def _run_loops(self):
@@ -277,17 +751,18 @@ class Client:
             thread = threading.Thread(target=loop)
             thread.start()
 
-    def ws_latency(self, target):
+    def ws_latency(self, target, target_type=None):
         """Gets the websockets latency (currently broken).
 
         Args:
             target (int|str): A conversation to use. (Use the messages destination chat)
+            target_type (str, optional): The targets type, skips the type lookup.
 
         Returns:
             int: The websockets latency.
             str: Error.
         """
-        target_type = self.tools.get_type(target)
+        target_type = self.tools.get_type(target, target_type)
 
         start_time = time.perf_counter()
         self._end_time = None
@@ -24,7 +24,8 @@ class CompanyManager:
             list: The company objects in a list.
         """
         response = self.client._post("company/member", data={"no_cache": True})
-        return [Company(self.client, data) for data in response["companies"]]
+        with self.client.resolver.collect():
+            return [Company(self.client, data) for data in response["companies"]]
 
     def get_settings(self, company_id: str | int) -> dict:
         """## Gets the settings of a company.
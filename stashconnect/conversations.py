@@ -1,19 +1,7 @@
-import Crypto
-import Crypto.Cipher
-import Crypto.Cipher.PKCS1_OAEP
-import Crypto.Hash
-import Crypto.Hash.SHA256
-import Crypto.PublicKey
-import Crypto.PublicKey.RSA
-import Crypto.Random
-import Crypto.SelfTest
-import Crypto.Signature
-import Crypto.Signature.pkcs1_15
-import Crypto.Util
-
-import base64
 import json
 
+from .crypto_utils import CryptoUtils
+from .keycache import wrap_keys
 from .models import Conversation
 
 
@@ -109,12 +97,13 @@ class ConversationManager:
         #### Returns:
             Conversation: A conversation object.
         """
-        conversation_key = Crypto.Random.get_random_bytes(32)
+        conversation_key = CryptoUtils.random_bytes(32)
         users = []
 
         # encrypt conversation key using private key
-        encryptor = Crypto.Cipher.PKCS1_OAEP.new(self.client._private_key.publickey())
-        encrypted_key = encryptor.encrypt(conversation_key)
+        encrypted_key = self.client.crypto.encrypt_key(
+            conversation_key, CryptoUtils.public_key(self.client._private_key)
+        )
 
         # i dont know where the private signing key is located
         # if you know where it is please tell me :)
@@ -126,7 +115,7 @@ class ConversationManager:
         users.append(
             {
                 "id": int(self.client.user_id),
-                "key": base64.b64encode(encrypted_key).decode("utf-8"),
+                "key": encrypted_key,
                 # "signature": encoded_signature,
                 # "userVerified": True,
             }
@@ -136,34 +125,22 @@ class ConversationManager:
             members = [members]
 
         # encrypt conversation key using public key for all members
-        for member in members:
-            user = self.client.users._info(member)
-
-            publickey = Crypto.PublicKey.RSA.import_key(user["public_key"])
-
-            encryptor = Crypto.Cipher.PKCS1_OAEP.new(publickey)
-            encrypted_key = encryptor.encrypt(conversation_key)
-
-            # hash = Crypto.Hash.SHA256.new(encrypted_key)
-            # signature = Crypto.Signature.pkcs1_15.new(self.client._private_key).sign(hash)
-            # encoded_signature = base64.b64encode(signature).decode("utf-8")
+        public_keys = self.client.users.public_keys(members)
+        encrypted_keys = wrap_keys(
+            conversation_key, public_keys, crypto=self.client.crypto
+        )
 
-            users.append(
-                {
-                    "id": int(user["id"]),
-                    "key": base64.b64encode(encrypted_key).decode("utf-8"),
-                    # "signature": encoded_signature,
-                    # "expiry": int(round(time.time())),
-                    # "userVerified": True,
-                }
-            )
+        for member in public_keys:
+            users.append({"id": int(member), "key": encrypted_keys[member]})
 
         response = self.client._post(
             "message/createEncryptedConversation",
             data={"members": json.dumps(users), "unique_identifier": conversation_key},
         )
 
-        return Conversation(self.client, response["conversation"])
+        # the members are filled together
+        with self.client.resolver.collect():
+            return Conversation(self.client, response["conversation"])
 
     def info(self, conversation_id: str | int) -> Conversation:
         """## Fetches the info of a conversation.
@@ -177,4 +154,6 @@ class ConversationManager:
         response = self.client._post(
             "message/conversation", data={"conversation_id": conversation_id}
         )
-        return Conversation(self.client, response["conversation"])
+        # the members are filled together
+        with self.client.resolver.collect():
+            return Conversation(self.client, response["conversation"])
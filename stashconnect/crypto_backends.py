@@ -0,0 +1,374 @@
+"""Implementations of the primitives CryptoUtils is built on.
+
+Every backend provides unpadded AES-CBC (one-shot and streaming), RSA-OAEP
+with SHA-1 (the scheme stashcat uses for chat keys), RSA key handling and
+random bytes. The padding and everything above it lives in CryptoUtils, so
+the backends are interchangeable:
+
+    CryptoUtils.set_backend("cryptography")
+
+or STASHCONNECT_CRYPTO_BACKEND=cryptography in the environment. The backend
+libraries are imported when a backend is first used. Operations on a key
+object go to the backend that created it (see backend_for), so keys loaded
+before a switch keep working.
+"""
+
+import os
+import threading
+
+# the backend CryptoUtils uses, created on first use (see get_backend)
+_backend = None
+_backend_lock = threading.RLock()
+# every backend created so far by name, key objects are looked up in them
+_backends = {}
+
+DEFAULT_BACKEND = "pycryptodome"
+
+
+class CryptoBackend:
+    """## The interface of a crypto backend.
+
+    #### Info:
+        :Key objects are backend specific, keys move between backends (and
+        processes) through export_private_key() / load_private_key().
+    """
+
+    name = None
+
+    def owns_key(self, key) -> bool:
+        """## Checks if a key object was created by this backend."""
+        raise NotImplementedError
+
+    def aes_cbc_encrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        """## Encrypts whole blocks with AES-CBC (no padding)."""
+        raise NotImplementedError
+
+    def aes_cbc_decrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        """## Decrypts whole blocks with AES-CBC (no padding)."""
+        raise NotImplementedError
+
+    def aes_cbc_encryptor(self, key: bytes, iv: bytes):
+        """## Returns an object whose encrypt(data) continues one AES-CBC stream."""
+        raise NotImplementedError
+
+    def aes_cbc_decryptor(self, key: bytes, iv: bytes):
+        """## Returns an object whose decrypt(data) continues one AES-CBC stream."""
+        raise NotImplementedError
+
+    def rsa_encrypt(self, public_key, data: bytes) -> bytes:
+        """## Encrypts with RSA-OAEP (SHA-1)."""
+        raise NotImplementedError
+
+    def rsa_decrypt(self, private_key, data: bytes) -> bytes:
+        """## Decrypts with RSA-OAEP (SHA-1), raises ValueError if that fails."""
+        raise NotImplementedError
+
+    def load_private_key(self, data: bytes | str, passphrase: str = None):
+        """## Imports a PEM (optionally encrypted) or DER private key."""
+        raise NotImplementedError
+
+    def export_private_key(self, private_key, passphrase: str = None) -> bytes:
+        """## Exports DER without a passphrase, encrypted PKCS#8 PEM with one."""
+        raise NotImplementedError
+
+    def load_public_key(self, data: bytes | str):
+        """## Imports a PEM public key."""
+        raise NotImplementedError
+
+    def export_public_key(self, public_key) -> str:
+        """## Exports a public key as PEM."""
+        raise NotImplementedError
+
+    def public_key(self, private_key):
+        """## Returns the public key of a private key."""
+        raise NotImplementedError
+
+    def generate_private_key(self, bits: int = 2048):
+        """## Generates an RSA private key."""
+        raise NotImplementedError
+
+    def random_bytes(self, length: int) -> bytes:
+        """## Returns cryptographically secure random bytes."""
+        raise NotImplementedError
+
+
+class PycryptodomeBackend(CryptoBackend):
+    """## The pycryptodome backend (the default)."""
+
+    name = "pycryptodome"
+
+    def __init__(self):
+        from Crypto.Cipher import AES, PKCS1_OAEP
+        from Crypto.PublicKey import RSA
+        from Crypto.Random import get_random_bytes
+
+        self._aes = AES
+        self._oaep = PKCS1_OAEP
+        self._rsa = RSA
+        self._random = get_random_bytes
+
+    def owns_key(self, key):
+        return isinstance(key, self._rsa.RsaKey)
+
+    def aes_cbc_encrypt(self, key, iv, data):
+        return self._aes.new(key, self._aes.MODE_CBC, iv=iv).encrypt(data)
+
+    def aes_cbc_decrypt(self, key, iv, data):
+        return self._aes.new(key, self._aes.MODE_CBC, iv=iv).decrypt(data)
+
+    def aes_cbc_encryptor(self, key, iv):
+        return self._aes.new(key, self._aes.MODE_CBC, iv=iv)
+
+    def aes_cbc_decryptor(self, key, iv):
+        return self._aes.new(key, self._aes.MODE_CBC, iv=iv)
+
+    def rsa_encrypt(self, public_key, data):
+        return self._oaep.new(public_key).encrypt(data)
+
+    def rsa_decrypt(self, private_key, data):
+        return self._oaep.new(private_key).decrypt(data)
+
+    def load_private_key(self, data, passphrase=None):
+        return self._rsa.import_key(data, passphrase=passphrase)
+
+    def export_private_key(self, private_key, passphrase=None):
+        if passphrase is None:
+            return private_key.export_key(format="DER")
+
+        return private_key.export_key(
+            passphrase=passphrase,
+            pkcs=8,
+            protection="PBKDF2WithHMAC-SHA1AndAES256-CBC",
+        )
+
+    def load_public_key(self, data):
+        return self._rsa.import_key(data)
+
+    def export_public_key(self, public_key):
+        return public_key.export_key().decode("utf-8")
+
+    def public_key(self, private_key):
+        return private_key.publickey()
+
+    def generate_private_key(self, bits=2048):
+        return self._rsa.generate(bits)
+
+    def random_bytes(self, length):
+        return self._random(length)
+
+
+class _CryptographyStream:
+    # adapts a cryptography CipherContext to the encrypt()/decrypt() of pycryptodome
+
+    __slots__ = ("_context",)
+
+    def __init__(self, context):
+        self._context = context
+
+    def encrypt(self, data):
+        return self._context.update(data)
+
+    decrypt = encrypt
+
+
+class CryptographyBackend(CryptoBackend):
+    """## The backend of the cryptography package (OpenSSL)."""
+
+    name = "cryptography"
+
+    def __init__(self):
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        self._serialization = serialization
+        self._rsa = rsa
+        self._cipher = Cipher
+        self._algorithm = algorithms.AES
+        self._cbc = modes.CBC
+
+        # OAEP with SHA-1 for the hash and MGF1, as pycryptodomes PKCS1_OAEP
+        self._oaep = padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA1()),
+            algorithm=hashes.SHA1(),
+            label=None,
+        )
+
+    def owns_key(self, key):
+        return isinstance(key, (self._rsa.RSAPrivateKey, self._rsa.RSAPublicKey))
+
+    def _aes(self, key, iv):
+        return self._cipher(self._algorithm(key), self._cbc(iv))
+
+    def aes_cbc_encrypt(self, key, iv, data):
+        encryptor = self._aes(key, iv).encryptor()
+        return encryptor.update(data) + encryptor.finalize()
+
+    def aes_cbc_decrypt(self, key, iv, data):
+        decryptor = self._aes(key, iv).decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+
+    def aes_cbc_encryptor(self, key, iv):
+        return _CryptographyStream(self._aes(key, iv).encryptor())
+
+    def aes_cbc_decryptor(self, key, iv):
+        return _CryptographyStream(self._aes(key, iv).decryptor())
+
+    def rsa_encrypt(self, public_key, data):
+        return public_key.encrypt(data, self._oaep)
+
+    def rsa_decrypt(self, private_key, data):
+        return private_key.decrypt(data, self._oaep)
+
+    def load_private_key(self, data, passphrase=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if isinstance(passphrase, str):
+            passphrase = passphrase.encode("utf-8")
+
+        if data.lstrip().startswith(b"-----"):
+            return self._serialization.load_pem_private_key(data, passphrase)
+
+        return self._serialization.load_der_private_key(data, passphrase)
+
+    def export_private_key(self, private_key, passphrase=None):
+        serialization = self._serialization
+
+        if passphrase is None:
+            return private_key.private_bytes(
+                serialization.Encoding.DER,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            )
+
+        if isinstance(passphrase, str):
+            passphrase = passphrase.encode("utf-8")
+
+        return private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.BestAvailableEncryption(passphrase),
+        )
+
+    def load_public_key(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        return self._serialization.load_pem_public_key(data)
+
+    def export_public_key(self, public_key):
+        return public_key.public_bytes(
+            self._serialization.Encoding.PEM,
+            self._serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode("utf-8")
+
+    def public_key(self, private_key):
+        return private_key.public_key()
+
+    def generate_private_key(self, bits=2048):
+        return self._rsa.generate_private_key(public_exponent=65537, key_size=bits)
+
+    def random_bytes(self, length):
+        return os.urandom(length)
+
+
+BACKENDS = {
+    PycryptodomeBackend.name: PycryptodomeBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+
+def available_backends() -> list:
+    """## Returns the names of the backends whose library is installed.
+
+    #### Returns:
+        list: The backend names.
+    """
+    import importlib.util
+
+    modules = {"pycryptodome": "Crypto", "cryptography": "cryptography"}
+    return [name for name in BACKENDS if importlib.util.find_spec(modules[name])]
+
+
+def create_backend(backend: str | CryptoBackend) -> CryptoBackend:
+    """## Creates a backend by name.
+
+    #### Args:
+        backend (str | CryptoBackend): A backend name or instance.
+
+    #### Returns:
+        CryptoBackend: The backend.
+    """
+    if isinstance(backend, CryptoBackend):
+        _backends.setdefault(backend.name, backend)
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"unknown crypto backend {backend!r}, choose from {', '.join(BACKENDS)}"
+        )
+
+    with _backend_lock:
+        if backend not in _backends:
+            _backends[backend] = BACKENDS[backend]()
+
+    return _backends[backend]
+
+
+def get_backend() -> CryptoBackend:
+    """## Returns the backend in use, creating the default one on first use.
+
+    #### Returns:
+        CryptoBackend: The backend.
+    """
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = os.environ.get("STASHCONNECT_CRYPTO_BACKEND")
+                _backend = create_backend(name or DEFAULT_BACKEND)
+
+    return _backend
+
+
+def backend_for(key) -> CryptoBackend:
+    """## Returns the backend a key object belongs to.
+
+    #### Args:
+        key: An RSA private or public key object.
+
+    #### Returns:
+        CryptoBackend: The backend that created the key, the backend in use if none did.
+    """
+    backend = get_backend()
+    if backend.owns_key(key):
+        return backend
+
+    for other in list(_backends.values()):
+        if other is not backend and other.owns_key(key):
+            return other
+
+    return backend
+
+
+def set_backend(backend: str | CryptoBackend) -> CryptoBackend:
+    """## Sets the backend used for new keys and AES.
+
+    #### Info:
+        :Key objects keep their backend, a private key loaded before the switch
+        still decrypts with the backend that loaded it.
+
+    #### Args:
+        backend (str | CryptoBackend): A backend name or instance.
+
+    #### Returns:
+        CryptoBackend: The backend.
+    """
+    global _backend
+
+    backend = create_backend(backend)
+    with _backend_lock:
+        _backend = backend
+
+    return backend
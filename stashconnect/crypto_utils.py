@@ -1,20 +1,153 @@
-import Crypto.Cipher
-import Crypto.Cipher.AES
-import Crypto.Cipher.PKCS1_OAEP
-import Crypto.Protocol
-import Crypto.PublicKey
-import Crypto.PublicKey.RSA
-import Crypto
-
-import Crypto.Random
-import Crypto.Util
-import Crypto.Util.Padding
+# the crypto backend (pycryptodome or cryptography, see crypto_backends) is
+# imported on first use, so importing stashconnect (e.g. to send plain
+# messages) does not load it
 
 import base64
+import functools
+import time
+
+from .agent import AgentKey
+from .crypto_backends import backend_for, get_backend, set_backend
+
+BLOCK_SIZE = 16
+
+
+def _timed(operation):
+    # marks the operations a clients TimedCrypto records into its metrics registry
+    def decorator(func):
+        func.operation = operation
+        return func
+
+    return decorator
+
+
+def _recorded(func, operation, metrics):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            data = args[0] if args else None
+            nbytes = len(data) if isinstance(data, bytes | bytearray) else 0
+            metrics.observe_crypto(operation, time.perf_counter() - start, nbytes)
+
+    return wrapper
+
+
+def _pad(data: bytes) -> bytes:
+    # PKCS#7
+    length = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return bytes(data) + bytes((length,)) * length
+
+
+def _unpad(data: bytes) -> bytes:
+    length = data[-1] if data else 0
+    if (
+        not 1 <= length <= BLOCK_SIZE
+        or len(data) % BLOCK_SIZE
+        or data[-length:] != bytes((length,)) * length
+    ):
+        raise ValueError("Padding is incorrect.")
+
+    return data[:-length]
+
+
+class AESEncryptor:
+    """## Encrypts a stream with AES-CBC, padding only the final block.
+
+    #### Args:
+        key (bytes): The AES key.
+        iv (bytes): The iv. (16 bytes)
+
+    #### Info:
+        :update() returns the ciphertext of all complete blocks seen so far,
+        finalize() pads and encrypts the rest. The concatenated output equals
+        CryptoUtils.encrypt_aes() of the whole plaintext.
+    """
+
+    block_size = BLOCK_SIZE
+
+    def __init__(self, key: bytes, iv: bytes):
+        self._cipher = get_backend().aes_cbc_encryptor(key, iv)
+        self._buffer = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._buffer + bytes(data)
+        end = len(data) - len(data) % self.block_size
+
+        self._buffer = data[end:]
+        return self._cipher.encrypt(data[:end]) if end else b""
+
+    def finalize(self) -> bytes:
+        padded = _pad(self._buffer)
+        self._buffer = b""
+        return self._cipher.encrypt(padded)
+
+
+class AESDecryptor:
+    """## Decrypts an AES-CBC stream, removing the padding of the final block.
+
+    #### Args:
+        key (bytes): The AES key.
+        iv (bytes): The iv. (16 bytes)
+
+    #### Info:
+        :The last block is held back until finalize(), as only it is padded.
+    """
+
+    block_size = BLOCK_SIZE
+
+    def __init__(self, key: bytes, iv: bytes):
+        self._cipher = get_backend().aes_cbc_decryptor(key, iv)
+        self._buffer = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._buffer + bytes(data)
+
+        # keep at least one block (the possibly padded last one)
+        end = len(data) - len(data) % self.block_size
+        if end == len(data):
+            end -= self.block_size
+
+        if end <= 0:
+            self._buffer = data
+            return b""
+
+        self._buffer = data[end:]
+        return self._cipher.decrypt(data[:end])
+
+    def finalize(self) -> bytes:
+        if len(self._buffer) != self.block_size:
+            raise ValueError("the ciphertext is not a multiple of the block size")
+
+        decrypted = self._cipher.decrypt(self._buffer)
+        self._buffer = b""
+        return _unpad(decrypted)
 
 
 class CryptoUtils:
 
+    def set_backend(backend):
+        """## Sets the crypto backend used for new keys and AES, loaded keys keep theirs.
+
+        #### Args:
+            backend (str | CryptoBackend): "pycryptodome", "cryptography" or a backend instance.
+
+        #### Returns:
+            CryptoBackend: The backend.
+        """
+        return set_backend(backend)
+
+    def get_backend():
+        """## Returns the crypto backend in use.
+
+        #### Returns:
+            CryptoBackend: The backend. (STASHCONNECT_CRYPTO_BACKEND or pycryptodome by default)
+        """
+        return get_backend()
+
+    @_timed("aes_encrypt")
     def encrypt_aes(plain: bytes, key: bytes, iv: bytes) -> bytes:
         """## Encrypts the provided plaintext using AES.
 
@@ -26,10 +159,9 @@ class CryptoUtils:
         #### Returns:
             bytes: The encrypted data as bytes.
         """
-        padded = Crypto.Util.Padding.pad(plain, Crypto.Cipher.AES.block_size)
-        encryptor = Crypto.Cipher.AES.new(key, Crypto.Cipher.AES.MODE_CBC, iv=iv)
-        return encryptor.encrypt(padded)
+        return get_backend().aes_cbc_encrypt(key, iv, _pad(plain))
 
+    @_timed("aes_decrypt")
     def decrypt_aes(encrypted: bytes, key: bytes, iv: bytes) -> bytes:
         """## Decrypts the provided data using AES.
 
@@ -41,23 +173,83 @@ class CryptoUtils:
         #### Returns:
             bytes: The decoded plaintext data.
         """
-        decryptor = Crypto.Cipher.AES.new(key, Crypto.Cipher.AES.MODE_CBC, iv=iv)
-        decrypted = decryptor.decrypt(encrypted)
-        return Crypto.Util.Padding.unpad(decrypted, Crypto.Cipher.AES.block_size)
+        return _unpad(get_backend().aes_cbc_decrypt(key, iv, encrypted))
+
+    def aes_encryptor(key: bytes, iv: bytes) -> AESEncryptor:
+        """## Creates a streaming AES-CBC encryptor.
+
+        #### Args:
+            key (bytes): The AES key.
+            iv (bytes): The iv. (16 bytes)
+
+        #### Returns:
+            AESEncryptor: The encryptor (update() / finalize()).
+        """
+        return AESEncryptor(key, iv)
+
+    def aes_decryptor(key: bytes, iv: bytes) -> AESDecryptor:
+        """## Creates a streaming AES-CBC decryptor.
+
+        #### Args:
+            key (bytes): The AES key.
+            iv (bytes): The iv. (16 bytes)
+
+        #### Returns:
+            AESDecryptor: The decryptor (update() / finalize()).
+        """
+        return AESDecryptor(key, iv)
+
+    def padded_size(size: int) -> int:
+        """## Returns the AES-CBC ciphertext size of a plaintext size.
+
+        #### Args:
+            size (int): The plaintext size in bytes.
+
+        #### Returns:
+            int: The size including the PKCS#7 padding.
+        """
+        return (size // BLOCK_SIZE + 1) * BLOCK_SIZE
 
+    @_timed("aes_decrypt_many")
+    def decrypt_aes_many(items: list) -> list:
+        """## Decrypts many AES ciphertexts with one backend lookup.
+
+        #### Args:
+            items (list): (encrypted, key, iv) tuples.
+
+        #### Returns:
+            list: The plaintexts in the same order, None where decryption failed.
+        """
+        # a few microseconds per item, a process pool would cost more than it saves
+        backend = get_backend()
+
+        plaintexts = []
+        for encrypted, key, iv in items:
+            try:
+                plaintexts.append(_unpad(backend.aes_cbc_decrypt(key, iv, encrypted)))
+            except (ValueError, TypeError):
+                plaintexts.append(None)
+
+        return plaintexts
+
+    @_timed("rsa_decrypt")
     def decrypt_key(encrypted_key: bytes, private_key: bytes) -> bytes:
         """## Decrypts an RSA-encrypted key.
 
         #### Args:
             encrypted_key (bytes): The encrypted key data as bytes.
-            private_key (bytes): The RSA private key object used for decryption
+            private_key (bytes): The RSA private key object used for decryption (or an AgentKey)
 
         #### Returns:
             bytes: The decrypted key as plaintext data.
         """
-        decryptor = Crypto.Cipher.PKCS1_OAEP.new(private_key)
-        return decryptor.decrypt(base64.b64decode(encrypted_key))
+        if isinstance(private_key, AgentKey):
+            return private_key.decrypt(encrypted_key)
 
+        backend = backend_for(private_key)
+        return backend.rsa_decrypt(private_key, base64.b64decode(encrypted_key))
+
+    @_timed("load_private_key")
     def load_private_key(encrypted_key: bytes, encryption_password: str):
         """## Imports an RSA private key using a passphrase.
 
@@ -68,7 +260,118 @@ class CryptoUtils:
         #### Returns:
             The decrypted RSA private key object.
         """
-        private_key = Crypto.PublicKey.RSA.import_key(
-            encrypted_key, passphrase=encryption_password
-        )
-        return private_key
+        return get_backend().load_private_key(encrypted_key, encryption_password)
+
+    def export_private_key(private_key, passphrase: str = None) -> bytes:
+        """## Exports an RSA private key.
+
+        #### Args:
+            private_key: The RSA private key object.
+            passphrase (str, optional): Encrypts the key (PKCS#8 PEM). Defaults to None.
+
+        #### Returns:
+            bytes: The DER encoded key without a passphrase, load it with load_private_key(der, None).
+        """
+        return backend_for(private_key).export_private_key(private_key, passphrase)
+
+    def generate_private_key(bits: int = 2048):
+        """## Generates an RSA private key.
+
+        #### Args:
+            bits (int, optional): The key size. Defaults to 2048.
+
+        #### Returns:
+            The RSA private key object.
+        """
+        return get_backend().generate_private_key(bits)
+
+    def public_key(private_key):
+        """## Returns the public key of a private key.
+
+        #### Args:
+            private_key: The RSA private key object (or an AgentKey).
+
+        #### Returns:
+            The RSA public key object.
+        """
+        if isinstance(private_key, AgentKey):
+            return private_key.publickey()
+
+        return backend_for(private_key).public_key(private_key)
+
+    @_timed("import_public_key")
+    def import_public_key(public_key: str):
+        """## Imports an RSA public key.
+
+        #### Args:
+            public_key (str): The PEM encoded public key.
+
+        #### Returns:
+            The RSA public key object.
+        """
+        return get_backend().load_public_key(public_key)
+
+    def export_public_key(public_key) -> str:
+        """## Exports an RSA public key.
+
+        #### Args:
+            public_key: The RSA public key object.
+
+        #### Returns:
+            str: The PEM encoded public key.
+        """
+        return backend_for(public_key).export_public_key(public_key)
+
+    @_timed("rsa_encrypt")
+    def encrypt_key(key: bytes, public_key) -> str:
+        """## Encrypts a key for an RSA public key.
+
+        #### Args:
+            key (bytes): The plain key.
+            public_key: The RSA key object used for encryption.
+
+        #### Returns:
+            str: The encrypted key as base64.
+        """
+        encrypted = backend_for(public_key).rsa_encrypt(public_key, key)
+        return base64.b64encode(encrypted).decode("utf-8")
+
+    def random_bytes(length: int) -> bytes:
+        """## Generates cryptographically secure random bytes.
+
+        #### Args:
+            length (int): The number of bytes.
+
+        #### Returns:
+            bytes: The random bytes.
+        """
+        return get_backend().random_bytes(length)
+
+
+class TimedCrypto:
+    """## The CryptoUtils functions, timed into one clients metrics registry.
+
+    #### Args:
+        metrics (MetricsRegistry | None): The registry, None returns the functions untimed.
+
+    #### Info:
+        :Every client has one (client.crypto), so clients with their own
+        registries never record into each others.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self._functions = {}
+
+    def __getattr__(self, name):
+        func = getattr(CryptoUtils, name)
+
+        operation = getattr(func, "operation", None)
+        if operation is None or self.metrics is None:
+            return func
+
+        timed = self._functions.get(name)
+        if timed is None:
+            timed = self._functions[name] = _recorded(func, operation, self.metrics)
+
+        return timed
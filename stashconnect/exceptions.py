@@ -0,0 +1,167 @@
+import email.utils
+import time
+
+# the http and network errors subclass the requests exceptions the client raised
+# before, so existing "except requests.HTTPError" handlers still catch them
+import requests
+
+__all__ = [
+    "StashConnectError",
+    "RetryableError",
+    "RateLimitError",
+    "ServerError",
+    "NetworkError",
+    "ConnectError",
+    "NetworkTimeout",
+    "FatalError",
+    "HTTPError",
+    "APIError",
+]
+
+
+class StashConnectError(Exception):
+    """## Base class of all StashConnect errors."""
+
+    def __init__(self, message: str = "", *, url: str = None):
+        super().__init__(message)
+        self.url = url
+
+
+class RetryableError(StashConnectError):
+    """## A request failed, but sending it again may succeed.
+
+    #### Attributes:
+        .retry_after (float | None): Seconds to wait as requested by the server.
+    """
+
+    retry_after = None
+
+
+class RateLimitError(RetryableError, requests.HTTPError):
+    """## The server answered with 429 Too Many Requests."""
+
+    def __init__(
+        self, message: str = "", *, url: str = None, retry_after=None, response=None
+    ):
+        super().__init__(message, url=url)
+        self.status_code = 429
+        self.retry_after = retry_after
+        self.response = response
+
+
+class ServerError(RetryableError, requests.HTTPError):
+    """## The server answered with a 5xx status code."""
+
+    def __init__(
+        self,
+        message: str = "",
+        *,
+        url: str = None,
+        status_code=None,
+        retry_after=None,
+        response=None,
+    ):
+        super().__init__(message, url=url)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.response = response
+
+
+class NetworkError(RetryableError, requests.ConnectionError):
+    """## The connection failed or timed out before a response arrived."""
+
+
+class ConnectError(NetworkError):
+    """## The connection could not be opened, the request never reached the server."""
+
+
+class NetworkTimeout(NetworkError, requests.Timeout):
+    """## No response arrived in time, the server may have handled the request."""
+
+
+class FatalError(StashConnectError):
+    """## A request failed and sending it again will fail as well."""
+
+
+class HTTPError(FatalError, requests.HTTPError):
+    """## The server answered with a non retryable 4xx status code."""
+
+    def __init__(
+        self, message: str = "", *, url: str = None, status_code=None, response=None
+    ):
+        super().__init__(message, url=url)
+        self.status_code = status_code
+        self.response = response
+
+
+class APIError(FatalError):
+    """## The api answered, but its status value was not "OK".
+
+    #### Attributes:
+        .status (dict): The status object of the response.
+    """
+
+    def __init__(self, message: str = "", *, url: str = None, status=None):
+        super().__init__(message, url=url)
+        self.status = status
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """## Parses a Retry-After header.
+
+    #### Args:
+        value (str | None): Delay seconds or an http date.
+
+    #### Returns:
+        float | None: The delay in seconds or None.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, date.timestamp() - time.time())
+
+
+def raise_for_status(
+    status_code: int, headers, url: str, reason: str = "", response=None
+) -> None:
+    """## Raises the typed error matching an http status code.
+
+    #### Args:
+        status_code (int): The responses status code.
+        headers (Mapping): The responses headers.
+        url (str): The requested endpoint.
+        reason (str, optional): The status reason. Defaults to "".
+        response (requests.Response, optional): Set as the errors .response. Defaults to None.
+    """
+    if status_code < 400:
+        return
+
+    message = f"{status_code} {reason} for {url}".replace("  ", " ")
+
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+
+    if status_code == 429:
+        raise RateLimitError(
+            message, url=url, retry_after=retry_after, response=response
+        )
+
+    if status_code >= 500:
+        raise ServerError(
+            message,
+            url=url,
+            status_code=status_code,
+            retry_after=retry_after,
+            response=response,
+        )
+
+    raise HTTPError(message, url=url, status_code=status_code, response=response)
@@ -1,11 +1,7 @@
-import Crypto
-import Crypto.Random
-import Crypto.Util
-
 import os
 import mimetypes
+import time
 import uuid
-from PIL import Image
 from io import BytesIO
 import base64
 import json
@@ -14,6 +10,69 @@ from .crypto_utils import CryptoUtils
 from .models import Channel, Conversation, File
 
 
+def _preview_content(filepath):
+    # builds the 100x100 jpeg preview as a data url
+    from PIL import Image
+
+    with Image.open(filepath) as image:
+        output_size = 100
+
+        image = image.convert("RGB")
+        min_dimension = min(image.width, image.height)
+        scale_factor = output_size / min_dimension
+
+        new_width = int(image.width * scale_factor)
+        new_height = int(image.height * scale_factor)
+
+        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        left, top = (new_width - output_size) / 2, (new_height - output_size) / 2
+        right, bottom = left + output_size, top + output_size
+
+        image = image.crop((left, top, right, bottom))
+        buffered = BytesIO()
+        image.save(buffered, format="JPEG")
+
+        image_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return "data:image/jpeg;base64," + image_base64
+
+
+def _image_dimensions(stream):
+    # (width, height) of an image, PIL only reads the header
+    try:
+        from PIL import Image
+
+        with Image.open(stream) as image:
+            return image.width, image.height
+    except Exception:
+        return None, None
+
+
+def _seekable(stream):
+    # the upload seeks back after the image header and to measure the size,
+    # pipes and sockets can not, so they are read into memory once
+    try:
+        if stream.seekable():
+            stream.tell()
+            return stream
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    return BytesIO(stream.read())
+
+
+def _download_key(client, file_info):
+    # the file key, encrypted with the key of the chat the file was shared in
+    access = file_info["keys"][0]
+    return client.crypto.decrypt_aes(
+        bytes.fromhex(access["key"]),
+        client.get_conversation_key(
+            access["chat_id"], access["type"], key=access["chat_key"]
+        ),
+        bytes.fromhex(access["iv"]),
+    )
+
+
 class FileManager:
     def __init__(self, client):
         self.client = client
@@ -36,6 +95,7 @@ class FileManager:
         filename: str = "stashconnect_file",
         encrypted: bool = True,
         preview: bool = True,
+        target_type: str = None,
     ) -> File:
         """## Uploads a file to a target location.
 
@@ -45,19 +105,34 @@ class FileManager:
             filename(str): Only needed for bytes and BytesIO. Defaults to "file".
             encrypted (bool, optional): Sets whether a file should be encrypted. Defaults to True.
             preview (bool, optional): Sets whether a preview image should be set. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
 
         #### Returns:
             File: A file object.
         """
-        if isinstance(file_input, BytesIO):
+        start = time.perf_counter()
+
+        # checked before a path is opened, returning later would leak the handle
+        if encrypted and self.client._private_key is None:
+            print(
+                "Could not upload encrypted file as no encryption password was provided"
+            )
+            return
+
+        opened = False
+
+        if isinstance(file_input, bytes):
+            stream = BytesIO(file_input)
+
+        elif hasattr(file_input, "read"):
             # if file_input is a file-like object
-            file_content = file_input.read()
-            filename = getattr(file_input, "name", filename)
+            stream = _seekable(file_input)
 
-        elif isinstance(file_input, bytes):
-            # if the file_input is bytes
-            file_content = file_input
-            filename = filename
+            # pipes (e.g. subprocess stdout) are named by their file descriptor
+            name = getattr(file_input, "name", None)
+            if isinstance(name, str):
+                # only the name, the local directories are none of the servers business
+                filename = os.path.basename(name)
 
         else:
             # if the file_input is a filepath
@@ -67,19 +142,13 @@ class FileManager:
             else:
                 filename = os.path.basename(file_input)
 
-            with open(file_input, "rb") as file:
-                file_content = file.read()
+            stream = open(file_input, "rb")
+            opened = True
 
         if encrypted:
-            if self.client._private_key is None:
-                print(
-                    "Could not upload encrypted file as no encryption password was provided"
-                )
-                return
-
             # generate random iv and file key
-            iv = Crypto.Random.get_random_bytes(16)
-            file_key = Crypto.Random.get_random_bytes(32)
+            iv = CryptoUtils.random_bytes(16)
+            file_key = CryptoUtils.random_bytes(32)
 
         # guess content type from extension
         content_type = mimetypes.guess_type(filename)[0]
@@ -90,71 +159,86 @@ class FileManager:
         upload_identifier = str(uuid.uuid4())  # the uploads id
 
         try:
-            if isinstance(file_input, BytesIO | bytes):
-                image = Image.open(BytesIO(file_content))
-            else:
-                image = Image.open(file_input)
-
-            image_width = image.width
-            image_height = image.height
-        except Exception:
-            image_width = None
-            image_height = None
-
-        # calculate total chunks
-        total_chunks = (len(file_content) + max_chunk_size - 1) // max_chunk_size
-        target_type = self.client.tools.get_type(target)
+            stream_start = stream.tell()
+            image_width, image_height = _image_dimensions(stream)
+            stream.seek(stream_start)
 
-        for i in range(total_chunks):
-            data_chunk = file_content[i * max_chunk_size : (i + 1) * max_chunk_size]
+            # the file is read chunk by chunk, only its size is needed up front
+            file_size = stream.seek(0, os.SEEK_END) - stream_start
+            stream.seek(stream_start)
 
-            # encrypt the chunk
+            # a single CBC stream over the whole file, only the last chunk is padded
             if encrypted:
-                encrypted_chunk = CryptoUtils.encrypt_aes(data_chunk, file_key, iv)
+                encryptor = CryptoUtils.aes_encryptor(file_key, iv)
+                upload_size = CryptoUtils.padded_size(file_size)
             else:
-                encrypted_chunk = data_chunk
-
-            data = {
-                "resumableChunkNumber": i,
-                "resumableChunkSize": max_chunk_size,
-                "resumableCurrentChunkSize": len(encrypted_chunk),
-                "resumableTotalSize": len(file_content),
-                "resumableType": content_type,
-                "resumableIdentifier": upload_identifier,
-                "resumableFilename": filename,
-                "resumableRelativePath": filename,
-                "resumableTotalChunks": total_chunks,
-                "folder": 0,
-                "type": target_type,
-                "type_id": target,
-                "encrypted": encrypted,
-                "media_width": image_width,
-                "media_height": image_height,
-            }
-
-            if encrypted:
-                data["iv"] = iv.hex()
+                encryptor = None
+                upload_size = file_size
+
+            total_chunks = max(1, -(-upload_size // max_chunk_size))
+            target_type = self.client.tools.get_type(target, target_type)
+
+            for i in range(total_chunks):
+                data_chunk = stream.read(max_chunk_size)
+
+                if encryptor is not None:
+                    encrypted_chunk = encryptor.update(data_chunk)
+                    if i == total_chunks - 1:
+                        encrypted_chunk += encryptor.finalize()
+                else:
+                    encrypted_chunk = data_chunk
+
+                data = {
+                    "resumableChunkNumber": i,
+                    "resumableChunkSize": max_chunk_size,
+                    "resumableCurrentChunkSize": len(encrypted_chunk),
+                    "resumableTotalSize": upload_size,
+                    "resumableType": content_type,
+                    "resumableIdentifier": upload_identifier,
+                    "resumableFilename": filename,
+                    "resumableRelativePath": filename,
+                    "resumableTotalChunks": total_chunks,
+                    "folder": 0,
+                    "type": target_type,
+                    "type_id": target,
+                    "encrypted": encrypted,
+                    "media_width": image_width,
+                    "media_height": image_height,
+                }
+
+                if encrypted:
+                    data["iv"] = iv.hex()
+
+                files = {
+                    "file": (
+                        "[object Object]",
+                        encrypted_chunk,
+                        "application/octet-stream",
+                    )
+                }
 
-            files = {
-                "file": ("[object Object]", encrypted_chunk, "application/octet-stream")
-            }
+                # upload the current chunk
+                response = self.client._post("file/upload", data=data, files=files)
+                file = response["file"]
 
-            # upload the current chunk
-            response = self.client._post("file/upload", data=data, files=files)
-            file = response["file"]
+            if preview and not opened:
+                stream.seek(stream_start)
+        finally:
+            if opened:
+                stream.close()
 
         file_id = file["id"]
 
         if encrypted:
             # sets a file access key for encrypted files
 
-            iv = Crypto.Random.get_random_bytes(16)
+            iv = CryptoUtils.random_bytes(16)
 
             data = {
                 "file_id": file_id,
                 "target": target_type,
                 "target_id": target,
-                "key": CryptoUtils.encrypt_aes(
+                "key": self.client.crypto.encrypt_aes(
                     file_key, self.client.get_conversation_key(target, target_type), iv
                 ).hex(),
                 "iv": iv.hex(),
@@ -162,8 +246,15 @@ class FileManager:
 
             response = self.client._post("security/set_file_access_key", data=data)
 
+        if self.client.metrics is not None:
+            self.client.metrics.observe_transfer(
+                "upload", file_size, time.perf_counter() - start
+            )
+
         if preview:
-            self.client.files.store_preview_image(file_id, file_input)
+            self.client.files.store_preview_image(
+                file_id, file_input if opened else stream
+            )
 
         return File(self.client, file)
 
@@ -178,32 +269,7 @@ class FileManager:
             File | dict: A file object or a status: false dict.
         """
         try:
-            with Image.open(filepath) as image:
-                output_size = 100
-
-                image = image.convert("RGB")
-                min_dimension = min(image.width, image.height)
-                scale_factor = output_size / min_dimension
-
-                new_width = int(image.width * scale_factor)
-                new_height = int(image.height * scale_factor)
-
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                left, top = (new_width - output_size) / 2, (
-                    new_height - output_size
-                ) / 2
-                right, bottom = left + output_size, top + output_size
-
-                image = image.crop((left, top, right, bottom))
-                buffered = BytesIO()
-                image.save(buffered, format="JPEG")
-
-                image_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            data = {
-                "file_id": file_id,
-                "content": str("data:image/jpeg;base64," + image_base64),
-            }
+            data = {"file_id": file_id, "content": _preview_content(filepath)}
 
             response = self.client._post("file/storePreviewImage", data=data)
             return File(self.client, response["file"])
@@ -211,91 +277,106 @@ class FileManager:
         except Exception:
             return {"success": False}
 
-    def download(self, id: str | int, directory: str = "", filename: str = None) -> str:
+    def _download_chunks(self, id: str | int, file_info: dict, chunk_size: int):
+        # yields the (decrypted) content in chunks, the response is never held at once
+        start = time.perf_counter()
+        received = 0
+
+        if file_info["encrypted"]:
+            decryptor = CryptoUtils.aes_decryptor(
+                _download_key(self.client, file_info),
+                bytes.fromhex(file_info["e2e_iv"]),
+            )
+        else:
+            decryptor = None
+
+        response = self.client._post(
+            f"file/download?id={id}", data={}, return_all=True, stream=True
+        )
+
+        try:
+            for chunk in response.iter_content(chunk_size):
+                received += len(chunk)
+                yield chunk if decryptor is None else decryptor.update(chunk)
+
+            if decryptor is not None:
+                yield decryptor.finalize()
+        finally:
+            response.close()
+
+        if self.client.metrics is not None:
+            self.client.metrics.observe_transfer(
+                "download", received, time.perf_counter() - start
+            )
+
+    def download(
+        self,
+        id: str | int,
+        directory: str = "",
+        filename: str = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> str:
         """## Downloads a file to a local location.
 
         #### Args:
             id (str | int): The files id.
             directory (str, optional): The download dir. Defaults to main.
             filename (str, optional): The new filename. Defaults to the main name.
+            chunk_size (int, optional): Bytes read and decrypted at once. Defaults to 1 MB.
 
         #### Returns:
             str: The path of the saved file.
         """
-        response = self.client._post(f"file/download?id={id}", data={}, return_all=True)
+        file_info = self.client.files._info(id)
 
         if filename is None:
-            file_info = self.client.files._info(id)
             file_path = os.path.join(directory, file_info["name"])
         else:
-            file_info = self.client.files._info(id)
             file_path = os.path.join(directory, filename + "." + file_info["ext"])
 
-        with open(file_path, "wb") as file:
+        if file_info["encrypted"] and self.client._private_key is None:
+            print(
+                "Could not download encrypted content as no encryption password was provided"
+            )
+            return
 
-            if file_info["encrypted"]:
-                if self.client._private_key is None:
-                    print(
-                        "Could not download encrypted content as no encryption password was provided"
-                    )
-                    return
-
-                key = CryptoUtils.decrypt_aes(
-                    bytes.fromhex(file_info["keys"][0]["key"]),
-                    self.client.get_conversation_key(
-                        file_info["keys"][0]["chat_id"],
-                        file_info["keys"][0]["type"],
-                        key=file_info["keys"][0]["chat_key"],
-                    ),
-                    bytes.fromhex(file_info["keys"][0]["iv"]),
-                )
-                decrypted = CryptoUtils.decrypt_aes(
-                    response.content,
-                    key,
-                    bytes.fromhex(file_info["e2e_iv"]),
-                )
-                file.write(decrypted)
-            else:
-                file.write(response.content)
+        # a failed decryption must not leave a truncated file at file_path
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, "xb") as file:
+                for chunk in self._download_chunks(id, file_info, chunk_size):
+                    file.write(chunk)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
 
         return file_path
 
-    def download_bytes(self, id: str | int) -> bytes:
+    def download_bytes(self, id: str | int, chunk_size: int = 1024 * 1024) -> bytes:
         """## Downloads a file and returns its content as bytes.
 
         #### Args:
             id (str | int): The file's id.
+            chunk_size (int, optional): Bytes read and decrypted at once. Defaults to 1 MB.
 
         #### Returns:
-            str: The path of the saved file.
+            bytes: The files content.
         """
-        response = self.client._post(f"file/download?id={id}", data={}, return_all=True)
         file_info = self.client.files._info(id)
 
-        if file_info["encrypted"]:
-            if self.client._private_key is None:
-                print(
-                    "Could not download encrypted content as no encryption password was provided"
-                )
-                return
-
-            key = CryptoUtils.decrypt_aes(
-                bytes.fromhex(file_info["keys"][0]["key"]),
-                self.client.get_conversation_key(
-                    file_info["keys"][0]["chat_id"],
-                    file_info["keys"][0]["type"],
-                    key=file_info["keys"][0]["chat_key"],
-                ),
-                bytes.fromhex(file_info["keys"][0]["iv"]),
-            )
-            decrypted = CryptoUtils.decrypt_aes(
-                response.content,
-                key,
-                bytes.fromhex(file_info["e2e_iv"]),
+        if file_info["encrypted"] and self.client._private_key is None:
+            print(
+                "Could not download encrypted content as no encryption password was provided"
             )
-            return decrypted
-        else:
-            return response.content
+            return
+
+        content = bytearray()
+        for chunk in self._download_chunks(id, file_info, chunk_size):
+            content += chunk
+
+        return bytes(content)
 
     def _info(self, id: str | int) -> dict:
         """## Fetches the info of a file (dict).
@@ -321,11 +402,12 @@ class FileManager:
         response = self.client._post("file/info", data={"file_id": id})
         return File(self.client, response["file"])
 
-    def infos(self, ids: str | int | list) -> list:
+    def infos(self, ids: str | int | list, *, raw: bool = False) -> list:
         """## Fetches mutliple files.
 
         #### Args:
             ids (str | int | list): The files ids.
+            raw (bool, optional): Returns the payloads (dict) without building objects. Defaults to False.
 
         #### Returns:
             list: A list of files.
@@ -341,7 +423,11 @@ class FileManager:
             "file/infos", data={"file_ids": json.dumps(ids_sent)}
         )
 
-        files = [File(self.client, file) for file in response["files"]]
+        if raw:
+            return response["files"]
+
+        with self.client.resolver.collect():
+            files = [File(self.client, file) for file in response["files"]]
         return files
 
     def delete(self, ids: str | int | list) -> dict:
@@ -399,6 +485,7 @@ class FileManager:
         id: str | int,
         folder_id: str | int = 0,
         type_id: str | int = None,
+        target_type: str = None,
     ) -> File:
         """## Copies a file to a folder.
 
@@ -407,6 +494,7 @@ class FileManager:
             folder_id (str | int, optional): The new folders id. Defaults to main.
             type (str, optional): The destinations type. Defaults to "personal".
             type_id (str | int, optional): The destinations type id. Defaults to client.user_id.
+            target_type (str, optional): The destinations type, skips the type lookup. Defaults to None.
 
         #### Returns:
             File: A file object.
@@ -414,7 +502,7 @@ class FileManager:
         if type_id is None:
             type_id = self.client.user_id
 
-        target_type = self.client.tools.get_type(type_id)
+        target_type = self.client.tools.get_type(type_id, target_type)
 
         data = {
             "file_id": id,
@@ -437,13 +525,14 @@ class FileManager:
         data = {"file_id": id}
         response = self.client._post("file/shares", data=data)["shares"]
 
-        channels = []
-        for channel in response["channels"]:
-            channels.append(Channel(self.client, channel))
+        with self.client.resolver.collect():
+            channels = []
+            for channel in response["channels"]:
+                channels.append(Channel(self.client, channel))
 
-        conversations = []
-        for conversation in response["conversations"]:
-            conversations.append(Conversation(self.client, conversation))
+            conversations = []
+            for conversation in response["conversations"]:
+                conversations.append(Conversation(self.client, conversation))
 
         response["channels"] = channels
         response["conversations"] = conversations
@@ -459,6 +548,7 @@ class FileManager:
         limit: int | str = 75,
         search: str = None,
         sorting: str = "created_asc",
+        target_type: str = None,
     ) -> dict:
         """## Gets the files and folders in a dir.
 
@@ -470,6 +560,7 @@ class FileManager:
             limit (int | str, optional): The response limit. Defaults to 75.
             search (str, optional): The search prompt. Defaults to None.
             sorting (str, optional): The sorting setting. Defaults to "created_asc".
+            target_type (str, optional): The type, skips the type lookup. Defaults to None.
 
         #### Returns:
             dict: A dictonary containing folder and file objects.
@@ -477,7 +568,7 @@ class FileManager:
         if type_id is None:
             type_id = self.client.user_id
 
-        target_type = self.client.tools.get_type(type_id)
+        target_type = self.client.tools.get_type(type_id, target_type)
         data = {
             "folder_id": folder_id,
             "type": target_type,
@@ -0,0 +1,193 @@
+"""Paging through the message history of a chat.
+
+message/content pages are counted from the newest message (offset 0 is the
+newest page) and each page is in chronological order. The helpers here walk
+the pages newest first, fetching a bounded number of pages ahead, and apply
+the time / id bounds of MessageManager.history() so iteration stops as soon
+as the remaining history is out of bounds.
+"""
+
+import datetime
+import queue
+import threading
+
+# put by a reader thread after the last page
+_END = object()
+
+
+def _timestamp(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+class HistoryWindow:
+    """## Selects the messages of history pages that are within bounds.
+
+    #### Args:
+        after (int | float | datetime, optional): Only messages sent after this time.
+        before (int | float | datetime, optional): Only messages sent before this time.
+        after_id (int, optional): Only messages with a greater id.
+        before_id (int, optional): Only messages with a smaller id.
+        limit (int, optional): The maximum number of messages.
+
+    #### Info:
+        :Pages have to be passed newest first. Messages that shift into a later
+        page while iterating (new messages move the offsets) are skipped, as
+        only ids below the last selected one are accepted.
+    """
+
+    def __init__(
+        self,
+        *,
+        after=None,
+        before=None,
+        after_id: int = None,
+        before_id: int = None,
+        limit: int = None,
+    ):
+        self.after = _timestamp(after)
+        self.before = _timestamp(before)
+        self.after_id = None if after_id is None else int(after_id)
+        self.before_id = None if before_id is None else int(before_id)
+        self.limit = limit
+
+        self.count = 0
+        self.done = limit is not None and limit <= 0
+        self._last_id = None
+
+    def select(self, page: list) -> list:
+        """## Returns the messages of a page that are within bounds, newest first.
+
+        #### Args:
+            page (list): The raw payloads of a message/content page.
+
+        #### Returns:
+            list: The selected payloads, done is set once the bounds are passed.
+        """
+        selected = []
+
+        for payload in reversed(page):
+            if self.done:
+                break
+
+            if payload.get("kind", "message") != "message":
+                continue
+
+            message_id = int(payload["id"])
+            if self._last_id is not None and message_id >= self._last_id:
+                continue
+
+            sent = float(payload["time"])
+            if (self.after is not None and sent <= self.after) or (
+                self.after_id is not None and message_id <= self.after_id
+            ):
+                self.done = True
+                break
+
+            self._last_id = message_id
+
+            if (self.before is not None and sent >= self.before) or (
+                self.before_id is not None and message_id >= self.before_id
+            ):
+                continue
+
+            selected.append(payload)
+            self.count += 1
+
+            if self.limit is not None and self.count >= self.limit:
+                self.done = True
+
+        return selected
+
+
+class PageReader:
+    """## Fetches history pages on a background thread, a bounded number ahead.
+
+    #### Args:
+        fetch (callable): Called with (offset, limit), returns the raw payloads of a page.
+        page_size (int, optional): The messages per page. Defaults to 100.
+        read_ahead (int, optional): Pages fetched ahead, 0 fetches on demand. Defaults to 2.
+        offset (int, optional): The offset of the first page. Defaults to 0.
+
+    #### Info:
+        :Iterating yields the pages newest first, the reader stops after a short
+        page. Errors of the background fetch are raised by the iteration, close()
+        (or leaving a with block) stops the background thread.
+    """
+
+    def __init__(
+        self, fetch, page_size: int = 100, read_ahead: int = 2, offset: int = 0
+    ):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.read_ahead = read_ahead
+        self.offset = offset
+
+        self._queue = None
+        self._thread = None
+        self._closed = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        if self.read_ahead <= 0:
+            yield from self._fetch_pages()
+            return
+
+        self._queue = queue.Queue(maxsize=self.read_ahead)
+        self._thread = threading.Thread(
+            target=self._read, name="stashconnect-history", daemon=True
+        )
+        self._thread.start()
+
+        try:
+            while True:
+                page = self._queue.get()
+                if page is _END:
+                    return
+                if isinstance(page, BaseException):
+                    raise page
+                yield page
+        finally:
+            self.close()
+
+    def _fetch_pages(self):
+        offset = self.offset
+        while not self._closed.is_set():
+            page = self.fetch(offset, self.page_size)
+            if page:
+                yield page
+            if len(page) < self.page_size:
+                return
+            offset += len(page)
+
+    def _put(self, item) -> bool:
+        # blocks while the window is full, gives up once the reader is closed
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self):
+        try:
+            for page in self._fetch_pages():
+                if not self._put(page):
+                    return
+        except BaseException as e:
+            self._put(e)
+        else:
+            self._put(_END)
+
+    def close(self) -> None:
+        """## Stops fetching pages."""
+        self._closed.set()
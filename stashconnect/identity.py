@@ -0,0 +1,206 @@
+import threading
+import time
+import weakref
+
+
+class _Ref(weakref.ref):
+    # a weak reference carrying its map key and expiry, cheaper than a closure per entry
+    __slots__ = ("key", "expires")
+
+
+def _object_id(data) -> str | None:
+    if not isinstance(data, dict):
+        return None
+
+    # companies are referenced as {"company_id": ...} by channels
+    object_id = data.get("id", data.get("company_id"))
+    return None if object_id is None else str(object_id)
+
+
+class IdentityMap:
+    """## Shares one User, Channel, Company and File object per id and client.
+
+    #### Args:
+        ttl (int | float, optional): Seconds an object counts as fresh. Defaults to 300.
+
+    #### Info:
+        :Building a model with an id that is already known returns the shared
+        object. Complete data refreshes it in place, partial data (e.g. only an
+        id) reuses it while it is fresh and fetches once it expired.
+        :Concurrent misses of the same id wait for a single fetch.
+        :Only weak references are kept, unused objects are freed as before.
+    """
+
+    def __init__(self, ttl: int | float = 300):
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = {}
+        self._dead = []
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._collected = self._dead.append
+
+    def resolve(self, cls, client, data):
+        """## Returns the shared object for the data, building or refreshing it.
+
+        #### Args:
+            cls (type): The model class.
+            client (Client): The client.
+            data (dict): The models payload.
+
+        #### Returns:
+            The model object.
+        """
+        object_id = _object_id(data)
+        if object_id is None:
+            return type.__call__(cls, client, data)
+
+        key = (cls.__name__, object_id)
+
+        instance = self._fresh(key)
+        if instance is not None:
+            return self._refresh(key, instance, data)
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            try:
+                # another thread may have fetched it while this one waited
+                instance = self._fresh(key)
+                if instance is not None:
+                    return self._refresh(key, instance, data)
+
+                self.misses += 1
+
+                instance = self._get(key)
+                if instance is None:
+                    instance = type.__call__(cls, client, data)
+                else:
+                    # rebuilt in place, partial data fetches the current state
+                    instance.__init__(client, data)
+
+                    resolver = getattr(client, "resolver", None)
+                    if resolver is not None and not resolver.collecting:
+                        resolver.wait_for(instance)
+
+                self._store(key, instance)
+                return instance
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(key, None)
+
+    def refresh(self, instance):
+        """## Fetches the current state of a shared object (sync clients).
+
+        #### Args:
+            instance (User | Channel | Company | File): The object.
+
+        #### Returns:
+            The same object.
+        """
+        cls = type(instance)
+        key = (cls.__name__, str(instance.id))
+
+        with self._lock:
+            ref = self._entries.get(key)
+            if ref is not None:
+                ref.expires = 0
+
+        return self.resolve(cls, instance.client, {cls._id_field: instance.id})
+
+    def get(self, cls, object_id: str | int):
+        """## Returns a known object without building or fetching it.
+
+        #### Args:
+            cls (type): The model class.
+            object_id (str | int): The objects id.
+
+        #### Returns:
+            The object or None if it is unknown or was freed.
+        """
+        return self._get((cls.__name__, str(object_id)))
+
+    def discard(self, cls, object_id: str | int) -> None:
+        """## Forgets an object, the next reference builds a new one.
+
+        #### Args:
+            cls (type): The model class.
+            object_id (str | int): The objects id.
+        """
+        with self._lock:
+            self._entries.pop((cls.__name__, str(object_id)), None)
+
+    def clear(self) -> None:
+        """## Forgets all objects."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """## Returns the map statistics.
+
+        #### Returns:
+            dict: size, hits, misses and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        with self._lock:
+            self._purge()
+            return len(self._entries)
+
+    def _get(self, key):
+        with self._lock:
+            ref = self._entries.get(key)
+
+        return None if ref is None else ref()
+
+    def _fresh(self, key):
+        with self._lock:
+            ref = self._entries.get(key)
+
+        if ref is None or ref.expires < time.monotonic():
+            return None
+
+        return ref()
+
+    def _refresh(self, key, instance, data):
+        self.hits += 1
+
+        try:
+            instance.set_attributes(data)
+        except (KeyError, TypeError):
+            # partial data (e.g. only the id), the fresh object stays as it is
+            return instance
+
+        self._store(key, instance)
+        return instance
+
+    def _store(self, key, instance):
+        with self._lock:
+            ref = self._entries.get(key)
+
+            if ref is None or ref() is not instance:
+                # weakref callbacks may run inside a locked section, so they only queue the ref
+                ref = _Ref(instance, self._collected)
+                ref.key = key
+
+            ref.expires = time.monotonic() + self.ttl
+
+            self._purge()
+            self._entries[key] = ref
+
+    def _purge(self):
+        while self._dead:
+            ref = self._dead.pop()
+            if self._entries.get(ref.key) is ref:
+                del self._entries[ref.key]
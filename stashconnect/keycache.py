@@ -0,0 +1,505 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from collections import OrderedDict
+
+from .agent import AgentKey
+from .crypto_utils import CryptoUtils
+from .session import write_private_file
+
+
+def decrypt_keys(
+    encrypted_keys: dict,
+    private_key,
+    workers: int = None,
+    min_pool_size: int = 32,
+    crypto=CryptoUtils,
+) -> dict:
+    """## Decrypts many RSA encrypted chat keys, on a thread pool if worthwhile.
+
+    #### Args:
+        encrypted_keys (dict): Maps chat ids to their encrypted keys.
+        private_key: The unlocked RSA private key (or an AgentKey).
+        workers (int, optional): The number of threads. Defaults to the cpu count.
+        min_pool_size (int, optional): Smaller batches are decrypted inline. Defaults to 32.
+        crypto (optional): Runs the decryption, e.g. a clients TimedCrypto. Defaults to CryptoUtils.
+
+    #### Returns:
+        dict: Maps chat ids to their decrypted keys, keys that fail to decrypt are left out.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    targets = list(encrypted_keys)
+
+    # the agent decrypts the whole batch in one round trip
+    if isinstance(private_key, AgentKey):
+        results = private_key.decrypt_many([encrypted_keys[t] for t in targets])
+        return {target: key for target, key in zip(targets, results) if key is not None}
+
+    def decrypt(target):
+        try:
+            return crypto.decrypt_key(encrypted_keys[target], private_key)
+        except ValueError:
+            return None
+
+    if workers <= 1 or len(targets) < min_pool_size:
+        results = map(decrypt, targets)
+        return {target: key for target, key in zip(targets, results) if key is not None}
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # threads like wrap_keys, a process pool would re-import the callers script
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(targets)), thread_name_prefix="stashconnect-keys"
+    ) as pool:
+        results = pool.map(decrypt, targets)
+        return {target: key for target, key in zip(targets, results) if key is not None}
+
+
+class ConversationKeyCache:
+    """## A thread-safe, bounded cache of decrypted conversation and channel keys.
+
+    #### Args:
+        maxsize (int, optional): The maximum number of cached keys. Defaults to 4096.
+        path (str, optional): Persists the keys to this file. Defaults to None.
+        password (str, optional): The passphrase the file is encrypted with. Required with a path.
+
+    #### Info:
+        :Behaves like the dict it replaces (client.conversation_keys[id],
+        .get(id), `in`, len()), ids are compared as strings.
+        :get_or_fetch() runs a single fetch per id, concurrent misses wait for it.
+        :The file is encrypted with AES-CBC and authenticated with HMAC-SHA256,
+        both keys are derived from the password with scrypt. It is rewritten
+        whenever a new key is cached and created with 0600 permissions.
+    """
+
+    version = 1
+
+    # scrypt cost, about 50 ms per derivation (once per cache)
+    scrypt_n = 2**14
+    scrypt_r = 8
+    scrypt_p = 1
+
+    def __init__(self, maxsize: int = 4096, *, path: str = None, password: str = None):
+        if path is not None and password is None:
+            raise ValueError("a password is required to persist conversation keys")
+
+        self.maxsize = maxsize
+        self.path = (
+            None
+            if path is None
+            else os.path.abspath(os.path.expanduser(os.fspath(path)))
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._fetch_locks = {}
+        self._password = password
+        self._salt = None
+        self._file_keys = None
+
+        if self.path is not None:
+            self.load()
+
+    # dict interface
+
+    def get(self, target: str | int, default=None) -> bytes | None:
+        """## Returns a cached key.
+
+        #### Args:
+            target (str | int): The conversation or channel id.
+            default (optional): Returned for unknown ids. Defaults to None.
+
+        #### Returns:
+            bytes | None: The decrypted key.
+        """
+        key = str(target)
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def __getitem__(self, target):
+        value = self.get(target)
+        if value is None:
+            raise KeyError(target)
+
+        return value
+
+    def __setitem__(self, target, value):
+        self.update({target: value})
+
+    def __delitem__(self, target):
+        with self._lock:
+            del self._entries[str(target)]
+
+    def __contains__(self, target):
+        return str(target) in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self) -> list:
+        return list(self._entries)
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._entries.items())
+
+    def pop(self, target: str | int, default=None) -> bytes | None:
+        """## Removes a key from the cache.
+
+        #### Args:
+            target (str | int): The conversation or channel id.
+            default (optional): Returned for unknown ids. Defaults to None.
+
+        #### Returns:
+            bytes | None: The removed key.
+        """
+        with self._lock:
+            return self._entries.pop(str(target), default)
+
+    def clear(self) -> None:
+        """## Removes all cached keys (the file is kept until the next save)."""
+        with self._lock:
+            self._entries.clear()
+
+    def update(self, keys: dict) -> None:
+        """## Stores several keys, the file is written once.
+
+        #### Args:
+            keys (dict): Maps conversation or channel ids to decrypted keys.
+        """
+        changed = False
+
+        with self._lock:
+            for target, value in keys.items():
+                key = str(target)
+                changed = changed or self._entries.get(key) != value
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        if changed and self.path is not None:
+            self.save()
+
+    # single flight
+
+    def get_or_fetch(self, target: str | int, fetch) -> bytes:
+        """## Returns a cached key or stores the result of fetch().
+
+        #### Args:
+            target (str | int): The conversation or channel id.
+            fetch (callable): Returns the decrypted key, runs once for concurrent misses.
+
+        #### Returns:
+            bytes: The decrypted key.
+        """
+        value = self.get(target)
+        if value is not None:
+            return value
+
+        key = str(target)
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            # another thread may have fetched it while this one waited
+            with self._lock:
+                value = self._entries.get(key)
+
+            if value is None:
+                try:
+                    value = fetch()
+                    self[key] = value
+                finally:
+                    with self._lock:
+                        self._fetch_locks.pop(key, None)
+
+        return value
+
+    def stats(self) -> dict:
+        """## Returns the cache statistics.
+
+        #### Returns:
+            dict: size, maxsize, hits, misses, evictions and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # persistence
+
+    def _derive_keys(self, salt: bytes) -> tuple[bytes, bytes]:
+        if self._file_keys is None or self._salt != salt:
+            derived = hashlib.scrypt(
+                self._password.encode("utf-8"),
+                salt=salt,
+                n=self.scrypt_n,
+                r=self.scrypt_r,
+                p=self.scrypt_p,
+                dklen=64,
+            )
+            self._salt = salt
+            self._file_keys = derived[:32], derived[32:]
+
+        return self._file_keys
+
+    def load(self) -> int:
+        """## Reads the persisted keys.
+
+        #### Returns:
+            int: The number of loaded keys.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+
+            if stored.get("version") != self.version:
+                return 0
+
+            salt = bytes.fromhex(stored["salt"])
+            iv = bytes.fromhex(stored["iv"])
+            data = bytes.fromhex(stored["data"])
+            mac = bytes.fromhex(stored["mac"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            return 0
+
+        aes_key, mac_key = self._derive_keys(salt)
+
+        if not hmac.compare_digest(mac, hmac.digest(mac_key, iv + data, "sha256")):
+            print(
+                "Warning: the conversation key cache could not be verified, ignoring it"
+            )
+            return 0
+
+        keys = json.loads(CryptoUtils.decrypt_aes(data, aes_key, iv))
+
+        with self._lock:
+            for target, value in keys.items():
+                self._entries.setdefault(target, bytes.fromhex(value))
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return len(keys)
+
+    def save(self) -> None:
+        """## Writes the cached keys to the file."""
+        if self.path is None:
+            return
+
+        with self._save_lock:
+            if self._salt is None:
+                self._derive_keys(CryptoUtils.random_bytes(16))
+
+            aes_key, mac_key = self._file_keys
+            iv = CryptoUtils.random_bytes(16)
+
+            with self._lock:
+                keys = {target: value.hex() for target, value in self._entries.items()}
+
+            data = CryptoUtils.encrypt_aes(
+                json.dumps(keys).encode("utf-8"), aes_key, iv
+            )
+            stored = {
+                "version": self.version,
+                "salt": self._salt.hex(),
+                "iv": iv.hex(),
+                "data": data.hex(),
+                "mac": hmac.digest(mac_key, iv + data, "sha256").hex(),
+            }
+
+            write_private_file(self.path, json.dumps(stored))
+
+
+def wrap_keys(
+    key: bytes,
+    public_keys: dict,
+    workers: int = None,
+    min_pool_size: int = 64,
+    crypto=CryptoUtils,
+) -> dict:
+    """## Encrypts a chat key for many RSA public keys (OAEP), in parallel if worthwhile.
+
+    #### Args:
+        key (bytes): The plain chat key.
+        public_keys (dict): Maps user ids to RSA public key objects.
+        workers (int, optional): The number of threads. Defaults to the cpu count.
+        min_pool_size (int, optional): Fewer keys are wrapped inline. Defaults to 64.
+        crypto (optional): Runs the encryption, e.g. a clients TimedCrypto. Defaults to CryptoUtils.
+
+    #### Returns:
+        dict: Maps user ids to the encrypted key as base64.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    targets = list(public_keys)
+
+    if workers <= 1 or len(targets) < min_pool_size:
+        return {
+            target: crypto.encrypt_key(key, public_keys[target]) for target in targets
+        }
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # the modular exponentiation runs in native code without the GIL
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="stashconnect-wrap"
+    ) as pool:
+        wrapped = pool.map(
+            lambda target: crypto.encrypt_key(key, public_keys[target]), targets
+        )
+        return dict(zip(targets, wrapped))
+
+
+class PublicKeyCache:
+    """## A thread-safe cache of parsed RSA public keys by user id.
+
+    #### Args:
+        maxsize (int, optional): The maximum number of cached keys. Defaults to 4096.
+        ttl (int | float, optional): Seconds a key stays valid. Defaults to 3600.
+        crypto (optional): Parses the keys, e.g. a clients TimedCrypto. Defaults to CryptoUtils.
+
+    #### Info:
+        :Every key is stored with the SHA-256 fingerprint of its PEM. put() only
+        parses a PEM when the fingerprint changed, a changed key of a known user
+        replaces the cached one and prints a warning. Expired keys stay stored
+        until they are replaced or evicted, so a re-fetch after the TTL is
+        still compared against the old fingerprint.
+    """
+
+    def __init__(
+        self, maxsize: int = 4096, ttl: int | float = 3600, *, crypto=CryptoUtils
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.crypto = crypto
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(public_key: str) -> str:
+        """## Returns the SHA-256 fingerprint of a PEM encoded public key.
+
+        #### Args:
+            public_key (str): The PEM encoded key.
+
+        #### Returns:
+            str: The hex digest of the keys base64 body.
+        """
+        body = "".join(
+            line.strip()
+            for line in public_key.strip().splitlines()
+            if line.strip() and not line.startswith("-----")
+        )
+        return hashlib.sha256(body.encode("ascii")).hexdigest()
+
+    def get(self, user_id: str | int):
+        """## Returns a cached public key.
+
+        #### Args:
+            user_id (str | int): The users id.
+
+        #### Returns:
+            The RSA public key object or None if unknown / expired.
+        """
+        key = str(user_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            # expired entries are kept for the fingerprint check in put()
+            if entry is None or entry[2] < time.monotonic():
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, user_id: str | int, public_key: str):
+        """## Stores the public key of a user.
+
+        #### Args:
+            user_id (str | int): The users id.
+            public_key (str): The PEM encoded key (e.g. from users/info).
+
+        #### Returns:
+            The RSA public key object.
+        """
+        key = str(user_id)
+        fingerprint = self.fingerprint(public_key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry[1] == fingerprint:
+            parsed = entry[0]
+        else:
+            if entry is not None:
+                print(f"Warning: the public key of user {user_id} changed")
+            parsed = self.crypto.import_public_key(public_key)
+
+        with self._lock:
+            self._entries[key] = (parsed, fingerprint, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return parsed
+
+    def discard(self, user_id: str | int) -> None:
+        """## Removes a user from the cache.
+
+        #### Args:
+            user_id (str | int): The users id.
+        """
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        """## Removes all cached keys."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,22 +1,98 @@
-import Crypto.Cipher
-import Crypto.Cipher.AES
-import Crypto.Cipher.PKCS1_OAEP
-import Crypto.Protocol
-import Crypto.PublicKey
-import Crypto.PublicKey.RSA
-import Crypto
-
-import Crypto.Random
-import Crypto.Util
-import Crypto.Util.Padding
-
 import json
 from typing import Generator
 
 from .crypto_utils import CryptoUtils
+from .history import HistoryWindow, PageReader
 from .models import Message
 
 
+def _chat(payload: dict) -> tuple[str, int]:
+    # (type, id) of a payloads chat, every caller reads it from here
+    # the other id is 0 or "0", like in Tools.remember
+    channel_id = payload["channel_id"]
+    if not channel_id or str(channel_id) == "0":
+        return "conversation", payload["conversation_id"]
+    return "channel", channel_id
+
+
+def _needs_key(payload: dict) -> bool:
+    location = payload.get("location")
+    return bool(payload.get("encrypted")) or bool(
+        location is not None and location.get("encrypted")
+    )
+
+
+def _ciphertexts(payloads: list, keys: dict) -> tuple[list, list]:
+    # (encrypted, key, iv) items and the (payload index, field) each one belongs to
+    items, slots = [], []
+
+    for index, payload in enumerate(payloads):
+        if not _needs_key(payload):
+            continue
+
+        key = keys.get(_chat(payload))
+        if key is None:
+            continue
+
+        try:
+            iv = bytes.fromhex(payload["iv"])
+        except (TypeError, ValueError):
+            continue
+
+        fields = []
+        if payload.get("encrypted") and payload["text"]:
+            fields.append(("text", payload["text"]))
+
+        location = payload.get("location")
+        if location is not None and location.get("encrypted"):
+            fields.append(("latitude", location["latitude"]))
+            fields.append(("longitude", location["longitude"]))
+
+        for field, value in fields:
+            try:
+                items.append((bytes.fromhex(value), key, iv))
+            except (TypeError, ValueError):
+                continue
+            slots.append((index, field))
+
+    return items, slots
+
+
+def _decoded_messages(client, payloads: list, decoded: list) -> list:
+    # built from the raw payloads, the plain texts / locations of decode_many are memoized
+    messages = []
+
+    for payload, plain in zip(payloads, decoded):
+        message = Message(client, payload)
+        message._memoize(plain)
+        messages.append(message)
+
+    return messages
+
+
+def _decoded(payloads: list, slots: list, plaintexts: list) -> list:
+    decoded = [dict(payload) for payload in payloads]
+
+    for (index, field), plain in zip(slots, plaintexts):
+        if plain is None:
+            continue
+
+        payload = decoded[index]
+
+        # the replaced ciphertext is kept, Message.to_dict() writes it instead of the plain text
+        replaced = payload.setdefault("ciphertext", {})
+        if field == "text":
+            replaced.update(text=payload["text"], encrypted=payload["encrypted"])
+            payload["text"] = plain.decode("utf-8", errors="replace")
+            payload["encrypted"] = False
+        else:
+            replaced.setdefault("location", payload["location"])
+            payload["location"] = dict(payload["location"], encrypted=False)
+            payload["location"][field] = plain.decode("utf-8", errors="replace")
+
+    return decoded
+
+
 class MessageManager:
     def __init__(self, client):
         self.client = client
@@ -31,6 +107,7 @@ class MessageManager:
         urls: str | list = "",
         location: bool | tuple | list = None,
         encrypted: bool = True,
+        target_type: str = None,
         **kwargs,
     ) -> Message:
         """## Sends a message.
@@ -43,6 +120,7 @@ class MessageManager:
             urls (str | list, optional): Url's to append to the message. Defaults to "".
             location (bool | tuple | list, optional): The location of the message. Defaults to None.
             encrypted (bool, optional): If the message should be encrypted. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
 
         #### Info:
             :The location needs to be set to (lat, lng) in a tuple or None.
@@ -50,7 +128,7 @@ class MessageManager:
         #### Returns:
             Message: A message object.
         """
-        target_type = self.client.tools.get_type(target)
+        target_type = self.client.tools.get_type(target, target_type)
 
         if encrypted:
             if self.client._private_key is None:
@@ -59,11 +137,11 @@ class MessageManager:
                 )
                 return
 
-            iv = Crypto.Random.get_random_bytes(16)
+            iv = CryptoUtils.random_bytes(16)
             conversation_key = self.client.get_conversation_key(target, target_type)
 
             text_bytes = text.encode("utf-8")
-            text = CryptoUtils.encrypt_aes(text_bytes, conversation_key, iv)
+            text = self.client.crypto.encrypt_aes(text_bytes, conversation_key, iv)
 
         files_sent = []
 
@@ -78,7 +156,7 @@ class MessageManager:
                         files_sent.append(int(file))
                     else:
                         file = self.client.files.upload(
-                            target, file, encrypted=encrypted
+                            target, file, encrypted=encrypted, target_type=target_type
                         )
                         files_sent.append(int(file.id))
 
@@ -86,7 +164,9 @@ class MessageManager:
                     files_sent.append(int(file))
 
                 else:
-                    file = self.client.files.upload(target, file, encrypted=encrypted)
+                    file = self.client.files.upload(
+                        target, file, encrypted=encrypted, target_type=target_type
+                    )
                     files_sent.append(int(file.id))
 
         if isinstance(urls, str):
@@ -120,10 +200,10 @@ class MessageManager:
             location = self.client.account.location()
 
             if encrypted:
-                data["latitude"] = CryptoUtils.encrypt_aes(
+                data["latitude"] = self.client.crypto.encrypt_aes(
                     str(location["latitude"]).encode("utf-8"), conversation_key, iv=iv
                 ).hex()
-                data["longitude"] = CryptoUtils.encrypt_aes(
+                data["longitude"] = self.client.crypto.encrypt_aes(
                     str(location["longitude"]).encode("utf-8"), conversation_key, iv=iv
                 ).hex()
             else:
@@ -133,11 +213,11 @@ class MessageManager:
         elif isinstance(location, tuple | list):
 
             if encrypted:
-                data["latitude"] = CryptoUtils.encrypt_aes(
+                data["latitude"] = self.client.crypto.encrypt_aes(
                     str(location[0]).encode("utf-8"), conversation_key, iv=iv
                 ).hex()
 
-                data["longitude"] = CryptoUtils.encrypt_aes(
+                data["longitude"] = self.client.crypto.encrypt_aes(
                     str(location[1]).encode("utf-8"), conversation_key, iv=iv
                 ).hex()
             else:
@@ -147,7 +227,14 @@ class MessageManager:
         data = self.client._post("message/send", data=data)["message"]
         return Message(self.client, data)
 
-    def decode(self, target: str, text: bytes, iv: bytes, key: bytes = None) -> str:
+    def decode(
+        self,
+        target: str,
+        text: bytes,
+        iv: bytes,
+        key: bytes = None,
+        target_type: str = None,
+    ) -> str:
         """## Decode a encrypted message.
 
         #### Args:
@@ -155,11 +242,12 @@ class MessageManager:
             text (bytes): The encrypted text.
             iv (bytes): The iv of the text.
             key (bytes, optional): The conversation key. Defaults to None.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
 
         #### Returns:
             str: The decrypted key.
         """
-        target_type = self.client.tools.get_type(target)
+        target_type = self.client.tools.get_type(target, target_type)
 
         if text == "":
             return text
@@ -172,13 +260,46 @@ class MessageManager:
                         target, target_type, key=key
                     )
 
-                    text = CryptoUtils.decrypt_aes(
+                    text = self.client.crypto.decrypt_aes(
                         bytes.fromhex(text), conversation_key, bytes.fromhex(iv)
                     )
                     return text.decode("utf-8")
             except Exception:
                 return text
 
+    def decode_many(self, payloads: list) -> list:
+        """## Decrypts the texts and locations of many raw message payloads.
+
+        #### Args:
+            payloads (list): Message payloads (e.g. from message/content or events).
+
+        #### Returns:
+            list: Copies of the payloads with plain texts / locations, marked as not encrypted.
+            The replaced values are kept under "ciphertext".
+
+        #### Info:
+            :Each chats key is resolved once, the chat type is read from the payload
+            instead of probing the api. Payloads that can not be decrypted are kept
+            as they are. Message(client, payload) builds a decoded payload without
+            any key lookup, but reports it as not encrypted.
+        """
+        keys = {}
+
+        if self.client._private_key is not None:
+            chats = {_chat(payload) for payload in payloads if _needs_key(payload)}
+
+            for target_type, target in chats:
+                try:
+                    keys[target_type, target] = self.client.get_conversation_key(
+                        target, target_type
+                    )
+                except Exception:
+                    continue
+
+        items, slots = _ciphertexts(payloads, keys)
+        plaintexts = self.client.crypto.decrypt_aes_many(items)
+        return _decoded(payloads, slots, plaintexts)
+
     def like(self, message_id: str | int) -> dict:
         """## Likes a message.
 
@@ -212,14 +333,15 @@ class MessageManager:
         """
         return self.client._post("message/delete", data={"message_id": message_id})
 
-    def infos(self, message_ids: str | int | list) -> dict:
+    def infos(self, message_ids: str | int | list, *, raw: bool = False) -> list:
         """## Gets the infos of messages.
 
         #### Args:
             message_ids (str | int | list): The message ids.
+            raw (bool, optional): Returns the payloads (dict, still encrypted) without building objects. Defaults to False.
 
         #### Returns:
-            dict: The message infos
+            list: Message objects.
         """
         if isinstance(message_ids, str | int):
             ids = [message_ids]
@@ -228,10 +350,20 @@ class MessageManager:
         messages = self.client._post(
             "message/infos", data={"message_ids": json.dumps(ids)}
         )
-        return [Message(self.client, message) for message in messages["messages"]]
+        if raw:
+            return messages["messages"]
+
+        return self.client.resolver.authors(
+            [Message(self.client, message) for message in messages["messages"]]
+        )
 
     def get_messages(
-        self, type_id: str | int, limit: int = 30, offset: int = 0
+        self,
+        type_id: str | int,
+        limit: int = 30,
+        offset: int = 0,
+        target_type: str = None,
+        raw: bool = False,
     ) -> Generator[Message, None, None]:
         """## Gets the messages of a channel or conversation.
 
@@ -239,11 +371,13 @@ class MessageManager:
             type_id (str | int): The types id
             limit (int, optional): The responses limit. Defaults to 30.
             offset (int, optional): The responses offset. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+            raw (bool, optional): Yields the payloads (dict, still encrypted, see decode_many) without building objects. Defaults to False.
 
         #### Yields:
             Generator[Message, None, None]: Message objects.
         """
-        target_type = self.client.tools.get_type(type_id)
+        target_type = self.client.tools.get_type(type_id, target_type)
 
         data = {
             f"{target_type}_id": type_id,
@@ -255,14 +389,119 @@ class MessageManager:
         response = self.client._post("message/content", data=data)
         response = response["messages"]
 
-        for message in response:
-            if message["kind"] != "message":
-                continue
+        if raw:
+            yield from (message for message in response if message["kind"] == "message")
+            return
+
+        yield from self.client.resolver.authors(
+            [
+                Message(self.client, message)
+                for message in response
+                if message["kind"] == "message"
+            ]
+        )
+
+    def history_pages(
+        self,
+        target: str | int,
+        *,
+        page_size: int = 100,
+        read_ahead: int = 2,
+        offset: int = 0,
+        target_type: str = None,
+    ) -> PageReader:
+        """## Gets the raw message/content pages of a chat, newest page first.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            page_size (int, optional): The messages per request. Defaults to 100.
+            read_ahead (int, optional): Pages fetched in the background ahead of the caller. Defaults to 2.
+            offset (int, optional): The offset of the first page. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            PageReader: Iterate it for the lists of raw payloads, close() stops the reads.
+        """
+        target_type = self.client.tools.get_type(target, target_type)
+
+        def fetch(offset, limit):
+            data = {
+                f"{target_type}_id": target,
+                "source": target_type,
+                "limit": limit,
+                "offset": offset,
+            }
+            return self.client._post("message/content", data=data)["messages"]
+
+        return PageReader(fetch, page_size, read_ahead, offset)
 
-            yield Message(self.client, message)
+    def history(
+        self,
+        target: str | int,
+        *,
+        after=None,
+        before=None,
+        after_id: int = None,
+        before_id: int = None,
+        limit: int = None,
+        page_size: int = 100,
+        read_ahead: int = 2,
+        target_type: str = None,
+    ) -> Generator[Message, None, None]:
+        """## Iterates the history of a chat, newest message first.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            after (int | float | datetime, optional): Stops at messages sent at or before this time.
+            before (int | float | datetime, optional): Skips messages sent at or after this time.
+            after_id (int, optional): Stops at this message id.
+            before_id (int, optional): Skips messages with this or a greater id.
+            limit (int, optional): The maximum number of messages. Defaults to None.
+            page_size (int, optional): The messages per request. Defaults to 100.
+            read_ahead (int, optional): Pages fetched in the background ahead of the caller. Defaults to 2.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Yields:
+            Generator[Message, None, None]: Message objects.
+
+        #### Info:
+            :Pages are fetched while the previous one is processed, at most
+            read_ahead pages are held in memory. Each page is decrypted as a
+            batch with one key lookup per chat, no more pages are requested once
+            the bounds or the limit are reached (or the loop is left).
+        """
+        window = HistoryWindow(
+            after=after,
+            before=before,
+            after_id=after_id,
+            before_id=before_id,
+            limit=limit,
+        )
+        if window.done:
+            return
+
+        with self.history_pages(
+            target,
+            page_size=page_size,
+            read_ahead=read_ahead,
+            target_type=target_type,
+        ) as pages:
+            for page in pages:
+                selected = window.select(page)
+
+                yield from self.client.resolver.authors(
+                    _decoded_messages(self.client, selected, self.decode_many(selected))
+                )
+
+                if window.done:
+                    return
 
     def get_flagged(
-        self, type_id: str | int, limit: int = 100, offset: int = 0
+        self,
+        type_id: str | int,
+        limit: int = 100,
+        offset: int = 0,
+        target_type: str = None,
     ) -> Generator[Message, None, None]:
         """## Gets the flagged messages of a channel.
 
@@ -270,11 +509,12 @@ class MessageManager:
             type_id (str | int): The types id.
             limit (int, optional): The responses limit. Defaults to 100.
             offset (int, optional): The responses offset. Defaults to 0.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
 
         #### Yields:
             Generator[Message, None, None]: Message objects.
         """
-        target_type = self.client.tools.get_type(type_id)
+        target_type = self.client.tools.get_type(type_id, target_type)
 
         data = {
             "type": target_type,
@@ -286,11 +526,13 @@ class MessageManager:
         response = self.client._post("message/list_flagged_messages", data=data)
         response = response["messages"]
 
-        for message in response:
-            if message["kind"] != "message":
-                continue
-
-            yield Message(self.client, message)
+        yield from self.client.resolver.authors(
+            [
+                Message(self.client, message)
+                for message in response
+                if message["kind"] == "message"
+            ]
+        )
 
     def flag(self, message_id: str | int) -> dict:
         """## Flags a message.
@@ -0,0 +1,384 @@
+import json
+import threading
+import time
+
+from contextlib import contextmanager
+
+from .scheduler import endpoint_name
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help)
+METRICS = {
+    "stashconnect_requests_total": ("counter", "Api requests sent."),
+    "stashconnect_request_errors_total": ("counter", "Failed api requests."),
+    "stashconnect_request_duration_seconds": ("histogram", "Api request latency."),
+    "stashconnect_request_sent_bytes_total": ("counter", "Request body bytes sent."),
+    "stashconnect_response_received_bytes_total": (
+        "counter",
+        "Response body bytes received.",
+    ),
+    "stashconnect_file_transfers_total": ("counter", "File uploads and downloads."),
+    "stashconnect_file_transfer_bytes_total": ("counter", "File bytes transferred."),
+    "stashconnect_file_transfer_duration_seconds": (
+        "histogram",
+        "File upload and download duration.",
+    ),
+    "stashconnect_events_total": ("counter", "Socket.io events dispatched."),
+    "stashconnect_event_errors_total": ("counter", "Socket.io handlers that raised."),
+    "stashconnect_event_duration_seconds": (
+        "histogram",
+        "Socket.io handler duration.",
+    ),
+    "stashconnect_crypto_operations_total": ("counter", "Crypto operations."),
+    "stashconnect_crypto_bytes_total": (
+        "counter",
+        "Bytes passed to crypto operations.",
+    ),
+    "stashconnect_crypto_duration_seconds": (
+        "histogram",
+        "Crypto operation duration.",
+    ),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """## A cumulative latency histogram.
+
+    #### Args:
+        buckets (tuple): The upper bounds of the buckets in seconds.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list:
+        """## Returns (upper bound, cumulative count) pairs."""
+        total = 0
+        pairs = []
+
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+
+        return pairs
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "buckets": {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+class MetricsRegistry:
+    """## Collects request, file transfer, socket event and crypto metrics.
+
+    #### Args:
+        buckets (tuple, optional): Histogram bucket bounds in seconds. Defaults to DEFAULT_BUCKETS.
+
+    #### Usage:
+        client = stashconnect.Client(..., metrics=True)
+        client.metrics.snapshot()
+        client.metrics.to_prometheus()
+        client.metrics.serve(port=9464)
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """## Increments a counter.
+
+        #### Args:
+            name (str): The metrics name.
+            value (float, optional): The increment. Defaults to 1.
+            **labels: The metrics labels.
+        """
+        key = tuple(sorted(labels.items()))
+
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """## Adds a value to a histogram.
+
+        #### Args:
+            name (str): The metrics name.
+            value (float): The observed value.
+            **labels: The metrics labels.
+        """
+        key = tuple(sorted(labels.items()))
+
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+
+            histogram.observe(value)
+
+    def observe_request(
+        self,
+        url: str,
+        seconds: float,
+        *,
+        bytes_out: int = 0,
+        bytes_in: int = 0,
+        error: Exception = None,
+    ) -> None:
+        """## Records one api request attempt.
+
+        #### Args:
+            url (str): The requested url.
+            seconds (float): The requests latency.
+            bytes_out (int, optional): The request body size. Defaults to 0.
+            bytes_in (int, optional): The response body size. Defaults to 0.
+            error (Exception, optional): The raised error. Defaults to None.
+        """
+        endpoint = endpoint_name(url)
+
+        self.increment("stashconnect_requests_total", endpoint=endpoint)
+        self.observe(
+            "stashconnect_request_duration_seconds", seconds, endpoint=endpoint
+        )
+
+        if bytes_out:
+            self.increment(
+                "stashconnect_request_sent_bytes_total", bytes_out, endpoint=endpoint
+            )
+        if bytes_in:
+            self.increment(
+                "stashconnect_response_received_bytes_total",
+                bytes_in,
+                endpoint=endpoint,
+            )
+
+        if error is not None:
+            self.increment(
+                "stashconnect_request_errors_total",
+                endpoint=endpoint,
+                error=type(error).__name__,
+            )
+
+    def observe_transfer(self, direction: str, nbytes: int, seconds: float) -> None:
+        """## Records a file upload or download.
+
+        #### Args:
+            direction (str): "upload" or "download".
+            nbytes (int): The transferred bytes.
+            seconds (float): The transfers duration.
+        """
+        self.increment("stashconnect_file_transfers_total", direction=direction)
+        self.increment(
+            "stashconnect_file_transfer_bytes_total", nbytes, direction=direction
+        )
+        self.observe(
+            "stashconnect_file_transfer_duration_seconds", seconds, direction=direction
+        )
+
+    def observe_event(self, event: str, seconds: float, error=None) -> None:
+        """## Records a dispatched socket.io event.
+
+        #### Args:
+            event (str): The events name.
+            seconds (float): The handlers duration.
+            error (Exception, optional): The raised error. Defaults to None.
+        """
+        self.increment("stashconnect_events_total", event=event)
+        self.observe("stashconnect_event_duration_seconds", seconds, event=event)
+
+        if error is not None:
+            self.increment(
+                "stashconnect_event_errors_total",
+                event=event,
+                error=type(error).__name__,
+            )
+
+    def observe_crypto(self, operation: str, seconds: float, nbytes: int = 0) -> None:
+        """## Records a crypto operation.
+
+        #### Args:
+            operation (str): The operations name.
+            seconds (float): The operations duration.
+            nbytes (int, optional): The processed bytes. Defaults to 0.
+        """
+        self.increment("stashconnect_crypto_operations_total", operation=operation)
+        self.observe(
+            "stashconnect_crypto_duration_seconds", seconds, operation=operation
+        )
+
+        if nbytes:
+            self.increment(
+                "stashconnect_crypto_bytes_total", nbytes, operation=operation
+            )
+
+    @contextmanager
+    def time_event(self, event: str):
+        """## Times a block as a socket.io event handler.
+
+        #### Args:
+            event (str): The events name.
+        """
+        start = time.perf_counter()
+        error = None
+
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.observe_event(event, time.perf_counter() - start, error)
+
+    def reset(self) -> None:
+        """## Removes all recorded values."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """## Returns all metrics as a dict.
+
+        #### Returns:
+            dict: {metric: {"label=value,...": value}}, histograms as dicts.
+        """
+
+        def label_key(labels):
+            return ",".join(f"{key}={value}" for key, value in labels)
+
+        with self._lock:
+            snapshot = {
+                name: {label_key(labels): value for labels, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            for name, series in self._histograms.items():
+                snapshot[name] = {
+                    label_key(labels): histogram.to_dict()
+                    for labels, histogram in series.items()
+                }
+
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """## Returns all metrics in the prometheus text exposition format.
+
+        #### Returns:
+            str: The exposition text.
+        """
+        lines = []
+
+        with self._lock:
+            for name, (metric_type, help_text) in METRICS.items():
+                counters = self._counters.get(name)
+                histograms = self._histograms.get(name)
+
+                if not counters and not histograms:
+                    continue
+
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+                for labels, value in (counters or {}).items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+                for labels, histogram in (histograms or {}).items():
+                    for bound, count in histogram.cumulative():
+                        bucket_labels = _format_labels(labels, f'le="{bound}"')
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+
+                    inf_labels = _format_labels(labels, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{inf_labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(
+                        f"{name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464):
+        """## Serves /metrics (prometheus) and /metrics.json on a background thread.
+
+        #### Args:
+            host (str, optional): The bind address. Defaults to "127.0.0.1".
+            port (int, optional): The port. Defaults to 9464.
+
+        #### Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+
+                if path == "/metrics":
+                    body = registry.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+        thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="stashconnect-metrics",
+            daemon=True,
+        )
+        thread.start()
+
+        return self._server
+
+    def stop_serving(self) -> None:
+        """## Stops the metrics http server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
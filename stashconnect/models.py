@@ -1,89 +1,499 @@
 # All returnable objects are stored here
 
-from .crypto_utils import CryptoUtils
+import weakref
 
 from typing import Generator
 
+# live clients by account, unpickled models attach to the one of their account
+_clients = weakref.WeakValueDictionary()
+
+# the data slots of each model class, see _Model.to_dict()
+_state_slots = {}
+
+
+def _client_key(client) -> str | None:
+    if client is None:
+        return None
+
+    return f"{client.email}|{client._main_url}"
+
+
+def _register_client(client) -> None:
+    _clients[_client_key(client)] = client
+
+
+def _restore(cls, data, client_key):
+    # pickle entry point, detached in processes without a client of the account
+    return cls.from_dict(data, _clients.get(client_key))
+
+
+def _slots(cls) -> tuple:
+    try:
+        return _state_slots[cls]
+    except KeyError:
+        pass
+
+    names = []
+    for base in reversed(cls.__mro__):
+        for name in base.__dict__.get("__slots__", ()):
+            if name not in ("client", "__weakref__") and not name.startswith("_"):
+                names.append(name)
+
+    _state_slots[cls] = tuple(names)
+    return _state_slots[cls]
+
+
+class _Model:
+    # serialization, the client is never part of the data
+    __slots__ = ()
+
+    # attributes holding models (or lists of them) by class name
+    _nested = {}
+
+    # decrypted keys, only written by to_dict(decrypted=True)
+    _secrets = ()
+
+    def to_dict(self, *, decrypted: bool = False) -> dict:
+        """## Returns the objects data without the client.
+
+        #### Args:
+            decrypted (bool, optional): Include decrypted content (message texts and locations, chat keys). Defaults to False.
+
+        #### Returns:
+            dict: JSON serializable data, from_dict() rebuilds the object from it.
+        """
+        data = {}
+        for name in _slots(type(self)):
+            try:
+                value = object.__getattribute__(self, name)
+            except AttributeError:
+                continue
+
+            if name in self._secrets:
+                if not decrypted or value is None:
+                    continue
+                value = value.hex()
+
+            elif name in self._nested and isinstance(value, list):
+                value = [item.to_dict(decrypted=decrypted) for item in value]
+
+            elif name in self._nested and value is not None:
+                value = value.to_dict(decrypted=decrypted)
+
+            data[name] = value
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, client=None):
+        """## Rebuilds an object from to_dict() data without sending requests.
+
+        #### Args:
+            data (dict): The data.
+            client (Client, optional): The client to attach. Defaults to None.
+
+        #### Returns:
+            The object, detached if no client was given.
+        """
+        instance = cls.__new__(cls)
+        instance.client = None
+
+        for name, value in data.items():
+            if name in cls._secrets:
+                value = bytes.fromhex(value)
+
+            elif name in cls._nested and isinstance(value, list):
+                model = globals()[cls._nested[name]]
+                value = [model.from_dict(item) for item in value]
+
+            elif name in cls._nested and value is not None:
+                value = globals()[cls._nested[name]].from_dict(value)
+
+            setattr(instance, name, value)
+
+        for name in cls._secrets:
+            if name not in data:
+                setattr(instance, name, None)
+
+        if client is not None:
+            instance.attach(client)
+
+        return instance
+
+    def attach(self, client):
+        """## Attaches the object and the models it holds to a client.
+
+        #### Args:
+            client (Client): The client, e.g. after unpickling in another process.
+
+        #### Returns:
+            The object.
+        """
+        self.client = client
+
+        for name in self._nested:
+            try:
+                value = object.__getattribute__(self, name)
+            except AttributeError:
+                continue
+
+            for item in value if isinstance(value, list) else (value,):
+                if item is not None:
+                    item.attach(client)
+
+        return self
+
+    def __reduce__(self):
+        # pickles the to_dict() data, never the client or decrypted content
+        return _restore, (type(self), self.to_dict(), _client_key(self.client))
+
+
+class _Shared(type):
+    # Model(client, data) returns the clients shared object for the id (see identity.py)
+    def __call__(cls, client, data):
+        identities = getattr(client, "identities", None)
+        if identities is None:
+            return super().__call__(client, data)
+
+        return identities.resolve(cls, client, data)
+
+
+class _SharedModel(_Model, metaclass=_Shared):
+    # the identity map holds weak references
+    __slots__ = ("client", "id", "__weakref__")
+
+    _id_field = "id"
+
+    # payload keys set_attributes() reads, others fill incomplete payloads
+    _fields = ()
+
+    @classmethod
+    def _complete(cls, data) -> bool:
+        return isinstance(data, dict) and all(field in data for field in cls._fields)
+
+    def _defer(self):
+        # async clients never block here, so only the id is known
+        if not self.client.is_async:
+            self.client.resolver.defer(self)
+
+    def __getattr__(self, name):
+        # only called for missing attributes, i.e. of a stub built from an incomplete payload
+        if not name.startswith("_"):
+            try:
+                client = object.__getattribute__(self, "client")
+            except AttributeError:
+                client = None
+
+            resolver = getattr(client, "resolver", None)
+            if resolver is not None and resolver.wait_for(self):
+                return object.__getattribute__(self, name)
+
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def to_dict(self, *, decrypted: bool = False) -> dict:
+        # a pending stub is filled first, so its data is complete
+        resolver = getattr(self.client, "resolver", None)
+        if resolver is not None:
+            resolver.wait_for(self)
+
+        return super().to_dict(decrypted=decrypted)
+
+
+def _conversation_key(client, target, target_type, key=None):
+    # async clients resolve chat keys before building models, so only their cache is read
+    if client.is_async:
+        return client.conversation_keys.get(target)
+
+    return client.get_conversation_key(target, target_type, key=key)
+
+
+def _decode_text(client, text, iv, conversation_key):
+    if text == "" or conversation_key is None:
+        return text
+
+    try:
+        return client.crypto.decrypt_aes(
+            bytes.fromhex(text), conversation_key, bytes.fromhex(iv)
+        ).decode("utf-8")
+    except Exception:
+        return text
+
+
+class Message(_Model):
+    # only the raw payload is kept, the rest is resolved on first access and memoized
+    __slots__ = (
+        "client",
+        "raw",
+        "id",
+        "type",
+        "type_id",
+        "_conversation_key",
+        "_content",
+        "_location",
+        "_author",
+        "_files",
+    )
 
-class Message:
     def __init__(self, client, data):
         self.client = client
+        self._bind(data)
+
+        self.client.tools.remember(data)
+
+    def _bind(self, data):
+        self.raw = data
         self.id = data["id"]
 
-        if data["channel_id"] == 0:
-            self.type = "conversation"
-            self.type_id = data["conversation_id"]
+        # messages imports this module, so _chat is imported on use
+        from .messages import _chat
+
+        self.type, self.type_id = _chat(data)
+
+    def _memoize(self, decoded):
+        # the fields decode_many decrypted for this messages payload
+        replaced = decoded.get("ciphertext", {})
+
+        if "text" in replaced:
+            self._content = decoded["text"]
+
+        if "location" in replaced:
+            location = decoded["location"]
+            self._location = (location["longitude"], location["latitude"])
+
+    def to_dict(self, *, decrypted: bool = False) -> dict:
+        """## Returns the messages payload without the client.
+
+        #### Args:
+            decrypted (bool, optional): Write the decrypted text and location. Defaults to False.
+
+        #### Info:
+            :By default the payload is written as the server sent it, i.e. encrypted
+            messages stay encrypted (also the ones decoded with decode_many).
+            :Decrypted payloads are marked as not encrypted and keep the ciphertext
+            under "ciphertext", like the ones of decode_many.
+
+        #### Returns:
+            dict: The payload, from_dict() rebuilds the message from it.
+        """
+        payload = dict(self.raw)
+
+        ciphertext = payload.pop("ciphertext", None)
+        if ciphertext is not None:
+            payload.update(ciphertext)
+
+        if not decrypted:
+            return payload
+
+        plain = dict(payload)
+        replaced = {}
+
+        content = self.content
+        if payload["encrypted"] and content != payload["text"]:
+            replaced.update(text=payload["text"], encrypted=True)
+            plain.update(text=content, encrypted=False)
+
+        location = payload["location"]
+        longitude, latitude = self._decrypt_location()
+        if (
+            location is not None
+            and location.get("encrypted")
+            and (longitude, latitude) != (location["longitude"], location["latitude"])
+        ):
+            replaced["location"] = location
+            plain["location"] = dict(
+                location, encrypted=False, longitude=longitude, latitude=latitude
+            )
+
+        if replaced:
+            plain["ciphertext"] = replaced
+
+        return plain
+
+    @classmethod
+    def from_dict(cls, data: dict, client=None) -> "Message":
+        """## Rebuilds a message from a payload without sending requests.
+
+        #### Args:
+            data (dict): The payload, e.g. of to_dict().
+            client (Client, optional): The client to attach. Defaults to None.
+
+        #### Returns:
+            Message: The message, detached if no client was given.
+        """
+        instance = cls.__new__(cls)
+        instance.client = None
+        instance._bind(data)
+
+        if client is not None:
+            instance.attach(client)
+
+        return instance
+
+    def attach(self, client) -> "Message":
+        """## Attaches the message to a client.
+
+        #### Args:
+            client (Client): The client, e.g. after unpickling in another process.
+
+        #### Returns:
+            Message: The message.
+        """
+        self.client = client
+
+        # resolved without a client before, so resolved again with it
+        memoized = ("_conversation_key", "_content", "_location", "_author", "_files")
+        for name in memoized:
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass
+
+        if client is not None:
+            client.tools.remember(self.raw)
+
+        return self
+
+    @property
+    def content_encrypted(self) -> str:
+        return self.raw["text"]
+
+    @property
+    def encrypted(self) -> bool:
+        return self.raw["encrypted"]
+
+    @property
+    def iv(self) -> str | None:
+        return self.raw["iv"] if self.raw["encrypted"] else None
+
+    @property
+    def timestamp(self):
+        return self.raw["time"]
+
+    @property
+    def channel_id(self):
+        return self.raw["channel_id"]
+
+    @property
+    def conversation_id(self):
+        return self.raw["conversation_id"]
+
+    @property
+    def flagged(self):
+        return self.raw["flagged"]
+
+    @property
+    def liked(self):
+        return self.raw["liked"]
+
+    @property
+    def likes(self):
+        return self.raw["likes"]
+
+    @property
+    def links(self):
+        return self.raw["links"]
+
+    @property
+    def conversation_key(self) -> bytes | None:
+        try:
+            return self._conversation_key
+        except AttributeError:
+            pass
+
+        # plain messages never wait for the private key or fetch a chat key
+        location = self.raw["location"]
+        if self.client is None:
+            # detached, see attach()
+            key = None
+        elif self.encrypted or (location is not None and location.get("encrypted")):
+            key = _conversation_key(self.client, self.type_id, self.type)
         else:
-            self.type = "channel"
-            self.type_id = data["channel_id"]
+            key = None
 
-        self.conversation_key = self.client.get_conversation_key(
-            data[f"{self.type}_id"], self.type
-        )
+        self._conversation_key = key
+        return key
 
-        self.content_encrypted = data["text"]
-        self.encrypted = data["encrypted"]
-        self.iv = data["iv"] if self.encrypted else None
+    @property
+    def content(self) -> str:
+        try:
+            return self._content
+        except AttributeError:
+            pass
 
         if self.encrypted:
-            self.content = self.client.messages.decode(
-                data[f"{self.type}_id"], self.content_encrypted, self.iv
+            content = _decode_text(
+                self.client, self.content_encrypted, self.iv, self.conversation_key
             )
         else:
-            self.content = self.content_encrypted
+            content = self.content_encrypted
 
-        self.timestamp = data["time"]
-        self.channel_id = data["channel_id"]
-        self.conversation_id = data["conversation_id"]
+        self._content = content
+        return content
 
-        self.files = [File(self.client, file) for file in data["files"]]
+    @property
+    def author(self) -> "User":
+        try:
+            return self._author
+        except AttributeError:
+            self._author = User(self.client, self.raw["sender"])
+            return self._author
 
-        self.flagged = data["flagged"]
+    @property
+    def files(self) -> list:
+        try:
+            return self._files
+        except AttributeError:
+            self._files = [File(self.client, file) for file in self.raw["files"]]
+            return self._files
 
-        self.liked = data["liked"]
-        self.likes = data["likes"]
-        self.links = data["links"]
+    @property
+    def longitude(self) -> str | None:
+        return self._decrypt_location()[0]
 
-        self._decrypt_location(data["location"])
+    @property
+    def latitude(self) -> str | None:
+        return self._decrypt_location()[1]
 
-        self.author = User(self.client, data["sender"])
+    def _decrypt_location(self) -> tuple:
+        try:
+            return self._location
+        except AttributeError:
+            pass
 
-    def _decrypt_location(self, location):
+        location = self.raw["location"]
 
         if location is None:
-            self.longitude = None
-            self.latitude = None
-            return
+            self._location = (None, None)
+
+        elif (
+            location.get("encrypted") is None
+            or location.get("iv") is None
+            or not location["encrypted"]
+        ):
+            self._location = (location["longitude"], location["latitude"])
+
+        elif self.client is None:
+            self._location = (location["longitude"], location["latitude"])
+
+        elif self.client._private_key is None:
+            print(
+                "Could not decrypt encrypted location as no encryption password was provided"
+            )
+            self._location = (location["longitude"], location["latitude"])
 
-        if location.get("encrypted") is None or location.get("iv") is None:
-            self.longitude = location["longitude"]
-            self.latitude = location["latitude"]
-            return
-        
-        if location["encrypted"]:
-
-            if self.client._private_key is None:
-                print(
-                    "Could not decrypt encrypted location as no encryption password was provided"
-                )
-                self.longitude = location["longitude"]
-                self.latitude = location["latitude"]
-                return
-
-            self.longitude = CryptoUtils.decrypt_aes(
-                bytes.fromhex(location["longitude"]),
-                self.conversation_key,
-                bytes.fromhex(self.iv),
-            ).decode("utf-8")
-
-            self.latitude = CryptoUtils.decrypt_aes(
-                bytes.fromhex(location["latitude"]),
-                self.conversation_key,
-                bytes.fromhex(self.iv),
-            ).decode("utf-8")
         else:
-            self.longitude = location["longitude"]
-            self.latitude = location["latitude"]
+            self._location = tuple(
+                self.client.crypto.decrypt_aes(
+                    bytes.fromhex(location[name]),
+                    self.conversation_key,
+                    bytes.fromhex(self.iv),
+                ).decode("utf-8")
+                for name in ("longitude", "latitude")
+            )
+
+        return self._location
 
     def like(self) -> dict:
         """## Likes a message.
@@ -162,11 +572,40 @@ class Message:
             urls=urls,
             location=location,
             encrypted=encrypted,
+            target_type=self.type,
             **kwargs,
         )
 
 
-class User:
+class User(_SharedModel):
+    __slots__ = (
+        "first_name",
+        "last_name",
+        "email",
+        "status",
+        "image",
+        "language",
+        "last_login",
+        "online",
+        "permissions",
+        "public_key",
+        "companies",
+    )
+
+    _fields = (
+        "first_name",
+        "last_name",
+        "email",
+        "status",
+        "image",
+        "language",
+        "last_login",
+        "online",
+        "permissions",
+        "public_key",
+        "roles",
+    )
+
     def __init__(self, client, data) -> None:
         self.client = client
         self.id = data["id"]
@@ -174,19 +613,9 @@ class User:
         try:
             self.set_attributes(data)
 
-        except KeyError:
-            try:
-                user_data = self.client.users._info(self.id)
-                self.set_attributes(user_data)
-            except Exception as e:
-                print("could not fetch a users information - most likely due to missing permissions: ", e)
-
-        except TypeError:
-            try:
-                user_data = self.client.users._info(self.id)
-                self.set_attributes(user_data)
-            except Exception as e:
-                print("could not fetch a users information - most likely due to missing permissions: ", e)
+        # incomplete payloads are filled in bulk later, see resolver.py
+        except (KeyError, TypeError):
+            self._defer()
 
     def set_attributes(self, data):
         self.first_name = data["first_name"]
@@ -205,7 +634,32 @@ class User:
         self.companies = data["roles"]
 
 
-class Conversation:
+class Conversation(_Model):
+    __slots__ = (
+        "client",
+        "id",
+        "type",
+        "type_id",
+        "conversation_id",
+        "channel_id",
+        "key_sender",
+        "conversation_key",
+        "encrypted",
+        "favorited",
+        "archived",
+        "last_action",
+        "last_activity",
+        "muted",
+        "name",
+        "unread_messages",
+        "user_count",
+        "members",
+        "callable",
+    )
+
+    _nested = {"members": "User", "callable": "User"}
+    _secrets = ("conversation_key",)
+
     def __init__(self, client, data):
         self.client = client
         self.id = data["id"]
@@ -213,12 +667,14 @@ class Conversation:
         self.type = "conversation"
         self.type_id = data["id"]
 
+        self.client.tools.types.set(self.type_id, self.type)
+
         self.conversation_id = data["id"]
         self.channel_id = data["id"]
 
         self.key_sender = data["key_sender"]
-        self.conversation_key = self.client.get_conversation_key(
-            data["id"], self.type, key=data["key"]
+        self.conversation_key = _conversation_key(
+            self.client, data["id"], self.type, key=data["key"]
         )
 
         self.encrypted = data["encrypted"]
@@ -237,6 +693,47 @@ class Conversation:
         self.members = [User(self.client, member) for member in data["members"]]
         self.callable = [User(self.client, member) for member in data["callable"]]
 
+    def attach(self, client) -> "Conversation":
+        """## Attaches the conversation and its members to a client.
+
+        #### Args:
+            client (Client): The client, e.g. after unpickling in another process.
+
+        #### Returns:
+            Conversation: The conversation.
+        """
+        super().attach(client)
+        if client is None:
+            return self
+
+        client.tools.types.set(self.type_id, self.type)
+
+        # the chat key is not part of to_dict() by default, it is resolved on first access
+        if self.conversation_key is None:
+            del self.conversation_key
+
+        return self
+
+    def __getattr__(self, name):
+        # only called for an unset conversation_key, see attach()
+        if name != "conversation_key":
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+        client = object.__getattribute__(self, "client")
+        key = None if client is None else _conversation_key(client, self.id, self.type)
+
+        self.conversation_key = key
+        return key
+
+    def to_dict(self, *, decrypted: bool = False) -> dict:
+        if decrypted:
+            # resolves a key left unset by attach()
+            self.conversation_key
+
+        return super().to_dict(decrypted=decrypted)
+
     def archive(self) -> dict:
         """## Archives a conversation.
 
@@ -281,15 +778,48 @@ class Conversation:
         return self.client.conversations.enable_notifications(self.id)
 
 
-class Company:
+class Company(_SharedModel):
+    __slots__ = (
+        "name",
+        "manager",
+        "time_created",
+        "time_joined",
+        "unread_messages",
+        "logo_url",
+        "domain",
+        "max_users",
+        "active_users",
+        "created_users",
+        "membership_expiry",
+        "online_payment",
+        "protected",
+        "provider",
+        "quota",
+        "freemium",
+        "deactivated",
+        "deleted",
+        "features",
+        "permission",
+        "roles",
+        "settings",
+    )
+
+    _id_field = "company_id"
+
+    _nested = {"manager": "User"}
+
     def __init__(self, client, data):
         self.client = client
 
+        # channels only reference their company, its details are filled later
         if "company_id" in data:
-            data = self.client._post(
-                "company/details", data={"company_id": data["company_id"]}
-            )["company"]
+            self.id = data["company_id"]
+            self._defer()
+            return
+
+        self.set_attributes(data)
 
+    def set_attributes(self, data):
         self.id = data["id"]
 
         self.name = data["name"]
@@ -379,7 +909,47 @@ class Company:
         return self.client.companies.get_market(self.id)
 
 
-class Channel:
+class Channel(_SharedModel):
+    __slots__ = (
+        "company",
+        "crypto_properties",
+        "encrypted",
+        "federated",
+        "unique_identifier",
+        "description",
+        "name",
+        "image",
+        "group_id",
+        "can_leave",
+        "inviteable",
+        "last_action",
+        "ldap_name",
+        "mx_room_alias",
+        "mx_room_id",
+        "mx_room_server_status",
+        "num_members_without_keys",
+        "password",
+        "pending_count",
+        "request_count",
+        "show_activities",
+        "show_membership_activities",
+        "type",
+        "user_count",
+        "visible",
+        "writable",
+        "is_member",
+        "joined",
+        "may_manage",
+        "muted",
+        "write",
+        "confirmation",
+        "invited_at",
+        "invited_by",
+        "invited_by_mx_user_id",
+    )
+
+    _nested = {"company": "Company"}
+
     def __init__(self, client, data):
         self.client = client
         self.id = data["id"]
@@ -387,15 +957,13 @@ class Channel:
         try:
             self.set_attributes(data)
 
-        except KeyError:
-            data = self.client.channels._info(self.id)
-            self.set_attributes(data)
-
-        except TypeError:
-            data = self.client.channels._info(self.id)
-            self.set_attributes(data)
+        # incomplete payloads are filled in bulk later, see resolver.py
+        except (KeyError, TypeError):
+            self._defer()
 
     def set_attributes(self, data):
+        self.client.tools.types.set(self.id, "channel")
+
         self.company = Company(self.client, {"company_id": data["company"]})
 
         self.crypto_properties = data["crypto_properties"]
@@ -658,7 +1226,36 @@ class Channel:
         return self.client.channels.enable_notifications(self.id)
 
 
-class File:
+class File(_SharedModel):
+    __slots__ = (
+        "name",
+        "virtual_folder",
+        "folder_type",
+        "type_id",
+        "size",
+        "size_byte",
+        "size_string",
+        "width",
+        "height",
+        "extension",
+        "mimetype",
+        "base_64",
+        "uploaded",
+        "modified",
+        "permission",
+        "owner_id",
+        "owner",
+        "last_download",
+        "times_downloaded",
+        "status",
+        "deleted",
+        "encrypted",
+        "iv",
+        "md5",
+    )
+
+    _nested = {"owner": "User"}
+
     def __init__(self, client, data):
         self.client = client
         self.id = data["id"]
@@ -666,15 +1263,9 @@ class File:
         try:
             self.set_attributes(data)
 
-        # happens when key is missing
-        except KeyError:
-            data = self.client.files._info(self.id)
-            self.set_attributes(data)
-
-        # happens when no owner is found
-        except TypeError:
-            data = self.client.files._info(self.id)
-            self.set_attributes(data)
+        # a missing key or owner, filled in bulk later (file/infos), see resolver.py
+        except (KeyError, TypeError):
+            self._defer()
 
     def set_attributes(self, data):
         self.name = data["name"]
@@ -0,0 +1,236 @@
+"""Filling models that were built from incomplete payloads.
+
+A User, Channel, Company or File whose payload lacks fields (e.g. a sender
+without last_login or a file without its owner) used to fetch its info in
+__init__, one blocking request per object. They are now built as stubs and
+filled together: at the end of a resolver.collect() block (the managers wrap
+the parsing of a response in one) or, if accessed earlier, on the first access
+of a missing attribute, which fills all pending stubs at once.
+"""
+
+import json
+import threading
+import weakref
+
+from contextlib import contextmanager
+
+
+class Resolver:
+    """## Fills incomplete models with bulk or concurrent requests.
+
+    #### Args:
+        client (Client): The client to send the requests with.
+        max_concurrency (int, optional): Parallel requests for types without a bulk endpoint. Defaults to 8.
+        chunk_size (int, optional): The ids per bulk request (file/infos). Defaults to 100.
+
+    #### Info:
+        :Files are filled with file/infos, users, channels and companies with
+        concurrent users/info, channels/info and company/details requests.
+        Each id is requested once per batch.
+    """
+
+    def __init__(self, client, max_concurrency: int = 8, chunk_size: int = 100):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+
+        self.requests = 0
+
+        self._pending = weakref.WeakValueDictionary()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._scopes = threading.local()
+
+    @property
+    def collecting(self) -> bool:
+        """## If a collect() block is active on this thread."""
+        return bool(getattr(self._scopes, "stack", None))
+
+    @contextmanager
+    def collect(self):
+        """## Fills the stubs built inside the block together when it ends.
+
+        #### Usage:
+            with client.resolver.collect():
+                users = [User(client, payload) for payload in payloads]
+
+        #### Info:
+            :The stubs are pending as well, accessing one inside the block fills
+            all pending stubs. If the block raises, the rest stay pending and
+            are filled on first access.
+        """
+        stack = self._scopes.__dict__.setdefault("stack", [])
+        collected = []
+
+        stack.append(collected)
+        try:
+            yield collected
+        finally:
+            # if the block raised, the stubs stay pending for their first access
+            stack.pop()
+
+        self.resolve(collected)
+
+    def defer(self, instance) -> None:
+        """## Registers a stub to be filled later.
+
+        #### Args:
+            instance (User | Channel | Company | File): The incomplete object.
+        """
+        stack = getattr(self._scopes, "stack", None)
+        if stack:
+            stack[-1].append(instance)
+
+        with self._lock:
+            self._pending[id(instance)] = instance
+
+    def wait_for(self, instance) -> bool:
+        """## Fills a stub (and all other pending ones) or waits for the batch filling it.
+
+        #### Args:
+            instance (User | Channel | Company | File): The object.
+
+        #### Returns:
+            bool: False if the object is no stub.
+        """
+        with self._lock:
+            event = self._inflight.get(id(instance))
+            pending = self._pending.get(id(instance)) is instance
+
+        if event is not None:
+            event.wait()
+            return True
+
+        if pending:
+            self.resolve()
+            return True
+
+        return False
+
+    def resolve(self, instances: list = None) -> None:
+        """## Fills stubs now.
+
+        #### Args:
+            instances (list, optional): The stubs. Defaults to all pending stubs.
+
+        #### Info:
+            :Stubs that are no longer pending (already filled) are skipped.
+        """
+        with self._lock:
+            if instances is None:
+                instances = list(self._pending.values())
+                self._pending.clear()
+            else:
+                instances = [
+                    instance
+                    for instance in instances
+                    if self._pending.pop(id(instance), None) is instance
+                ]
+
+            unique = {}
+            for instance in instances:
+                if id(instance) not in self._inflight:
+                    unique[id(instance)] = instance
+
+            event = threading.Event()
+            for key in unique:
+                self._inflight[key] = event
+
+        try:
+            if unique:
+                self._fill(list(unique.values()))
+        finally:
+            with self._lock:
+                for key in unique:
+                    self._inflight.pop(key, None)
+            event.set()
+
+    def authors(self, messages: list) -> list:
+        """## Builds the authors of messages with incomplete senders as one batch.
+
+        #### Args:
+            messages (list): Message objects (e.g. of one page).
+
+        #### Returns:
+            list: The messages.
+        """
+        from .models import User
+
+        with self.collect():
+            for message in messages:
+                if not User._complete(message.raw["sender"]):
+                    message.author
+
+        return messages
+
+    def _fill(self, instances: list) -> None:
+        groups = {}
+        for instance in instances:
+            ids = groups.setdefault(type(instance).__name__, {})
+            ids.setdefault(str(instance.id), []).append(instance)
+
+        for name, ids in groups.items():
+            if name == "File":
+                payloads = self._fetch_files(list(ids))
+            else:
+                payloads = self._fetch_each(name, list(ids))
+
+            for object_id, objects in ids.items():
+                payload = payloads.get(object_id)
+
+                for instance in objects:
+                    try:
+                        if isinstance(payload, Exception):
+                            raise payload
+                        instance.set_attributes(payload)
+                    except Exception as e:
+                        print(
+                            f"could not fetch the information of {name} {object_id} - "
+                            f"most likely due to missing permissions: {e!r}"
+                        )
+
+    def _fetch_files(self, ids: list) -> dict:
+        payloads = {}
+
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = ids[start : start + self.chunk_size]
+            self.requests += 1
+
+            try:
+                response = self.client._post(
+                    "file/infos", data={"file_ids": json.dumps(chunk)}
+                )
+            except Exception as e:
+                payloads.update((object_id, e) for object_id in chunk)
+                continue
+
+            for file in response["files"]:
+                payloads[str(file["id"])] = file
+
+        return payloads
+
+    def _fetch_each(self, name: str, ids: list) -> dict:
+        if name == "User":
+            fetch = self.client.users._info
+        elif name == "Channel":
+            fetch = self.client.channels._info
+        else:
+
+            def fetch(company_id):
+                return self.client._post(
+                    "company/details", data={"company_id": company_id}
+                )["company"]
+
+        self.requests += len(ids)
+
+        if len(ids) == 1:
+            try:
+                return {ids[0]: fetch(ids[0])}
+            except Exception as e:
+                return {ids[0]: e}
+
+        with self.client.batch(self.max_concurrency) as batch:
+            batch.map(fetch, ids)
+            results = batch.results(return_exceptions=True)
+
+        return dict(zip(ids, results))
@@ -0,0 +1,332 @@
+import random
+import threading
+import time
+
+from .exceptions import (
+    ConnectError,
+    NetworkError,
+    RateLimitError,
+    RetryableError,
+    ServerError,
+)
+
+# endpoints that only read, sending them twice has no side effects
+READ_ENDPOINTS = frozenset(
+    {
+        "account/list_active_devices",
+        "account/settings",
+        "channels/info",
+        "channels/members",
+        "channels/recommendations",
+        "channels/subscripted",
+        "channels/visible",
+        "company/details",
+        "company/member",
+        "company/settings",
+        "connections/servers",
+        "file/download",
+        "file/info",
+        "file/infos",
+        "file/quota",
+        "file/shares",
+        "folder/get",
+        "location/get",
+        "manage/accounts",
+        "manage/get_company_market",
+        "message/content",
+        "message/conversation",
+        "message/conversations",
+        "message/infos",
+        "message/list_flagged_messages",
+        "notifications/count",
+        "notifications/get",
+        "security/get_private_key",
+        "server/get_email_templates",
+        "server/list_company_features",
+        "users/info",
+        "users/me",
+    }
+)
+
+
+def endpoint_name(url: str) -> str:
+    """## Normalizes a request url to its endpoint ("/file/download?id=1" -> "file/download").
+
+    #### Args:
+        url (str): The url passed to _post.
+
+    #### Returns:
+        str: The endpoint name.
+    """
+    return url.split("?", 1)[0].strip("/")
+
+
+class TokenBucket:
+    """## A thread safe token bucket.
+
+    #### Args:
+        rate (float): Tokens added per second.
+        capacity (float, optional): Maximum burst size. Defaults to the rate (min 1).
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = max(1.0, rate) if capacity is None else capacity
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """## Takes a token and returns how long the caller has to wait for it.
+
+        #### Returns:
+            float: The delay in seconds (0 if a token was available).
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            if self.rate:
+                elapsed = now - self._updated
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            delay = max(0.0, self._blocked_until - now)
+
+            if self.rate:
+                # tokens may go negative, later callers queue up behind earlier ones
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.rate)
+
+            return delay
+
+    def block(self, seconds: float) -> None:
+        """## Stops handing out tokens for a while (used after a 429).
+
+        #### Args:
+            seconds (float): The pause in seconds.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    """## Throttles and retries api requests.
+
+    #### Args:
+        max_retries (int, optional): Retries after the first attempt. Defaults to 3.
+        backoff_base (float, optional): First backoff delay in seconds. Defaults to 0.5.
+        backoff_max (float, optional): Upper bound of a backoff delay. Defaults to 30.
+        rate (float, optional): Default requests per second per endpoint. Defaults to None (unlimited).
+        burst (float, optional): Default burst size per endpoint. Defaults to the rate.
+        endpoint_limits (dict, optional): {"message/send": (rate, burst)} overrides. Defaults to None.
+        retry_server_errors (bool, optional): Retry 5xx responses. Defaults to True.
+        idempotent_endpoints (set, optional): Endpoints that are safe to resend. Defaults to READ_ENDPOINTS.
+
+    #### Info:
+        :Endpoints without a rate still get a bucket so a 429 pauses
+        every request to that endpoint for the Retry-After duration.
+        :429s and connections that could not be opened are retried on every
+        endpoint. 5xx responses and timeouts are only retried on idempotent
+        endpoints, as the server may have handled a write (message/send,
+        file/upload, ...) before failing. _post(..., idempotent=True) opts a
+        single call in.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        rate: float = None,
+        burst: float = None,
+        endpoint_limits: dict = None,
+        retry_server_errors: bool = True,
+        idempotent_endpoints: set = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.retry_server_errors = retry_server_errors
+        self.idempotent_endpoints = (
+            READ_ENDPOINTS
+            if idempotent_endpoints is None
+            else frozenset(idempotent_endpoints)
+        )
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "network_errors": 0,
+            "unsafe_retries_skipped": 0,
+            "throttle_waits": 0,
+            "throttle_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        """## Returns the token bucket of an endpoint.
+
+        #### Args:
+            endpoint (str): The endpoint name.
+
+        #### Returns:
+            TokenBucket: The endpoints bucket.
+        """
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+
+            if bucket is None:
+                rate, burst = self.endpoint_limits.get(
+                    endpoint, (self.rate, self.burst)
+                )
+                bucket = TokenBucket(rate or 0, burst if rate else 1)
+                self._buckets[endpoint] = bucket
+
+            return bucket
+
+    def _count(self, name: str, value=1) -> None:
+        with self._lock:
+            self.stats[name] += value
+
+    def throttle_delay(self, endpoint: str) -> float:
+        """## Reserves a request slot and returns the time to wait for it.
+
+        #### Args:
+            endpoint (str): The endpoint name.
+
+        #### Returns:
+            float: The delay in seconds.
+        """
+        delay = self.bucket(endpoint).reserve()
+
+        self._count("requests")
+        if delay > 0:
+            self._count("throttle_waits")
+            self._count("throttle_wait_seconds", delay)
+
+        return delay
+
+    def retry_delay(
+        self, endpoint: str, attempt: int, error: Exception, idempotent: bool = None
+    ) -> float | None:
+        """## Decides if a failed request is retried and how long to wait.
+
+        #### Args:
+            endpoint (str): The endpoint name.
+            attempt (int): The number of the failed attempt (starting at 0).
+            error (Exception): The raised error.
+            idempotent (bool, optional): If resending is safe. Defaults to the endpoints default.
+
+        #### Returns:
+            float | None: The delay in seconds or None if the error is final.
+        """
+        if not isinstance(error, RetryableError):
+            return None
+
+        if isinstance(error, RateLimitError):
+            self._count("rate_limited")
+        elif isinstance(error, ServerError):
+            self._count("server_errors")
+            if not self.retry_server_errors:
+                return None
+        elif isinstance(error, NetworkError):
+            self._count("network_errors")
+
+        if idempotent is None:
+            idempotent = endpoint in self.idempotent_endpoints
+
+        # a 429 or a connection that never opened means the request was not handled
+        if not idempotent and not isinstance(error, (RateLimitError, ConnectError)):
+            self._count("unsafe_retries_skipped")
+            return None
+
+        if attempt >= self.max_retries:
+            return None
+
+        # exponential backoff with full jitter
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * (2**attempt))
+        )
+
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+
+            if isinstance(error, RateLimitError):
+                # the limit applies to everyone sending to this endpoint
+                self.bucket(endpoint).block(error.retry_after)
+
+        self._count("retries")
+        self._count("backoff_seconds", delay)
+        return delay
+
+    def call(self, url: str, send, idempotent: bool = None):
+        """## Sends a request with throttling and retries.
+
+        #### Args:
+            url (str): The requested url.
+            send (callable): Sends the request once and returns its result.
+            idempotent (bool, optional): If resending is safe. Defaults to the endpoints default.
+
+        #### Returns:
+            The result of send.
+        """
+        endpoint = endpoint_name(url)
+        attempt = 0
+
+        while True:
+            delay = self.throttle_delay(endpoint)
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                return send()
+            except Exception as e:
+                delay = self.retry_delay(endpoint, attempt, e, idempotent)
+                if delay is None:
+                    raise
+
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, url: str, send, idempotent: bool = None):
+        """## Sends a request with throttling and retries (asyncio).
+
+        #### Args:
+            url (str): The requested url.
+            send (callable): Returns a coroutine sending the request once.
+            idempotent (bool, optional): If resending is safe. Defaults to the endpoints default.
+
+        #### Returns:
+            The result of send.
+        """
+        import asyncio
+
+        endpoint = endpoint_name(url)
+        attempt = 0
+
+        while True:
+            delay = self.throttle_delay(endpoint)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                return await send()
+            except Exception as e:
+                delay = self.retry_delay(endpoint, attempt, e, idempotent)
+                if delay is None:
+                    raise
+
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def write_private_file(path: str, content: str) -> None:
+    """## Atomically writes a file readable only by its owner.
+
+    #### Args:
+        path (str): The files path.
+        content (str): The text to write.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # mkstemp creates the file with 0600, the rename makes the write atomic
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".stashconnect-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class SessionStore:
+    """## Persists a logged in session to a local file readable only by its owner.
+
+    #### Args:
+        path (str): The session files path.
+        store_private_key (bool, optional): Also stores the unlocked private key. Defaults to False.
+
+    #### Info:
+        :The file holds the client_key, so it grants account access until
+        the session is revoked. It is created with 0600 permissions.
+        :The encrypted private key is always stored, which skips its request.
+        The unlocked key is only stored with store_private_key=True, which
+        also skips the slow passphrase import but leaves the key readable
+        by anyone with access to the file.
+    """
+
+    version = 1
+
+    def __init__(self, path: str, *, store_private_key: bool = False):
+        self.path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        self.store_private_key = store_private_key
+
+        self._lock = threading.Lock()
+
+    def load(self) -> dict | None:
+        """## Reads the stored session.
+
+        #### Returns:
+            dict | None: The session or None if there is no usable one.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                session = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(session, dict) or session.get("version") != self.version:
+            return None
+
+        return session
+
+    def save(self, session: dict) -> None:
+        """## Writes a session, replacing the stored one.
+
+        #### Args:
+            session (dict): The session data.
+        """
+        session = dict(session, version=self.version, saved_at=time.time())
+
+        if not self.store_private_key:
+            session.pop("private_key", None)
+
+        with self._lock:
+            write_private_file(self.path, json.dumps(session))
+
+    def update(self, **values) -> None:
+        """## Changes single values of the stored session.
+
+        #### Args:
+            **values: The values to set.
+        """
+        session = self.load()
+        if session is not None:
+            session.update(values)
+            self.save(session)
+
+    def clear(self) -> None:
+        """## Removes the stored session."""
+        with self._lock:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
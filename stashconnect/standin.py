@@ -0,0 +1,1615 @@
+"""A local stand-in for the Stashcat api and push server.
+
+Implements the endpoints used by the managers on top of an in-memory store,
+so clients can be tested and benchmarked without network access:
+
+    with StandInServer() as server:
+        alice = server.add_user("alice@example.com", "pw", encryption_password="enc")
+        bob = server.add_user("bob@example.com", "pw", encryption_password="enc")
+        chat = server.add_conversation([alice["id"], bob["id"]])
+
+        client = stashconnect.Client(
+            email="alice@example.com",
+            password="pw",
+            encryption_password="enc",
+            api_url=server.api_url,
+            push_url=server.push_url,
+        )
+
+Encryption follows the real server: chat keys are only stored wrapped with
+the public key of each member, texts, locations and files are stored as the
+ciphertext the clients send. Users created with an encryption_password get an
+RSA key pair, the server acts as their device for seeding (add_conversation,
+post_message, ...).
+"""
+
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import mimetypes
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+
+from collections import Counter
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from .crypto_utils import CryptoUtils
+from .scheduler import endpoint_name
+
+
+class _Failure(Exception):
+    # answered with an api status other than "OK"
+    pass
+
+
+class _HTTPFailure(Exception):
+    def __init__(self, status: int, retry_after: float = None):
+        super().__init__(status)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections of concurrent clients
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _bool(value) -> bool:
+    return str(value).lower() in ("true", "1", "yes")
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _size_string(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _read_form(environ) -> tuple[dict, dict]:
+    # returns (fields, files) of an urlencoded or multipart body
+    length = _int(environ.get("CONTENT_LENGTH"))
+    body = environ["wsgi.input"].read(length) if length else b""
+    content_type = environ.get("CONTENT_TYPE", "")
+
+    fields, files = {}, {}
+
+    if content_type.startswith("multipart/form-data"):
+        header = f"Content-Type: {content_type}\r\n\r\n".encode("latin-1")
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            header + body
+        )
+
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            content = part.get_payload(decode=True)
+
+            if part.get_filename() is not None:
+                files[name] = content
+            else:
+                fields[name] = content.decode("utf-8")
+    else:
+        parsed = urllib.parse.parse_qs(body.decode("utf-8"), keep_blank_values=True)
+        fields = {
+            key: values[0] if len(values) == 1 else values
+            for key, values in parsed.items()
+        }
+
+    for key, values in urllib.parse.parse_qs(environ.get("QUERY_STRING", "")).items():
+        fields.setdefault(key, values[0])
+
+    return fields, files
+
+
+class StandInServer:
+    """## A local Stashcat api and push server for tests and benchmarks.
+
+    #### Args:
+        host (str, optional): The bind address. Defaults to "127.0.0.1".
+        port (int, optional): The port, 0 picks a free one. Defaults to 0.
+        latency (float | tuple, optional): Delay per request in seconds or a (min, max) range. Defaults to 0.
+        error_rate (float, optional): Share of requests answered with a 503. Defaults to 0.
+        key_size (int, optional): RSA key size of created users. Defaults to 2048.
+        push (bool, optional): Serves socket.io push events. Defaults to True.
+
+    #### Attributes:
+        .api_url (str): The url to pass as Client(api_url=...).
+        .push_url (str): The url to pass as Client(push_url=...).
+        .requests (Counter): The number of requests per endpoint.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float | tuple = 0,
+        error_rate: float = 0,
+        key_size: int = 2048,
+        push: bool = True,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.key_size = key_size
+        self.push = push
+
+        self.endpoint_latency = {}
+        self.requests = Counter()
+
+        self.users = {}
+        self.companies = {}
+        self.conversations = {}
+        self.channels = {}
+        self.messages = {}
+        self.files = {}
+
+        self._ids = itertools.count(1000)
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._private_keys = {}
+        self._chat_keys = {}
+        self._uploads = {}
+        self._invites = {}
+        self._failures = {}
+
+        self._server = None
+        self._thread = None
+        self.sio = None
+
+        self._routes = {
+            "auth/login": self._auth_login,
+            "users/me": self._users_me,
+            "users/info": self._users_info,
+            "security/get_private_key": self._security_get_private_key,
+            "security/set_file_access_key": self._security_set_file_access_key,
+            "company/member": self._company_member,
+            "company/details": self._company_details,
+            "message/send": self._message_send,
+            "message/content": self._message_content,
+            "message/infos": self._message_infos,
+            "message/like": self._message_like,
+            "message/unlike": self._message_unlike,
+            "message/flag": self._message_flag,
+            "message/unflag": self._message_unflag,
+            "message/delete": self._message_delete,
+            "message/list_flagged_messages": self._message_flagged,
+            "message/conversation": self._message_conversation,
+            "message/conversations": self._message_conversations,
+            "message/createEncryptedConversation": self._message_create_conversation,
+            "message/archiveConversation": self._ok,
+            "message/set_favorite": self._message_set_favorite,
+            "channels/info": self._channels_info,
+            "channels/create": self._channels_create,
+            "channels/edit": self._channels_edit,
+            "channels/rename": self._channels_rename,
+            "channels/editDescription": self._channels_edit_description,
+            "channels/editPassword": self._channels_edit_password,
+            "channels/changePermissions": self._channels_change_permissions,
+            "channels/members": self._channels_members,
+            "channels/join": self._channels_join,
+            "channels/quit": self._channels_quit,
+            "channels/delete": self._channels_delete,
+            "channels/removeUser": self._channels_remove_user,
+            "channels/addModeratorStatus": self._channels_add_moderator,
+            "channels/removeModeratorStatus": self._channels_remove_moderator,
+            "channels/createInvite": self._channels_create_invite,
+            "channels/acceptInvite": self._channels_accept_invite,
+            "channels/declineInvite": self._channels_decline_invite,
+            "channels/visible": self._channels_visible,
+            "channels/subscripted": self._channels_subscripted,
+            "channels/recommendations": self._channels_recommendations,
+            "file/upload": self._file_upload,
+            "file/download": self._file_download,
+            "file/info": self._file_info,
+            "file/infos": self._file_infos,
+            "file/delete": self._file_delete,
+            "file/rename": self._file_rename,
+            "file/move": self._file_move,
+            "file/copy": self._file_copy,
+            "file/quota": self._file_quota,
+            "file/storePreviewImage": self._file_store_preview,
+            "file/shares": self._file_shares,
+            "folder/get": self._folder_get,
+            "push/disable_notifications": self._ok,
+            "push/enable_notifications": self._ok,
+            "account/settings": self._account_settings,
+            "account/change_status": self._account_change_status,
+            "account/list_active_devices": self._account_devices,
+            "notifications/get": self._notifications_get,
+            "notifications/count": self._notifications_count,
+        }
+
+        self.default_company = self.add_company("StandIn")
+
+    # server
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> "StandInServer":
+        """## Starts serving on a background thread.
+
+        #### Returns:
+            StandInServer: The server.
+        """
+        app = self._app
+
+        if self.push:
+            import socketio
+
+            self.sio = socketio.Server(
+                async_mode="threading", allow_upgrades=False, cors_allowed_origins="*"
+            )
+            self.sio.on("userid", self._on_userid)
+            self.sio.on("started-typing", self._on_started_typing)
+            app = socketio.WSGIApp(self.sio, self._app)
+
+        self._server = make_server(
+            self.host,
+            self.port,
+            app,
+            server_class=_ThreadingWSGIServer,
+            handler_class=_QuietHandler,
+        )
+        self.port = self._server.server_port
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stashconnect-standin", daemon=True
+        )
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """## Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    @property
+    def push_url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    # fault injection
+
+    def set_latency(self, endpoint: str, seconds: float | tuple) -> None:
+        """## Sets the delay of one endpoint.
+
+        #### Args:
+            endpoint (str): The endpoint (e.g. "message/send").
+            seconds (float | tuple): The delay in seconds or a (min, max) range.
+        """
+        self.endpoint_latency[endpoint] = seconds
+
+    def fail(
+        self,
+        endpoint: str,
+        status: int = 503,
+        *,
+        times: int = 1,
+        retry_after: float = None,
+    ) -> None:
+        """## Answers the next requests to an endpoint with an http error.
+
+        #### Args:
+            endpoint (str): The endpoint (e.g. "message/send").
+            status (int, optional): The status code. Defaults to 503.
+            times (int, optional): The number of failing requests. Defaults to 1.
+            retry_after (float, optional): The Retry-After header. Defaults to None.
+        """
+        with self._lock:
+            self._failures.setdefault(endpoint, []).extend(
+                [(status, retry_after)] * times
+            )
+
+    def _delay(self, endpoint: str) -> float:
+        latency = self.endpoint_latency.get(endpoint, self.latency)
+
+        if isinstance(latency, tuple | list):
+            return random.uniform(*latency)
+
+        return latency or 0
+
+    def _injected_failure(self, endpoint: str):
+        with self._lock:
+            failures = self._failures.get(endpoint)
+            if failures:
+                return _HTTPFailure(*failures.pop(0))
+
+        if self.error_rate and random.random() < self.error_rate:
+            return _HTTPFailure(503)
+
+        return None
+
+    # wsgi
+
+    def _app(self, environ, start_response):
+        endpoint = endpoint_name(environ.get("PATH_INFO", ""))
+        self.requests[endpoint] += 1
+
+        delay = self._delay(endpoint)
+        if delay:
+            time.sleep(delay)
+
+        try:
+            failure = self._injected_failure(endpoint)
+            if failure is not None:
+                raise failure
+
+            route = self._routes.get(endpoint)
+            if route is None:
+                raise _HTTPFailure(404)
+
+            fields, files = _read_form(environ)
+
+            with self._lock:
+                if endpoint == "auth/login":
+                    user = None
+                else:
+                    user = self._authenticate(fields)
+
+                payload = route(user, fields, files)
+
+        except _HTTPFailure as e:
+            headers = [("Content-Type", "text/plain")]
+            if e.retry_after is not None:
+                headers.append(("Retry-After", str(e.retry_after)))
+
+            start_response(f"{e.status} Error", headers)
+            return [b""]
+
+        except _Failure as e:
+            body = {
+                "status": {
+                    "value": "ERROR",
+                    "short_message": str(e),
+                    "message": str(e),
+                },
+                "payload": {},
+            }
+            return self._respond(start_response, json.dumps(body).encode("utf-8"))
+
+        if isinstance(payload, bytes):
+            return self._respond(start_response, payload, "application/octet-stream")
+
+        body = {
+            "status": {"value": "OK", "short_message": "OK", "message": "OK"},
+            "payload": payload,
+            "signature": "",
+        }
+        return self._respond(start_response, json.dumps(body).encode("utf-8"))
+
+    def _respond(self, start_response, body, content_type="application/json"):
+        start_response(
+            "200 OK",
+            [("Content-Type", content_type), ("Content-Length", str(len(body)))],
+        )
+        return [body]
+
+    def _authenticate(self, fields):
+        user_id = self._sessions.get(fields.get("client_key"))
+        if user_id is None:
+            raise _Failure("Invalid client_key")
+
+        return self.users[user_id]
+
+    # seeding
+
+    def _next_id(self) -> int:
+        return next(self._ids)
+
+    def add_company(self, name: str) -> dict:
+        """## Creates a company.
+
+        #### Args:
+            name (str): The companies name.
+
+        #### Returns:
+            dict: The stored company.
+        """
+        with self._lock:
+            company = {
+                "id": self._next_id(),
+                "name": name,
+                "members": set(),
+                "created": int(time.time()),
+            }
+            self.companies[company["id"]] = company
+            return company
+
+    def add_user(
+        self,
+        email: str,
+        password: str,
+        *,
+        first_name: str = None,
+        last_name: str = "StandIn",
+        encryption_password: str = None,
+        company: int = None,
+    ) -> dict:
+        """## Creates a user (with an RSA key pair if an encryption password is given).
+
+        #### Args:
+            email (str): The login email.
+            password (str): The login password.
+            first_name (str, optional): The first name. Defaults to the emails local part.
+            last_name (str, optional): The last name. Defaults to "StandIn".
+            encryption_password (str, optional): The private keys passphrase. Defaults to None.
+            company (int, optional): The company id. Defaults to the default company.
+
+        #### Returns:
+            dict: The stored user.
+        """
+        user = {
+            "id": None,
+            "email": email,
+            "password": password,
+            "first_name": first_name or email.split("@")[0],
+            "last_name": last_name,
+            "socket_id": uuid.uuid4().hex,
+            "status": "",
+            "public_key": "",
+            "private_key": None,
+        }
+
+        private_key = None
+        if encryption_password is not None:
+            private_key = CryptoUtils.generate_private_key(self.key_size)
+            user["public_key"] = CryptoUtils.export_public_key(
+                CryptoUtils.public_key(private_key)
+            )
+            user["private_key"] = CryptoUtils.export_private_key(
+                private_key, encryption_password
+            ).decode("utf-8")
+
+        with self._lock:
+            user["id"] = self._next_id()
+            self.users[user["id"]] = user
+
+            if private_key is not None:
+                self._private_keys[user["id"]] = private_key
+
+            company_id = self.default_company["id"] if company is None else company
+            self.companies[company_id]["members"].add(user["id"])
+
+        return user
+
+    def _wrap_key(self, chat_key: bytes, user_id: int) -> str | None:
+        public_key = self.users[user_id]["public_key"]
+        if not public_key:
+            return None
+
+        return CryptoUtils.encrypt_key(
+            chat_key, CryptoUtils.import_public_key(public_key)
+        )
+
+    def add_conversation(self, members: list, *, encrypted: bool = True) -> dict:
+        """## Creates a conversation as its first member.
+
+        #### Args:
+            members (list): The member ids.
+            encrypted (bool, optional): Creates a chat key. Defaults to True.
+
+        #### Returns:
+            dict: The stored conversation.
+        """
+        members = [int(member) for member in members]
+        chat_key = CryptoUtils.random_bytes(32) if encrypted else None
+
+        keys = {
+            member: self._wrap_key(chat_key, member) if encrypted else None
+            for member in members
+        }
+
+        with self._lock:
+            conversation = self._store_conversation(members[0], keys, encrypted)
+            if encrypted:
+                self._chat_keys[("conversation", conversation["id"])] = chat_key
+
+        return conversation
+
+    def _store_conversation(self, creator, keys, encrypted):
+        conversation = {
+            "id": self._next_id(),
+            "key_sender": creator,
+            "keys": keys,
+            "encrypted": encrypted,
+            "favorites": set(),
+            "archived": set(),
+            "last_action": int(time.time()),
+            "messages": [],
+        }
+        self.conversations[conversation["id"]] = conversation
+        return conversation
+
+    def add_channel(
+        self,
+        name: str,
+        members: list,
+        *,
+        encrypted: bool = True,
+        company: int = None,
+        password: str = "",
+        visible: bool = True,
+    ) -> dict:
+        """## Creates a channel, the first member becomes its manager.
+
+        #### Args:
+            name (str): The channels name.
+            members (list): The member ids.
+            encrypted (bool, optional): Creates a chat key. Defaults to True.
+            company (int, optional): The company id. Defaults to the default company.
+            password (str, optional): The join password. Defaults to "".
+            visible (bool, optional): Lists the channel for non members. Defaults to True.
+
+        #### Returns:
+            dict: The stored channel.
+        """
+        members = [int(member) for member in members]
+        chat_key = CryptoUtils.random_bytes(32) if encrypted else None
+
+        keys = {
+            member: self._wrap_key(chat_key, member) if encrypted else None
+            for member in members
+        }
+
+        with self._lock:
+            channel = self._store_channel(
+                name,
+                keys,
+                encrypted=encrypted,
+                company=self.default_company["id"] if company is None else company,
+                password=password,
+                visible=visible,
+            )
+            channel["managers"].add(members[0])
+            if encrypted:
+                self._chat_keys[("channel", channel["id"])] = chat_key
+
+        return channel
+
+    def _store_channel(self, name, keys, **settings):
+        channel = {
+            "id": self._next_id(),
+            "name": name,
+            "description": "",
+            "keys": keys,
+            "managers": set(),
+            "favorites": set(),
+            "writable": "all",
+            "inviteable": "all",
+            "type": "encrypted" if settings["encrypted"] else "public",
+            "show_activities": True,
+            "show_membership_activities": True,
+            "last_action": int(time.time()),
+            "messages": [],
+        }
+        channel.update(settings)
+        self.channels[channel["id"]] = channel
+        return channel
+
+    def chat_key(self, target_type: str, target_id: int, user_id: int = None):
+        """## Returns the plain key of a chat as known to a server side user.
+
+        #### Args:
+            target_type (str): "conversation" or "channel".
+            target_id (int): The chats id.
+            user_id (int, optional): Unwraps the key with this users private key. Defaults to None.
+
+        #### Returns:
+            bytes | None: The chat key.
+        """
+        key = self._chat_keys.get((target_type, int(target_id)))
+        if key is not None or user_id is None:
+            return key
+
+        chat = self._chat(target_type, target_id)
+        wrapped = chat["keys"].get(int(user_id))
+        private_key = self._private_keys.get(int(user_id))
+
+        if wrapped is None or private_key is None:
+            return None
+
+        return CryptoUtils.decrypt_key(wrapped, private_key)
+
+    def post_message(
+        self,
+        target_type: str,
+        target_id: int,
+        sender_id: int,
+        text: str,
+        *,
+        encrypted: bool = None,
+        files: list = None,
+    ) -> dict:
+        """## Sends a message as a server side user (and pushes it).
+
+        #### Args:
+            target_type (str): "conversation" or "channel".
+            target_id (int): The chats id.
+            sender_id (int): The senders id.
+            text (str): The plain text.
+            encrypted (bool, optional): Encrypts the text. Defaults to the chats setting.
+            files (list, optional): File ids to attach. Defaults to None.
+
+        #### Returns:
+            dict: The message payload as seen by the sender.
+        """
+        with self._lock:
+            chat = self._chat(target_type, target_id)
+            if encrypted is None:
+                encrypted = chat["encrypted"]
+
+            iv = None
+            if encrypted:
+                chat_key = self.chat_key(target_type, target_id, sender_id)
+                if chat_key is None:
+                    raise ValueError("the sender does not know the chats key")
+
+                iv = CryptoUtils.random_bytes(16)
+                text = CryptoUtils.encrypt_aes(text.encode("utf-8"), chat_key, iv).hex()
+
+            message = self._store_message(
+                target_type,
+                chat,
+                sender_id,
+                text,
+                encrypted=encrypted,
+                iv=None if iv is None else iv.hex(),
+                files=[int(file_id) for file_id in files or []],
+            )
+            payload = self._message_payload(message, self.users[sender_id])
+
+        self.emit_message(message)
+        return payload
+
+    def _store_message(self, target_type, chat, sender_id, text, **values):
+        message = {
+            "id": self._next_id(),
+            "type": target_type,
+            "chat_id": chat["id"],
+            "sender": sender_id,
+            "text": text,
+            "time": int(time.time()),
+            "likes": set(),
+            "flagged": set(),
+            "location": None,
+            "links": [],
+            "deleted": False,
+        }
+        message.update(values)
+
+        self.messages[message["id"]] = message
+        chat["messages"].append(message["id"])
+        chat["last_action"] = message["time"]
+        return message
+
+    # push
+
+    def _on_userid(self, sid, data):
+        user_id = self._sessions.get(data.get("client_key"))
+        if user_id is not None:
+            self.sio.enter_room(sid, f"user:{user_id}")
+
+    def _on_started_typing(self, sid, device_id, client_key, target_type, target_id):
+        user_id = self._sessions.get(client_key)
+        if user_id is None:
+            return
+
+        chat = self._chat(target_type, target_id)
+        for member in chat["keys"]:
+            self.sio.emit(
+                "user-started-typing",
+                (target_type, target_id, user_id),
+                room=f"user:{member}",
+            )
+
+    def emit(self, event: str, data, user_id: int) -> None:
+        """## Pushes a socket.io event to a user.
+
+        #### Args:
+            event (str): The events name.
+            data: The events data.
+            user_id (int): The receiving user.
+        """
+        if self.sio is not None:
+            self.sio.emit(event, data, room=f"user:{user_id}")
+
+    def emit_message(self, message: dict) -> None:
+        """## Pushes a message to all members of its chat as "message_sync".
+
+        #### Args:
+            message (dict): The stored message.
+        """
+        if self.sio is None:
+            return
+
+        with self._lock:
+            chat = self._chat(message["type"], message["chat_id"])
+            payloads = {
+                member: self._message_payload(message, self.users[member])
+                for member in chat["keys"]
+            }
+
+        for member, payload in payloads.items():
+            self.emit("message_sync", {"message": payload}, member)
+
+    # payloads
+
+    def _user_payload(self, user: dict) -> dict:
+        return {
+            "id": user["id"],
+            "first_name": user["first_name"],
+            "last_name": user["last_name"],
+            "email": user["email"],
+            "status": user["status"],
+            "image": "",
+            "language": "en",
+            "last_login": None,
+            "online": False,
+            "permissions": [],
+            "public_key": user["public_key"],
+            "roles": [],
+            "socket_id": user["socket_id"],
+        }
+
+    def _company_payload(self, company: dict) -> dict:
+        members = company["members"]
+        manager = self.users.get(min(members)) if members else None
+
+        return {
+            "id": company["id"],
+            "name": company["name"],
+            "manager": None if manager is None else self._user_payload(manager),
+            "created": company["created"],
+            "time_joined": company["created"],
+            "unread_messages": 0,
+            "logo_url": "",
+            "domain": "",
+            "max_users": 0,
+            "users": {"active": len(members), "created": len(members)},
+            "membership_expiry": None,
+            "online_payment": False,
+            "protected": False,
+            "provider": "standin",
+            "quota": 0,
+            "freemium": False,
+            "deactivated": None,
+            "deleted": None,
+            "features": [],
+            "permission": [],
+            "roles": [],
+            "settings": {},
+        }
+
+    def _conversation_payload(self, conversation: dict, user: dict) -> dict:
+        members = [self._user_payload(self.users[id]) for id in conversation["keys"]]
+
+        return {
+            "id": conversation["id"],
+            "key_sender": conversation["key_sender"],
+            "key": conversation["keys"].get(user["id"]),
+            "encrypted": conversation["encrypted"],
+            "favorite": user["id"] in conversation["favorites"],
+            "archive": user["id"] in conversation["archived"],
+            "last_action": conversation["last_action"],
+            "last_activity": conversation["last_action"],
+            "muted": None,
+            "name": ", ".join(member["first_name"] for member in members),
+            "unread_messages": 0,
+            "user_count": len(members),
+            "members": members,
+            "callable": [],
+        }
+
+    def _channel_payload(self, channel: dict, user: dict) -> dict:
+        is_member = user["id"] in channel["keys"]
+
+        return {
+            "id": channel["id"],
+            "company": channel["company"],
+            "key": channel["keys"].get(user["id"]),
+            "crypto_properties": "",
+            "encrypted": channel["encrypted"],
+            "federated": False,
+            "unique_identifier": str(channel["id"]),
+            "description": channel["description"],
+            "name": channel["name"],
+            "image": "",
+            "group_id": None,
+            "can_leave": True,
+            "inviteable": channel["inviteable"],
+            "last_action": channel["last_action"],
+            "ldap_name": None,
+            "mx_room_alias": None,
+            "mx_room_id": None,
+            "mx_room_server_status": None,
+            "num_members_without_keys": 0,
+            "password": bool(channel["password"]),
+            "pending_count": 0,
+            "request_count": 0,
+            "show_activities": channel["show_activities"],
+            "show_membership_activities": channel["show_membership_activities"],
+            "type": channel["type"],
+            "user_count": len(channel["keys"]),
+            "visible": channel["visible"],
+            "writable": channel["writable"],
+            "favorite": user["id"] in channel["favorites"],
+            "membership": {
+                "is_member": is_member,
+                "joined": channel["last_action"] if is_member else None,
+                "may_manage": user["id"] in channel["managers"],
+                "muted": None,
+                "write": is_member,
+                "confirmation": None,
+                "invited_at": None,
+                "invited_by": None,
+                "invited_by_mx_user_id": None,
+            },
+        }
+
+    def _file_payload(self, file: dict, user: dict) -> dict:
+        keys = []
+        for key in file["keys"]:
+            chat = self._chat(key["type"], key["chat_id"])
+            keys.append(dict(key, chat_key=chat["keys"].get(user["id"])))
+
+        return {
+            "id": file["id"],
+            "name": file["name"],
+            "virtual_folder": None,
+            "folder_type": file["type"],
+            "type_id": file["type_id"],
+            "size": file["size"],
+            "size_byte": file["size"],
+            "size_string": _size_string(file["size"]),
+            "dimensions": {"width": file["width"], "height": file["height"]},
+            "ext": file["ext"],
+            "mime": file["mime"],
+            "base_64": file["preview"],
+            "uploaded": file["uploaded"],
+            "modified": file["uploaded"],
+            "permission": "rw",
+            "owner_id": file["owner"],
+            "owner": self._user_payload(self.users[file["owner"]]),
+            "last_download": None,
+            "times_downloaded": file["downloads"],
+            "status": "ok",
+            "deleted": None,
+            "encrypted": file["encrypted"],
+            "e2e_iv": file["iv"],
+            "md5": file["md5"],
+            "keys": keys,
+        }
+
+    def _message_payload(self, message: dict, user: dict) -> dict:
+        is_channel = message["type"] == "channel"
+
+        return {
+            "id": message["id"],
+            "kind": "message",
+            "type": "text",
+            "channel_id": message["chat_id"] if is_channel else 0,
+            "conversation_id": 0 if is_channel else message["chat_id"],
+            "text": message["text"],
+            "encrypted": message["encrypted"],
+            "iv": message["iv"],
+            "time": message["time"],
+            "files": [
+                self._file_payload(self.files[file_id], user)
+                for file_id in message["files"]
+                if file_id in self.files
+            ],
+            "flagged": user["id"] in message["flagged"],
+            "liked": user["id"] in message["likes"],
+            "likes": len(message["likes"]),
+            "links": message["links"],
+            "location": message["location"],
+            "sender": self._user_payload(self.users[message["sender"]]),
+        }
+
+    # lookups
+
+    def _chat(self, target_type, target_id):
+        chats = self.channels if target_type == "channel" else self.conversations
+        chat = chats.get(_int(target_id))
+
+        if chat is None:
+            raise _Failure(f"Unknown {target_type}")
+
+        return chat
+
+    def _member_chat(self, user, target_type, target_id):
+        chat = self._chat(target_type, target_id)
+        if user["id"] not in chat["keys"]:
+            raise _Failure(f"Not a member of this {target_type}")
+
+        return chat
+
+    def _message(self, user, message_id):
+        message = self.messages.get(_int(message_id))
+        if message is None or message["deleted"]:
+            raise _Failure("Unknown message")
+
+        self._member_chat(user, message["type"], message["chat_id"])
+        return message
+
+    def _file(self, file_id):
+        file = self.files.get(_int(file_id))
+        if file is None:
+            raise _Failure("Unknown file")
+
+        return file
+
+    def _ok(self, user, fields, files):
+        return {}
+
+    # auth, users, security
+
+    def _auth_login(self, user, fields, files):
+        for user in self.users.values():
+            if user["email"] == fields.get("email"):
+                break
+        else:
+            raise _Failure("Wrong email or password")
+
+        if user["password"] != fields.get("password"):
+            raise _Failure("Wrong email or password")
+
+        client_key = uuid.uuid4().hex
+        self._sessions[client_key] = user["id"]
+
+        return {"client_key": client_key, "userinfo": self._user_payload(user)}
+
+    def _users_me(self, user, fields, files):
+        return {"user": self._user_payload(user)}
+
+    def _users_info(self, user, fields, files):
+        other = self.users.get(_int(fields.get("user_id")))
+        if other is None:
+            raise _Failure("Unknown user")
+
+        return {"user": self._user_payload(other)}
+
+    def _security_get_private_key(self, user, fields, files):
+        if user["private_key"] is None:
+            raise _Failure("No private key stored")
+
+        private_key = json.dumps(
+            {"private": user["private_key"], "public": user["public_key"]}
+        )
+        return {"keys": {"private_key": private_key, "public_key": user["public_key"]}}
+
+    def _security_set_file_access_key(self, user, fields, files):
+        file = self._file(fields.get("file_id"))
+        target_type = fields.get("target")
+        chat = self._member_chat(user, target_type, fields.get("target_id"))
+
+        file["keys"] = [key for key in file["keys"] if key["chat_id"] != chat["id"]]
+        file["keys"].append(
+            {
+                "chat_id": chat["id"],
+                "type": target_type,
+                "key": fields.get("key"),
+                "iv": fields.get("iv"),
+            }
+        )
+        return {}
+
+    # companies
+
+    def _company_member(self, user, fields, files):
+        return {
+            "companies": [
+                self._company_payload(company)
+                for company in self.companies.values()
+                if user["id"] in company["members"]
+            ]
+        }
+
+    def _company_details(self, user, fields, files):
+        company = self.companies.get(_int(fields.get("company_id")))
+        if company is None:
+            raise _Failure("Unknown company")
+
+        return {"company": self._company_payload(company)}
+
+    # messages
+
+    def _message_send(self, user, fields, files):
+        target_type = fields.get("target")
+        chat = self._member_chat(user, target_type, fields.get(f"{target_type}_id"))
+
+        encrypted = _bool(fields.get("encrypted"))
+        if encrypted and not fields.get("iv"):
+            raise _Failure("Encrypted messages need an iv")
+
+        location = None
+        if fields.get("latitude") is not None:
+            location = {
+                "latitude": fields["latitude"],
+                "longitude": fields.get("longitude"),
+                "encrypted": encrypted,
+                "iv": fields.get("iv") if encrypted else None,
+            }
+
+        message = self._store_message(
+            target_type,
+            chat,
+            user["id"],
+            fields.get("text", ""),
+            encrypted=encrypted,
+            iv=fields.get("iv") if encrypted else None,
+            files=[int(file_id) for file_id in json.loads(fields.get("files", "[]"))],
+            links=json.loads(fields.get("url", "[]")),
+            location=location,
+        )
+
+        # pushed after the response is built, the server lock is still held here
+        threading.Thread(target=self.emit_message, args=(message,), daemon=True).start()
+
+        return {"message": self._message_payload(message, user)}
+
+    def _message_content(self, user, fields, files):
+        target_type = fields.get("source")
+        chat = self._member_chat(user, target_type, fields.get(f"{target_type}_id"))
+
+        limit = _int(fields.get("limit"), 30)
+        offset = _int(fields.get("offset"))
+
+        ids = [
+            message_id
+            for message_id in chat["messages"]
+            if not self.messages[message_id]["deleted"]
+        ]
+
+        # pages are counted from the newest message, each page is in chronological order
+        end = len(ids) - offset
+        page = ids[max(0, end - limit) : max(0, end)]
+
+        return {
+            "messages": [
+                self._message_payload(self.messages[message_id], user)
+                for message_id in page
+            ]
+        }
+
+    def _message_infos(self, user, fields, files):
+        ids = json.loads(fields.get("message_ids", "[]"))
+        return {
+            "messages": [
+                self._message_payload(self._message(user, message_id), user)
+                for message_id in ids
+            ]
+        }
+
+    def _message_like(self, user, fields, files):
+        self._message(user, fields.get("message_id"))["likes"].add(user["id"])
+        return {}
+
+    def _message_unlike(self, user, fields, files):
+        self._message(user, fields.get("message_id"))["likes"].discard(user["id"])
+        return {}
+
+    def _message_flag(self, user, fields, files):
+        self._message(user, fields.get("message_id"))["flagged"].add(user["id"])
+        return {}
+
+    def _message_unflag(self, user, fields, files):
+        self._message(user, fields.get("message_id"))["flagged"].discard(user["id"])
+        return {}
+
+    def _message_delete(self, user, fields, files):
+        message = self._message(user, fields.get("message_id"))
+        if message["sender"] != user["id"]:
+            raise _Failure("Only the sender can delete a message")
+
+        message["deleted"] = True
+        return {}
+
+    def _message_flagged(self, user, fields, files):
+        target_type = fields.get("type")
+        chat = self._member_chat(user, target_type, fields.get("type_id"))
+
+        messages = [
+            self.messages[message_id]
+            for message_id in chat["messages"]
+            if user["id"] in self.messages[message_id]["flagged"]
+        ]
+        offset = _int(fields.get("offset"))
+        limit = _int(fields.get("limit"), 100)
+
+        return {
+            "messages": [
+                self._message_payload(message, user)
+                for message in messages[offset : offset + limit]
+            ]
+        }
+
+    def _message_conversation(self, user, fields, files):
+        conversation = self._member_chat(
+            user, "conversation", fields.get("conversation_id")
+        )
+        return {"conversation": self._conversation_payload(conversation, user)}
+
+    def _message_conversations(self, user, fields, files):
+        conversations = sorted(
+            (
+                conversation
+                for conversation in self.conversations.values()
+                if user["id"] in conversation["keys"]
+            ),
+            key=lambda conversation: conversation["last_action"],
+            reverse=True,
+        )
+        offset = _int(fields.get("offset"))
+        limit = _int(fields.get("limit"), 50)
+
+        return {
+            "conversations": [
+                self._conversation_payload(conversation, user)
+                for conversation in conversations[offset : offset + limit]
+            ],
+            "num_conversations": len(conversations),
+        }
+
+    def _message_create_conversation(self, user, fields, files):
+        members = json.loads(fields.get("members", "[]"))
+        keys = {int(member["id"]): member.get("key") for member in members}
+
+        if user["id"] not in keys:
+            raise _Failure("The creator has to be a member")
+
+        for member_id in keys:
+            if member_id not in self.users:
+                raise _Failure("Unknown user")
+
+        conversation = self._store_conversation(user["id"], keys, True)
+        return {"conversation": self._conversation_payload(conversation, user)}
+
+    def _message_set_favorite(self, user, fields, files):
+        if fields.get("channel_id") is not None:
+            chat = self._member_chat(user, "channel", fields["channel_id"])
+        else:
+            chat = self._member_chat(
+                user, "conversation", fields.get("conversation_id")
+            )
+
+        if _bool(fields.get("favorite")):
+            chat["favorites"].add(user["id"])
+        else:
+            chat["favorites"].discard(user["id"])
+
+        return {}
+
+    # channels
+
+    def _channels_info(self, user, fields, files):
+        channel = self._chat("channel", fields.get("channel_id"))
+        payload = self._channel_payload(channel, user)
+
+        if not _bool(fields.get("without_members", True)):
+            payload["members"] = [
+                self._user_payload(self.users[member]) for member in channel["keys"]
+            ]
+
+        return {"channels": payload}
+
+    def _channels_create(self, user, fields, files):
+        company = _int(fields.get("company"))
+        if company not in self.companies:
+            raise _Failure("Unknown company")
+
+        if fields.get("password", "") != fields.get("password_repeat", ""):
+            raise _Failure("The passwords do not match")
+
+        encrypted = fields.get("type", "encrypted") == "encrypted"
+        if encrypted and not fields.get("encryption_key"):
+            raise _Failure("Encrypted channels need an encryption_key")
+
+        channel = self._store_channel(
+            fields.get("channel_name", ""),
+            {user["id"]: fields.get("encryption_key") if encrypted else None},
+            encrypted=encrypted,
+            company=company,
+            password=fields.get("password") or "",
+            visible=_bool(fields.get("visible", True)),
+        )
+        channel["managers"].add(user["id"])
+        channel["description"] = fields.get("description", "")
+
+        self._apply_channel_settings(channel, fields)
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _apply_channel_settings(self, channel, fields):
+        for name in ("writable", "inviteable"):
+            if fields.get(name) is not None:
+                channel[name] = fields[name]
+
+        for name in ("show_activities", "show_membership_activities", "visible"):
+            if fields.get(name) is not None:
+                channel[name] = _bool(fields[name])
+
+    def _managed_channel(self, user, channel_id):
+        channel = self._member_chat(user, "channel", channel_id)
+        if user["id"] not in channel["managers"]:
+            raise _Failure("Missing permission")
+
+        return channel
+
+    def _channels_edit(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+
+        channel["name"] = fields.get("channel_name", channel["name"])
+        channel["description"] = fields.get("description", channel["description"])
+        if fields.get("password") is not None:
+            channel["password"] = fields["password"]
+
+        self._apply_channel_settings(channel, fields)
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_rename(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["name"] = fields.get("channel_name", channel["name"])
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_edit_description(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["description"] = fields.get("description", "")
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_edit_password(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["password"] = fields.get("password") or ""
+        return {}
+
+    def _channels_change_permissions(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["writable"] = fields.get("writable", channel["writable"])
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_members(self, user, fields, files):
+        channel = self._member_chat(user, "channel", fields.get("channel_id"))
+
+        members = sorted(
+            (self.users[member] for member in channel["keys"]),
+            key=lambda member: (member["first_name"], member["last_name"]),
+        )
+
+        search = (fields.get("search") or "").lower()
+        if search:
+            members = [
+                member
+                for member in members
+                if search in f"{member['first_name']} {member['last_name']}".lower()
+            ]
+
+        offset = _int(fields.get("offset"))
+        limit = _int(fields.get("limit"), 40)
+
+        return {
+            "members": [
+                self._user_payload(member)
+                for member in members[offset : offset + limit]
+            ]
+        }
+
+    def _channels_join(self, user, fields, files):
+        channel = self._chat("channel", fields.get("channel_id"))
+
+        if channel["encrypted"]:
+            raise _Failure("Encrypted channels can only be joined with an invite")
+        if channel["password"] and fields.get("password") != channel["password"]:
+            raise _Failure("Wrong password")
+
+        channel["keys"][user["id"]] = None
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_quit(self, user, fields, files):
+        channel = self._member_chat(user, "channel", fields.get("channel_id"))
+        channel["keys"].pop(user["id"], None)
+        channel["managers"].discard(user["id"])
+        return {}
+
+    def _channels_delete(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        del self.channels[channel["id"]]
+        return {}
+
+    def _channels_remove_user(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["keys"].pop(_int(fields.get("user_id")), None)
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_add_moderator(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["managers"].add(_int(fields.get("user_id")))
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_remove_moderator(self, user, fields, files):
+        channel = self._managed_channel(user, fields.get("channel_id"))
+        channel["managers"].discard(_int(fields.get("user_id")))
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_create_invite(self, user, fields, files):
+        channel = self._member_chat(user, "channel", fields.get("channel_id"))
+        invites = []
+
+        for invited in json.loads(fields.get("users", "[]")):
+            if _int(invited.get("id")) not in self.users:
+                raise _Failure("Unknown user")
+            if channel["encrypted"] and not invited.get("key"):
+                raise _Failure("Invites to encrypted channels need a key")
+
+            invite = {
+                "id": self._next_id(),
+                "channel_id": channel["id"],
+                "user_id": _int(invited["id"]),
+                "key": invited.get("key"),
+                "invited_by": user["id"],
+                "text": fields.get("text", ""),
+            }
+            self._invites[invite["id"]] = invite
+            invites.append(invite["id"])
+
+            self.emit(
+                "new_channel_invite",
+                {"invite_id": invite["id"], "channel_id": channel["id"]},
+                invite["user_id"],
+            )
+
+        return {"invites": invites}
+
+    def _invite(self, user, invite_id):
+        invite = self._invites.get(_int(invite_id))
+        if invite is None or invite["user_id"] != user["id"]:
+            raise _Failure("Unknown invite")
+
+        return self._invites.pop(invite["id"])
+
+    def _channels_accept_invite(self, user, fields, files):
+        invite = self._invite(user, fields.get("invite_id"))
+        channel = self._chat("channel", invite["channel_id"])
+        channel["keys"][user["id"]] = invite["key"]
+        return {"channel": self._channel_payload(channel, user)}
+
+    def _channels_decline_invite(self, user, fields, files):
+        self._invite(user, fields.get("invite_id"))
+        return {}
+
+    def _company_channels(self, user, fields):
+        company = _int(fields.get("company"))
+        return [
+            channel
+            for channel in self.channels.values()
+            if channel["company"] == company
+        ]
+
+    def _channels_visible(self, user, fields, files):
+        search = (fields.get("search") or "").lower()
+        channels = [
+            channel
+            for channel in self._company_channels(user, fields)
+            if channel["visible"] and search in channel["name"].lower()
+        ]
+
+        offset = _int(fields.get("offset"))
+        limit = _int(fields.get("limit"), 30)
+
+        return {
+            "channels": [
+                self._channel_payload(channel, user)
+                for channel in channels[offset : offset + limit]
+            ],
+            "num_channels": len(channels),
+        }
+
+    def _channels_subscripted(self, user, fields, files):
+        return {
+            "channels": [
+                self._channel_payload(channel, user)
+                for channel in self._company_channels(user, fields)
+                if user["id"] in channel["keys"]
+            ]
+        }
+
+    def _channels_recommendations(self, user, fields, files):
+        return {
+            "channels": [
+                self._channel_payload(channel, user)
+                for channel in self._company_channels(user, fields)
+                if channel["visible"] and user["id"] not in channel["keys"]
+            ]
+        }
+
+    # files
+
+    def _file_upload(self, user, fields, files):
+        identifier = fields.get("resumableIdentifier")
+        total = _int(fields.get("resumableTotalChunks"), 1)
+
+        upload = self._uploads.setdefault(identifier, {"chunks": {}, "fields": fields})
+        upload["chunks"][_int(fields.get("resumableChunkNumber"))] = files.get(
+            "file", b""
+        )
+
+        if len(upload["chunks"]) < total:
+            return {"file": None}
+
+        del self._uploads[identifier]
+        content = b"".join(
+            upload["chunks"][index] for index in sorted(upload["chunks"])
+        )
+
+        target_type = fields.get("type")
+        if target_type in ("conversation", "channel"):
+            self._member_chat(user, target_type, fields.get("type_id"))
+
+        name = fields.get("resumableFilename", "file")
+        encrypted = _bool(fields.get("encrypted"))
+
+        file = {
+            "id": self._next_id(),
+            "name": name,
+            "ext": name.rsplit(".", 1)[-1] if "." in name else "",
+            "mime": fields.get("resumableType")
+            or mimetypes.guess_type(name)[0]
+            or "application/octet-stream",
+            "type": target_type,
+            "type_id": _int(fields.get("type_id")),
+            "owner": user["id"],
+            "content": content,
+            "size": len(content),
+            "width": _int(fields.get("media_width"), None),
+            "height": _int(fields.get("media_height"), None),
+            "encrypted": encrypted,
+            "iv": fields.get("iv") if encrypted else None,
+            "md5": hashlib.md5(content).hexdigest(),
+            "keys": [],
+            "preview": None,
+            "uploaded": int(time.time()),
+            "downloads": 0,
+            "folder": 0,
+        }
+        self.files[file["id"]] = file
+
+        return {"file": self._file_payload(file, user)}
+
+    def _file_download(self, user, fields, files):
+        file = self._file(fields.get("id"))
+        file["downloads"] += 1
+        return file["content"]
+
+    def _file_info(self, user, fields, files):
+        return {"file": self._file_payload(self._file(fields.get("file_id")), user)}
+
+    def _file_infos(self, user, fields, files):
+        ids = json.loads(fields.get("file_ids", "[]"))
+        return {
+            "files": [self._file_payload(self._file(file_id), user) for file_id in ids]
+        }
+
+    def _file_delete(self, user, fields, files):
+        for file_id in json.loads(fields.get("file_ids", "[]")):
+            self.files.pop(_int(file_id), None)
+
+        return {}
+
+    def _file_rename(self, user, fields, files):
+        self._file(fields.get("file_id"))["name"] = fields.get("name", "")
+        return {}
+
+    def _file_move(self, user, fields, files):
+        self._file(fields.get("file_id"))["folder"] = _int(fields.get("parent_id"))
+        return {}
+
+    def _file_copy(self, user, fields, files):
+        file = dict(self._file(fields.get("file_id")))
+        file.update(
+            id=self._next_id(),
+            keys=[],
+            owner=user["id"],
+            type=fields.get("type"),
+            type_id=_int(fields.get("type_id")),
+            folder=_int(fields.get("folder_id")),
+        )
+        self.files[file["id"]] = file
+        return {"file": self._file_payload(file, user)}
+
+    def _file_quota(self, user, fields, files):
+        used = sum(
+            file["size"] for file in self.files.values() if file["owner"] == user["id"]
+        )
+        return {"quota": {"used": used, "total": 10 * 1024**3}}
+
+    def _file_store_preview(self, user, fields, files):
+        file = self._file(fields.get("file_id"))
+        content = fields.get("content", "")
+        file["preview"] = content.split(",", 1)[-1] if content else None
+        return {"file": self._file_payload(file, user)}
+
+    def _file_shares(self, user, fields, files):
+        file = self._file(fields.get("file_id"))
+        shares = {"channels": [], "conversations": []}
+
+        for key in file["keys"]:
+            chat = self._chat(key["type"], key["chat_id"])
+            if key["type"] == "channel":
+                shares["channels"].append(self._channel_payload(chat, user))
+            else:
+                shares["conversations"].append(self._conversation_payload(chat, user))
+
+        return {"shares": shares}
+
+    def _folder_get(self, user, fields, files):
+        type_id = _int(fields.get("type_id"))
+        folder = _int(fields.get("folder_id"))
+        content = [
+            file
+            for file in self.files.values()
+            if file["type_id"] == type_id and file["folder"] == folder
+        ]
+
+        offset = _int(fields.get("offset"))
+        limit = _int(fields.get("limit"), 75)
+
+        return {
+            "content": {
+                "files": [
+                    self._file_payload(file, user)
+                    for file in content[offset : offset + limit]
+                ],
+                "folder": [],
+            }
+        }
+
+    # account
+
+    def _account_settings(self, user, fields, files):
+        return {"settings": {"email": user["email"], "language": "en"}}
+
+    def _account_change_status(self, user, fields, files):
+        user["status"] = fields.get("status", "")
+        return {}
+
+    def _account_devices(self, user, fields, files):
+        devices = [
+            {"device_id": client_key[:8], "app_name": "stashconnect"}
+            for client_key, user_id in self._sessions.items()
+            if user_id == user["id"]
+        ]
+        return {"devices": devices}
+
+    def _notifications_get(self, user, fields, files):
+        return {"notifications": []}
+
+    def _notifications_count(self, user, fields, files):
+        return {"count": 0}
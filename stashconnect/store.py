@@ -0,0 +1,444 @@
+"""A local SQLite copy of decrypted messages with a full-text index.
+
+    store = MessageStore("~/.stashconnect/messages.db")
+    store.fill(client, "conversation_id")  # new messages since the last fill
+    store.attach(client)                   # keep it current from socket events
+    store.search("invoice", after=datetime(2024, 1, 1))
+
+The database holds plaintext of encrypted chats, it is created with 0600
+permissions. Searches use an FTS5 index where SQLite was built with it and
+fall back to LIKE otherwise.
+"""
+
+import json
+import os
+import threading
+
+from .history import HistoryWindow, _timestamp
+from .messages import _chat
+
+_COLUMNS = (
+    "id",
+    "chat_type",
+    "chat_id",
+    "sender_id",
+    "sender_name",
+    "time",
+    "text",
+    "encrypted",
+    "file_ids",
+    "latitude",
+    "longitude",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    chat_type TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    sender_id INTEGER,
+    sender_name TEXT,
+    time INTEGER NOT NULL,
+    text TEXT,
+    encrypted INTEGER NOT NULL DEFAULT 0,
+    file_ids TEXT NOT NULL DEFAULT '[]',
+    latitude TEXT,
+    longitude TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_chat_time ON messages (chat_type, chat_id, time);
+CREATE INDEX IF NOT EXISTS messages_time ON messages (time);
+"""
+
+# an external content index, the triggers keep it in step with the table
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, content='messages', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF text ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+def _row_from_payload(payload: dict) -> tuple:
+    chat_type, chat_id = _chat(payload)
+
+    sender = payload.get("sender") or {}
+    sender_name = " ".join(
+        part for part in (sender.get("first_name"), sender.get("last_name")) if part
+    )
+
+    # texts that could not be decrypted are stored without text
+    encrypted = bool(payload.get("encrypted"))
+    location = payload.get("location") or {}
+    location_encrypted = bool(location.get("encrypted"))
+
+    return (
+        int(payload["id"]),
+        chat_type,
+        int(chat_id),
+        int(sender["id"]) if sender.get("id") is not None else None,
+        sender_name or None,
+        int(float(payload["time"])),
+        None if encrypted else payload.get("text"),
+        int(encrypted),
+        json.dumps([int(file["id"]) for file in payload.get("files") or []]),
+        None if location_encrypted else location.get("latitude"),
+        None if location_encrypted else location.get("longitude"),
+    )
+
+
+def _row_from_message(message) -> tuple:
+    author = getattr(message, "author", None)
+    sender_name = " ".join(
+        part
+        for part in (
+            getattr(author, "first_name", None),
+            getattr(author, "last_name", None),
+        )
+        if part
+    )
+
+    # a failed decryption leaves the ciphertext as content
+    encrypted = bool(message.encrypted) and message.content == message.content_encrypted
+
+    return (
+        int(message.id),
+        message.type,
+        int(message.type_id),
+        int(author.id) if author is not None else None,
+        sender_name or None,
+        int(float(message.timestamp)),
+        None if encrypted else message.content,
+        int(encrypted),
+        json.dumps([int(file.id) for file in message.files]),
+        None if encrypted else message.latitude,
+        None if encrypted else message.longitude,
+    )
+
+
+class MessageStore:
+    """## Stores decrypted messages in SQLite and searches them locally.
+
+    #### Args:
+        path (str, optional): The databases path. Defaults to ":memory:".
+
+    #### Info:
+        :Rows are dicts with id, chat_type, chat_id, sender_id, sender_name,
+        time, text, encrypted (the text could not be decrypted), file_ids,
+        latitude and longitude. Adding a stored message again updates it.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        import sqlite3
+
+        if path != ":memory:":
+            path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # create the file with 0600, it holds decrypted messages
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+
+        self.path = path
+        self._lock = threading.RLock()
+        self._listeners = []
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+            try:
+                self._db.executescript(_FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                print("SQLite was built without FTS5, searches fall back to LIKE")
+                self.full_text = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self) -> None:
+        """## Detaches from all clients and closes the database."""
+        for client, callback in list(self._listeners):
+            client.remove_listener("message_sync", callback)
+        self._listeners.clear()
+
+        with self._lock:
+            self._db.close()
+
+    # writing
+
+    def add_many(self, messages: list) -> int:
+        """## Stores messages.
+
+        #### Args:
+            messages (list): Message objects or decrypted raw payloads (see messages.decode_many).
+
+        #### Returns:
+            int: The number of stored messages.
+        """
+        rows = []
+        for message in messages:
+            if not isinstance(message, dict):
+                rows.append(_row_from_message(message))
+            # payloads of other kinds (e.g. system events) are skipped
+            elif message.get("kind", "message") == "message":
+                rows.append(_row_from_payload(message))
+
+        if not rows:
+            return 0
+
+        updates = ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO messages ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                rows,
+            )
+
+        return len(rows)
+
+    def add(self, message) -> None:
+        """## Stores a message.
+
+        #### Args:
+            message (Message | dict): A message object or a decrypted raw payload.
+        """
+        self.add_many([message])
+
+    def delete(self, message_id: int) -> None:
+        """## Removes a message.
+
+        #### Args:
+            message_id (int): The messages id.
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM messages WHERE id = ?", (int(message_id),))
+
+    def fill(
+        self,
+        client,
+        target: str | int,
+        *,
+        full: bool = False,
+        page_size: int = 200,
+        read_ahead: int = 2,
+        target_type: str = None,
+    ) -> int:
+        """## Stores the history of a chat.
+
+        #### Args:
+            client (Client): The client to read the history with.
+            target (str | int): The channel or conversation id.
+            full (bool, optional): Reads the whole history instead of the messages after the newest stored one. Defaults to False.
+            page_size (int, optional): The messages per request. Defaults to 200.
+            read_ahead (int, optional): Pages fetched in the background. Defaults to 2.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            int: The number of stored messages.
+        """
+        target_type = client.tools.get_type(target, target_type)
+        newest = None if full else self.newest_id(target, target_type)
+        window = HistoryWindow(after_id=newest)
+
+        stored = 0
+        with client.messages.history_pages(
+            target, page_size=page_size, read_ahead=read_ahead, target_type=target_type
+        ) as pages:
+            for page in pages:
+                selected = window.select(page)
+                stored += self.add_many(client.messages.decode_many(selected))
+
+                if window.done:
+                    break
+
+        return stored
+
+    def attach(self, client) -> None:
+        """## Stores the messages a client receives over its socket connection.
+
+        #### Args:
+            client (Client | AsyncClient): The client, attach before client.run().
+        """
+
+        if client.is_async:
+
+            async def callback(data):
+                self.add_many(await client.messages.decode_many([data["message"]]))
+
+        else:
+
+            def callback(data):
+                self.add_many(client.messages.decode_many([data["message"]]))
+
+        client.add_listener("message_sync", callback)
+        self._listeners.append((client, callback))
+
+    # reading
+
+    def newest_id(
+        self, target: str | int = None, target_type: str = None
+    ) -> int | None:
+        """## Returns the newest stored message id.
+
+        #### Args:
+            target (str | int, optional): Only of this chat. Defaults to all chats.
+            target_type (str, optional): The chats type, required with a target.
+
+        #### Returns:
+            int | None: The id or None if nothing is stored.
+        """
+        query, params = "SELECT MAX(id) FROM messages", ()
+        if target is not None:
+            query += " WHERE chat_type = ? AND chat_id = ?"
+            params = (target_type, int(target))
+
+        with self._lock:
+            return self._db.execute(query, params).fetchone()[0]
+
+    def get(self, message_id: int) -> dict | None:
+        """## Returns a stored message.
+
+        #### Args:
+            message_id (int): The messages id.
+
+        #### Returns:
+            dict | None: The row or None if it is not stored.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM messages WHERE id = ?", (int(message_id),)
+            ).fetchone()
+
+        return None if row is None else self._row(row)
+
+    def messages(
+        self,
+        target: str | int,
+        target_type: str,
+        *,
+        after=None,
+        before=None,
+        limit: int = 100,
+    ) -> list:
+        """## Returns the stored messages of a chat, newest first.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            target_type (str): "channel" or "conversation".
+            after (int | float | datetime, optional): Only messages sent after this time.
+            before (int | float | datetime, optional): Only messages sent before this time.
+            limit (int, optional): The maximum number of rows. Defaults to 100.
+
+        #### Returns:
+            list: The rows.
+        """
+        conditions, params = ["chat_type = ?", "chat_id = ?"], [
+            target_type,
+            int(target),
+        ]
+        self._time_bounds(conditions, params, after, before, "")
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM messages WHERE {' AND '.join(conditions)} "
+                "ORDER BY time DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+        return [self._row(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        *,
+        target: str | int = None,
+        target_type: str = None,
+        sender_id: int = None,
+        after=None,
+        before=None,
+        limit: int = 50,
+        order: str = "time",
+    ) -> list:
+        """## Searches the stored message texts.
+
+        #### Args:
+            query (str): An FTS5 query (words, "phrases", prefix*, AND / OR / NOT).
+            target (str | int, optional): Only in this chat. Defaults to all chats.
+            target_type (str, optional): The chats type, required with a target.
+            sender_id (int, optional): Only messages of this user. Defaults to None.
+            after (int | float | datetime, optional): Only messages sent after this time.
+            before (int | float | datetime, optional): Only messages sent before this time.
+            limit (int, optional): The maximum number of rows. Defaults to 50.
+            order (str, optional): "time" (newest first) or "rank" (best match first). Defaults to "time".
+
+        #### Returns:
+            list: The matching rows, with a "snippet" of the match if FTS5 is available.
+        """
+        conditions, params = [], []
+
+        if self.full_text:
+            select = (
+                "SELECT m.*, snippet(messages_fts, 0, '[', ']', '...', 12) AS snippet "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            )
+            conditions.append("messages_fts MATCH ?")
+            params.append(query)
+        else:
+            select = "SELECT m.* FROM messages m"
+            conditions.append("m.text LIKE ?")
+            params.append(f"%{query}%")
+
+        if target is not None:
+            conditions += ["m.chat_type = ?", "m.chat_id = ?"]
+            params += [target_type, int(target)]
+        if sender_id is not None:
+            conditions.append("m.sender_id = ?")
+            params.append(int(sender_id))
+        self._time_bounds(conditions, params, after, before, "m.")
+
+        if order == "rank" and self.full_text:
+            order_by = "messages_fts.rank"
+        else:
+            order_by = "m.time DESC, m.id DESC"
+
+        with self._lock:
+            rows = self._db.execute(
+                f"{select} WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+        return [self._row(row) for row in rows]
+
+    def _time_bounds(self, conditions, params, after, before, prefix):
+        after, before = _timestamp(after), _timestamp(before)
+        if after is not None:
+            conditions.append(f"{prefix}time > ?")
+            params.append(after)
+        if before is not None:
+            conditions.append(f"{prefix}time < ?")
+            params.append(before)
+
+    def _row(self, row) -> dict:
+        row = dict(row)
+        row["encrypted"] = bool(row["encrypted"])
+        row["file_ids"] = json.loads(row["file_ids"])
+        return row
@@ -0,0 +1,343 @@
+import json
+import os
+import threading
+import time
+
+from .history import HistoryWindow
+from .messages import _chat, _decoded_messages
+from .session import write_private_file
+
+
+def _chat_key(target_type: str, target) -> str:
+    return f"{target_type}:{int(target)}"
+
+
+def _cursor(payload: dict) -> dict:
+    return {
+        "message_id": int(payload["id"]),
+        "time": int(float(payload["time"])),
+        "updated_at": time.time(),
+    }
+
+
+class MemoryCursorStore:
+    """## Keeps sync cursors in memory (lost on restart)."""
+
+    def __init__(self):
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def get(self, chat: str) -> dict | None:
+        """## Returns the cursor of a chat.
+
+        #### Args:
+            chat (str): The chat, as "conversation:<id>" or "channel:<id>".
+
+        #### Returns:
+            dict | None: {"message_id", "time", "updated_at"} or None if the chat was never synced.
+        """
+        with self._lock:
+            cursor = self._cursors.get(chat)
+            return None if cursor is None else dict(cursor)
+
+    def set(self, chat: str, cursor: dict) -> None:
+        """## Stores the cursor of a chat.
+
+        #### Args:
+            chat (str): The chat, as "conversation:<id>" or "channel:<id>".
+            cursor (dict): {"message_id", "time", "updated_at"}.
+        """
+        with self._lock:
+            self._cursors[chat] = dict(cursor)
+
+    def delete(self, chat: str) -> None:
+        """## Forgets the cursor of a chat.
+
+        #### Args:
+            chat (str): The chat, as "conversation:<id>" or "channel:<id>".
+        """
+        with self._lock:
+            self._cursors.pop(chat, None)
+
+    def items(self) -> list:
+        """## Returns all cursors.
+
+        #### Returns:
+            list: (chat, cursor) tuples.
+        """
+        with self._lock:
+            return [(chat, dict(cursor)) for chat, cursor in self._cursors.items()]
+
+
+class JSONCursorStore(MemoryCursorStore):
+    """## Keeps sync cursors in a JSON file, rewritten on every change.
+
+    #### Args:
+        path (str): The files path.
+    """
+
+    version = 1
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = None
+
+        if isinstance(data, dict) and data.get("version") == self.version:
+            self._cursors = data["cursors"]
+
+    def _save(self):
+        content = json.dumps({"version": self.version, "cursors": self._cursors})
+        write_private_file(self.path, content)
+
+    def set(self, chat: str, cursor: dict) -> None:
+        with self._lock:
+            self._cursors[chat] = dict(cursor)
+            self._save()
+
+    def delete(self, chat: str) -> None:
+        with self._lock:
+            if self._cursors.pop(chat, None) is not None:
+                self._save()
+
+
+class SQLiteCursorStore:
+    """## Keeps sync cursors in a SQLite database.
+
+    #### Args:
+        path (str): The databases path.
+
+    #### Info:
+        :Each change is a single row write, so it scales to many chats and can
+        share a database file with other tables.
+    """
+
+    def __init__(self, path: str):
+        import sqlite3
+
+        self.path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sync_cursors ("
+                "chat TEXT PRIMARY KEY, message_id INTEGER NOT NULL, "
+                "time INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def get(self, chat: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT message_id, time, updated_at FROM sync_cursors WHERE chat = ?",
+                (chat,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {"message_id": row[0], "time": row[1], "updated_at": row[2]}
+
+    def set(self, chat: str, cursor: dict) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_cursors VALUES (?, ?, ?, ?)",
+                (chat, cursor["message_id"], cursor["time"], cursor["updated_at"]),
+            )
+
+    def delete(self, chat: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sync_cursors WHERE chat = ?", (chat,))
+
+    def items(self) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chat, message_id, time, updated_at FROM sync_cursors"
+            ).fetchall()
+
+        return [
+            (chat, {"message_id": message_id, "time": sent, "updated_at": updated_at})
+            for chat, message_id, sent, updated_at in rows
+        ]
+
+    def close(self) -> None:
+        """## Closes the database."""
+        with self._lock:
+            self._db.close()
+
+
+def cursor_store(store=None):
+    """## Creates a cursor store.
+
+    #### Args:
+        store (str | store, optional): A path (".db", ".sqlite" and ".sqlite3" use SQLite,
+            others JSON), a store instance or None for memory. Defaults to None.
+
+    #### Returns:
+        The cursor store.
+    """
+    if store is None:
+        return MemoryCursorStore()
+
+    if isinstance(store, str | os.PathLike):
+        if os.fspath(store).endswith((".db", ".sqlite", ".sqlite3")):
+            return SQLiteCursorStore(store)
+        return JSONCursorStore(store)
+
+    return store
+
+
+class SyncManager:
+    """## Fetches only the messages that are newer than the last synced one.
+
+    #### Info:
+        :Every chat has a cursor (the newest synced message id and time) in the
+        clients cursor store, a persistent store resumes after a restart. A sync
+        reads pages newest first and stops at the cursor, so it costs one small
+        request (and no decryption) when nothing changed.
+    """
+
+    def __init__(self, client, store=None):
+        self.client = client
+        self.store = cursor_store(store)
+
+    def cursor(self, target: str | int, target_type: str = None) -> dict | None:
+        """## Returns the cursor of a chat.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            dict | None: {"message_id", "time", "updated_at"} or None if the chat was never synced.
+        """
+        target_type = self.client.tools.get_type(target, target_type)
+        return self.store.get(_chat_key(target_type, target))
+
+    def reset(self, target: str | int, target_type: str = None) -> None:
+        """## Forgets the cursor of a chat, the next sync starts over.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+        """
+        target_type = self.client.tools.get_type(target, target_type)
+        self.store.delete(_chat_key(target_type, target))
+
+    def commit(self, message) -> None:
+        """## Moves the cursor of a messages chat to the message.
+
+        #### Args:
+            message (Message | dict): A message or its raw payload.
+        """
+        if isinstance(message, dict):
+            payload = message
+            target_type, target = _chat(payload)
+        else:
+            payload = {"id": message.id, "time": message.timestamp}
+            target_type, target = message.type, message.type_id
+
+        chat = _chat_key(target_type, target)
+        current = self.store.get(chat)
+
+        # never move a cursor back
+        if current is None or int(payload["id"]) > current["message_id"]:
+            self.store.set(chat, _cursor(payload))
+
+    def fetch(
+        self,
+        target: str | int,
+        *,
+        initial: int = 0,
+        page_size: int = 20,
+        commit: bool = True,
+        target_type: str = None,
+    ) -> list:
+        """## Returns the messages of a chat that are newer than its cursor.
+
+        #### Args:
+            target (str | int): The channel or conversation id.
+            initial (int, optional): Messages returned by the first sync of a chat. Defaults to 0.
+            page_size (int, optional): The messages per request. Defaults to 20.
+            commit (bool, optional): Moves the cursor to the newest message. Defaults to True.
+            target_type (str, optional): The targets type, skips the type lookup. Defaults to None.
+
+        #### Returns:
+            list: Message objects, oldest first.
+
+        #### Info:
+            :The first sync of a chat only places the cursor at the newest
+            message, unless initial asks for some of the existing messages.
+            With commit=False the cursor stays, call commit() after handling.
+        """
+        target_type = self.client.tools.get_type(target, target_type)
+        chat = _chat_key(target_type, target)
+        cursor = self.store.get(chat)
+
+        if cursor is None:
+            window = HistoryWindow(limit=max(1, initial))
+            page_size = min(page_size, window.limit)
+        else:
+            window = HistoryWindow(after_id=cursor["message_id"])
+
+        selected = []
+        with self.client.messages.history_pages(
+            target, page_size=page_size, read_ahead=0, target_type=target_type
+        ) as pages:
+            for page in pages:
+                selected.extend(window.select(page))
+                if window.done:
+                    break
+
+        if not selected:
+            return []
+
+        if commit:
+            self.store.set(chat, _cursor(selected[0]))
+
+        if cursor is None:
+            selected = selected[:initial]
+
+        selected.reverse()
+        return self.client.resolver.authors(
+            _decoded_messages(
+                self.client, selected, self.client.messages.decode_many(selected)
+            )
+        )
+
+    def fetch_all(self, targets: list = None, **kwargs) -> dict:
+        """## Syncs many chats.
+
+        #### Args:
+            targets (list, optional): (target, target_type) tuples or ids. Defaults to all chats with a cursor.
+            **kwargs: Passed to fetch().
+
+        #### Returns:
+            dict: Maps (target_type, target) to the new messages, chats without new messages are left out.
+        """
+        if targets is None:
+            targets = [
+                (int(target), target_type)
+                for target_type, target in (
+                    chat.split(":") for chat, _ in self.store.items()
+                )
+            ]
+
+        changes = {}
+        for target in targets:
+            target, target_type = (
+                target if isinstance(target, tuple) else (target, None)
+            )
+            target_type = self.client.tools.get_type(target, target_type)
+
+            messages = self.fetch(target, target_type=target_type, **kwargs)
+            if messages:
+                changes[target_type, int(target)] = messages
+
+        return changes
@@ -1,16 +1,122 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class TypeCache:
+    """## A bounded cache mapping chat ids to their type.
+
+    #### Args:
+        maxsize (int, optional): The maximum number of cached ids. Defaults to 4096.
+        ttl (int | float, optional): Seconds an entry stays valid. Defaults to 3600.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: int | float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, type_id: str | int) -> str | None:
+        """## Returns the cached type of an id.
+
+        #### Args:
+            type_id (str | int): The conversation or channel id.
+
+        #### Returns:
+            str | None: "conversation", "channel" or None if unknown / expired.
+        """
+        key = str(type_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            target_type, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return target_type
+
+    def set(self, type_id: str | int, target_type: str) -> None:
+        """## Stores the type of an id.
+
+        #### Args:
+            type_id (str | int): The conversation or channel id.
+            target_type (str): "conversation" or "channel".
+        """
+        if not type_id or str(type_id) == "0":
+            return
+
+        key = str(type_id)
+
+        with self._lock:
+            self._entries[key] = (target_type, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, type_id: str | int) -> None:
+        """## Removes an id from the cache.
+
+        #### Args:
+            type_id (str | int): The conversation or channel id.
+        """
+        with self._lock:
+            self._entries.pop(str(type_id), None)
+
+    def clear(self) -> None:
+        """## Removes all cached ids."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class Tools:
-    def __init__(self, client):
+    def __init__(self, client, type_cache_size=4096, type_cache_ttl=3600):
         self.client = client
+        self.types = TypeCache(type_cache_size, type_cache_ttl)
+
+    def remember(self, data: dict) -> None:
+        """## Seeds the type cache from a message, conversation or channel payload.
 
-    def get_type(self, type_id):
+        #### Args:
+            data (dict): A payload containing channel_id / conversation_id.
+        """
+        if not isinstance(data, dict):
+            return
+
+        # payloads carry the other id as "0" / 0, set() skips those
+        self.types.set(data.get("channel_id"), "channel")
+        self.types.set(data.get("conversation_id"), "conversation")
+
+    def get_type(self, type_id, target_type=None):
         """## Returns a location type.
 
         #### Args:
             type_id (int | str): The conversation or channel id
+            target_type (str, optional): A known type, skips the lookup. Defaults to None.
         """
-        if type_id == self.client.user_id:
+        if target_type is not None:
+            if target_type in ("conversation", "channel"):
+                self.types.set(type_id, target_type)
+            return target_type
+
+        if str(type_id) == str(self.client.user_id):
             return "personal"
 
+        cached = self.types.get(type_id)
+        if cached is not None:
+            return cached
+
         conversation_data = {
             "conversation_id": type_id,
             "source": "conversation",
@@ -25,10 +131,12 @@ class Tools:
         }
         try:
             self.client._post("message/content", data=conversation_data)
+            self.types.set(type_id, "conversation")
             return "conversation"
         except Exception:
             try:
                 self.client._post("message/content", data=channel_data)
+                self.types.set(type_id, "channel")
                 return "channel"
             except Exception:
                 return "404"
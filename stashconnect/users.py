@@ -20,6 +20,42 @@ class UserManager:
         )
         return response["user"]
 
+    def public_keys(self, user_ids: list, max_concurrency: int = 16) -> dict:
+        """## Gets the parsed public keys of users, uncached ones are fetched concurrently.
+
+        #### Args:
+            user_ids (list): The users ids.
+            max_concurrency (int, optional): The number of parallel users/info requests. Defaults to 16.
+
+        #### Returns:
+            dict: Maps the user ids to RSA public key objects.
+        """
+        keys = {}
+        missing = []
+
+        for user_id in dict.fromkeys(user_ids):
+            key = self.client.public_keys.get(user_id)
+            if key is None:
+                missing.append(user_id)
+            else:
+                keys[user_id] = key
+
+        if len(missing) == 1:
+            users = [self._info(missing[0])]
+        elif missing:
+            with self.client.batch(min(max_concurrency, len(missing))) as batch:
+                for user_id in missing:
+                    batch.users._info(user_id)
+
+            users = batch.results()
+        else:
+            users = []
+
+        for user_id, user in zip(missing, users):
+            keys[user_id] = self.client.public_keys.put(user["id"], user["public_key"])
+
+        return keys
+
     def info(self, user_id: str | int, withkey: bool = True) -> User:
         """## Gets a users user info.
 
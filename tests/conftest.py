@@ -0,0 +1,57 @@
+import pytest
+
+import stashconnect
+import stashconnect.aio
+
+from stashconnect.standin import StandInServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(push=False) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def alice(server):
+    return server.add_user("alice@example.com", "pw", encryption_password="enc")
+
+
+@pytest.fixture(scope="module")
+def bob(server):
+    return server.add_user("bob@example.com", "pw", encryption_password="enc")
+
+
+@pytest.fixture(scope="module")
+def connect(server, alice, bob):
+    def connect(email="alice@example.com", encryption_password="enc", **kwargs):
+        return stashconnect.Client(
+            email=email,
+            password="pw",
+            encryption_password=encryption_password,
+            api_url=server.api_url,
+            push_url=server.push_url,
+            **kwargs,
+        )
+
+    return connect
+
+
+@pytest.fixture(scope="module")
+def async_connect(server, alice, bob):
+    def connect(email="alice@example.com", **kwargs):
+        return stashconnect.aio.AsyncClient(
+            email=email,
+            password="pw",
+            encryption_password="enc",
+            api_url=server.api_url,
+            push_url=server.push_url,
+            **kwargs,
+        )
+
+    return connect
+
+
+@pytest.fixture(scope="module")
+def client(connect):
+    return connect()
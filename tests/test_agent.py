@@ -0,0 +1,101 @@
+import os
+import socket
+import stat
+
+import pytest
+
+from stashconnect import CryptoUtils
+from stashconnect.agent import AgentError, AgentKey, KeyAgent
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="the agent uses Unix sockets"
+)
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return CryptoUtils.generate_private_key()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "agent.sock")
+
+
+@pytest.fixture
+def agent(path, private_key):
+    with KeyAgent(path, private_key) as agent:
+        yield agent
+
+
+def test_socket_is_private(agent, path):
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_decrypt(agent, path, private_key):
+    keys = [os.urandom(32) for _ in range(3)]
+    public_key = CryptoUtils.public_key(private_key)
+    encrypted = [CryptoUtils.encrypt_key(key, public_key) for key in keys]
+
+    key = AgentKey(path)
+
+    assert key.decrypt(encrypted[0]) == keys[0]
+    assert key.decrypt_many(encrypted + ["broken"]) == keys + [None]
+    assert CryptoUtils.decrypt_key(encrypted[1], key) == keys[1]
+
+    with pytest.raises(ValueError):
+        key.decrypt("broken")
+
+
+def test_encrypt_and_public_key(agent, path, private_key):
+    key = AgentKey(path)
+    chat_key = os.urandom(32)
+
+    assert CryptoUtils.decrypt_key(key.encrypt(chat_key), private_key) == chat_key
+    assert CryptoUtils.export_public_key(
+        key.publickey()
+    ) == CryptoUtils.export_public_key(CryptoUtils.public_key(private_key))
+
+    other = CryptoUtils.generate_private_key()
+    encrypted = key.encrypt(
+        chat_key, CryptoUtils.export_public_key(CryptoUtils.public_key(other))
+    )
+    assert CryptoUtils.decrypt_key(encrypted, other) == chat_key
+
+
+def test_unknown_operation(agent, path):
+    with pytest.raises(AgentError):
+        AgentKey(path)._request({"op": "sign"})
+
+
+def test_reconnects_after_a_restart(path, private_key):
+    key = AgentKey(path)
+    chat_key = os.urandom(32)
+
+    with KeyAgent(path, private_key):
+        encrypted = key.encrypt(chat_key)
+
+    with KeyAgent(path, private_key):
+        assert key.decrypt(encrypted) == chat_key
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "SO_PEERCRED"), reason="peer credentials are Linux only"
+)
+def test_other_users_are_refused(path, private_key):
+    with KeyAgent(path, private_key, allowed_uids={os.getuid() + 1}):
+        with pytest.raises(OSError):
+            AgentKey(path, timeout=5).publickey()
+
+
+def test_client_with_key_agent(tmp_path, server, alice, bob, connect, client):
+    chat = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", chat["id"], bob["id"], "secret")
+
+    with KeyAgent.from_client(client, tmp_path / "client.sock"):
+        requests = server.requests["security/get_private_key"]
+        worker = connect(encryption_password=None, key_agent=tmp_path / "client.sock")
+
+        messages = worker.messages.get_messages(chat["id"])
+        assert [message.content for message in messages] == ["secret"]
+        assert server.requests["security/get_private_key"] == requests
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from stashconnect.batch import Batch
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    chat = server.add_conversation([alice["id"], bob["id"]], encrypted=False)
+    for index in range(3):
+        server.post_message("conversation", chat["id"], bob["id"], f"message {index}")
+
+    return chat
+
+
+def test_results_keep_the_submit_order(client):
+    def delayed(index):
+        # later calls finish first
+        time.sleep(0.01 * (5 - index))
+        return index
+
+    with client.batch(max_concurrency=5) as batch:
+        for index in range(5):
+            batch.submit(delayed, index)
+
+    assert batch.results() == list(range(5))
+
+
+def test_results_raise_or_return_exceptions(client):
+    def call(value):
+        if value == 1:
+            raise ValueError(value)
+        return value
+
+    with client.batch() as batch:
+        batch.map(call, range(3))
+
+    with pytest.raises(ValueError):
+        batch.results()
+
+    results = batch.results(return_exceptions=True)
+    assert results[0::2] == [0, 2]
+    assert isinstance(results[1], ValueError)
+
+
+def test_map_over_generators(client):
+    with client.batch() as batch:
+        futures = batch.map(pow, (base for base in range(4)), iter([2] * 4))
+
+    assert [future.result() for future in futures] == [0, 1, 4, 9]
+    assert batch.results() == [0, 1, 4, 9]
+
+
+def test_generator_calls_are_collected(client, chat):
+    with client.batch() as batch:
+        future = batch.messages.get_messages(chat["id"], target_type="conversation")
+
+    messages = future.result()
+
+    assert isinstance(messages, list)
+    assert sorted(message.content for message in messages) == [
+        f"message {index}" for index in range(3)
+    ]
+
+
+def test_close_waits_and_stops_the_workers(client):
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.1)
+        return "done"
+
+    batch = Batch(client, max_concurrency=2)
+    future = batch.submit(slow)
+    started.wait()
+    batch.close()
+
+    assert future.done() and future.result() == "done"
+    with pytest.raises(RuntimeError):
+        batch.submit(slow)
+
+
+def test_context_manager_closes_the_batch(client):
+    with client.batch() as batch:
+        future = batch.submit(time.sleep, 0.05)
+
+    assert future.done()
+    with pytest.raises(RuntimeError):
+        batch.submit(time.sleep, 0)
+
+
+def test_batches_grow_the_shared_connection_pool(connect):
+    client = connect()
+    adapter = client._session.get_adapter(client._main_url)
+    default = client._pool_size
+
+    client.batch(max_concurrency=default + 8).close()
+    grown = client._session.get_adapter(client._main_url)
+
+    assert client._pool_size == default + 8
+    assert grown is not adapter
+    assert grown._pool_maxsize == default + 8
+
+    # a smaller batch keeps the larger pool
+    client.batch(max_concurrency=2).close()
+    assert client._session.get_adapter(client._main_url) is grown
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from stashconnect import CryptoUtils, crypto_backends
+
+pytest.importorskip("cryptography")
+
+BACKENDS = ["pycryptodome", "cryptography"]
+
+
+@pytest.fixture(autouse=True)
+def backend(monkeypatch):
+    # every test starts without a selected backend and leaves none behind
+    monkeypatch.setattr(crypto_backends, "_backend", None)
+    monkeypatch.delenv("STASHCONNECT_CRYPTO_BACKEND", raising=False)
+
+
+def test_default_backend():
+    assert CryptoUtils.get_backend().name == crypto_backends.DEFAULT_BACKEND
+
+
+def test_backend_from_environment(monkeypatch):
+    monkeypatch.setenv("STASHCONNECT_CRYPTO_BACKEND", "cryptography")
+
+    assert CryptoUtils.get_backend().name == "cryptography"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        CryptoUtils.set_backend("openssl")
+
+
+def test_backends_are_created_once():
+    first = CryptoUtils.set_backend("cryptography")
+
+    assert CryptoUtils.set_backend("cryptography") is first
+    assert CryptoUtils.get_backend() is first
+
+
+@pytest.mark.parametrize("encrypting", BACKENDS)
+@pytest.mark.parametrize("decrypting", BACKENDS)
+def test_aes_is_interchangeable(encrypting, decrypting):
+    key, iv = os.urandom(32), os.urandom(16)
+    plain = os.urandom(1000)
+
+    CryptoUtils.set_backend(encrypting)
+    encrypted = CryptoUtils.encrypt_aes(plain, key, iv)
+
+    encryptor = CryptoUtils.aes_encryptor(key, iv)
+    streamed = encryptor.update(plain[:100]) + encryptor.update(plain[100:])
+    assert streamed + encryptor.finalize() == encrypted
+
+    CryptoUtils.set_backend(decrypting)
+    assert CryptoUtils.decrypt_aes(encrypted, key, iv) == plain
+
+
+@pytest.mark.parametrize("encrypting", BACKENDS)
+@pytest.mark.parametrize("decrypting", BACKENDS)
+def test_rsa_is_interchangeable(encrypting, decrypting):
+    CryptoUtils.set_backend(decrypting)
+    private_key = CryptoUtils.generate_private_key()
+    pem = CryptoUtils.export_public_key(CryptoUtils.public_key(private_key))
+
+    CryptoUtils.set_backend(encrypting)
+    key = os.urandom(32)
+    encrypted = CryptoUtils.encrypt_key(key, CryptoUtils.import_public_key(pem))
+
+    CryptoUtils.set_backend(decrypting)
+    assert CryptoUtils.decrypt_key(encrypted, private_key) == key
+
+
+def test_keys_keep_their_backend():
+    CryptoUtils.set_backend("pycryptodome")
+    private_key = CryptoUtils.generate_private_key()
+    public_key = CryptoUtils.public_key(private_key)
+
+    CryptoUtils.set_backend("cryptography")
+    key = os.urandom(32)
+
+    assert (
+        CryptoUtils.decrypt_key(CryptoUtils.encrypt_key(key, public_key), private_key)
+        == key
+    )
+    assert CryptoUtils.export_private_key(private_key)
+
+
+def test_client_after_switching(server, alice, bob, connect):
+    chat = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", chat["id"], bob["id"], "secret")
+
+    CryptoUtils.set_backend("pycryptodome")
+    client = connect()
+    CryptoUtils.set_backend("cryptography")
+
+    messages = client.messages.get_messages(chat["id"])
+    assert [message.content for message in messages] == ["secret"]
@@ -0,0 +1,111 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+import stashconnect.files
+
+
+class Pipe(io.RawIOBase):
+    # a readable stream that can not seek, like the stdout of a subprocess
+    def __init__(self, content, name):
+        self._content = io.BytesIO(content)
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._content.readinto(buffer)
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    return server.add_conversation([alice["id"], bob["id"]])
+
+
+@pytest.fixture(scope="module")
+def content():
+    # spans two upload chunks and does not end on a block boundary
+    return os.urandom(6 * 1024 * 1024 + 5)
+
+
+def test_encrypted_round_trip(tmp_path, client, chat, content):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(content)
+
+    file = client.files.upload(chat["id"], str(path), preview=False)
+
+    assert file.name == "upload.bin"
+    assert client.files.download_bytes(file.id, chunk_size=64 * 1024) == content
+
+    downloaded = client.files.download(file.id, str(tmp_path), "downloaded")
+    assert open(downloaded, "rb").read() == content
+
+
+def test_failed_download_keeps_the_target(tmp_path, server, client, chat):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(os.urandom(1000))
+    file = client.files.upload(chat["id"], str(path), preview=False)
+
+    # a truncated ciphertext fails to decrypt
+    stored = server.files[int(file.id)]
+    stored["content"] = stored["content"][:-1]
+
+    target = tmp_path / "downloaded.bin"
+    target.write_bytes(b"old")
+
+    with pytest.raises(ValueError):
+        client.files.download(file.id, str(tmp_path), "downloaded")
+
+    assert target.read_bytes() == b"old"
+    assert sorted(os.listdir(tmp_path)) == ["downloaded.bin", "upload.bin"]
+
+
+def test_upload_from_unseekable_stream(tmp_path, client, chat, content):
+    pipe = Pipe(content, str(tmp_path / "local" / "pipe.bin"))
+
+    file = client.files.upload(chat["id"], pipe, preview=False)
+
+    assert file.name == "pipe.bin"
+    assert client.files.download_bytes(file.id) == content
+
+
+def test_encrypted_upload_without_key_opens_nothing(
+    tmp_path, monkeypatch, server, connect, chat
+):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"content")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the file was opened")
+
+    monkeypatch.setattr(stashconnect.files, "open", fail, raising=False)
+    uploads = server.requests["file/upload"]
+
+    assert connect(encryption_password=None).files.upload(chat["id"], str(path)) is None
+    assert server.requests["file/upload"] == uploads
+
+
+def test_async_encrypted_round_trip(tmp_path, async_connect, chat, content):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(content)
+
+    async def round_trip():
+        async with async_connect() as client:
+            file = await client.files.upload(chat["id"], str(path), preview=False)
+            piped = await client.files.upload(
+                chat["id"], Pipe(content, str(tmp_path / "pipe.bin")), preview=False
+            )
+
+            downloaded = await client.files.download(
+                file.id, str(tmp_path), "downloaded", chunk_size=64 * 1024
+            )
+            return file, piped, downloaded, await client.files.download_bytes(piped.id)
+
+    file, piped, downloaded, piped_content = asyncio.run(round_trip())
+
+    assert (file.name, piped.name) == ("upload.bin", "pipe.bin")
+    assert open(downloaded, "rb").read() == content
+    assert piped_content == content
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+
+def fields(message):
+    return (
+        message.encrypted,
+        message.content_encrypted,
+        message.iv,
+        message.content,
+        message.longitude,
+        message.latitude,
+    )
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    return server.add_conversation([alice["id"], bob["id"]])
+
+
+@pytest.fixture(scope="module")
+def expected(client, chat):
+    client.messages.send(chat["id"], "hello", location=(1.5, 2.5))
+    client.messages.send(chat["id"], "plain", encrypted=False)
+
+    return {
+        message.id: fields(message)
+        for message in client.messages.get_messages(chat["id"])
+    }
+
+
+def test_expected_fields(expected):
+    plain, encrypted = sorted(expected.values(), key=lambda message: message[0])
+
+    assert encrypted[:1] + encrypted[3:] == (True, "hello", "2.5", "1.5")
+    assert encrypted[1] and encrypted[2]
+    assert plain[0] is False and plain[3] == "plain"
+
+
+def test_history_fields(client, chat, expected):
+    history = client.messages.history(chat["id"], page_size=1)
+
+    assert {message.id: fields(message) for message in history} == expected
+
+
+def test_sync_fields(client, chat, expected):
+    synced = client.sync.fetch(chat["id"], initial=10)
+
+    assert {message.id: fields(message) for message in synced} == expected
+
+
+def test_async_history_fields(async_connect, chat, expected):
+    async def read():
+        async with async_connect() as client:
+            return [message async for message in client.messages.history(chat["id"])]
+
+    history = asyncio.run(read())
+
+    assert {message.id: fields(message) for message in history} == expected
+
+
+def test_async_sync_fields(async_connect, chat, expected):
+    async def read():
+        async with async_connect() as client:
+            return await client.sync.fetch(chat["id"], initial=10)
+
+    synced = asyncio.run(read())
+
+    assert {message.id: fields(message) for message in synced} == expected
+
+
+def test_sync_commit_with_string_ids(server, connect, bob, chat):
+    payload = server.post_message("conversation", chat["id"], bob["id"], "committed")
+    client = connect()
+
+    client.sync.commit(dict(payload, channel_id="0", conversation_id=str(chat["id"])))
+
+    assert client.sync.store.get(f"conversation:{chat['id']}")["message_id"] == int(
+        payload["id"]
+    )
+    assert client.sync.store.get("channel:0") is None
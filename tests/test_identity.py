@@ -0,0 +1,76 @@
+import gc
+import threading
+import time
+
+from stashconnect.models import User
+
+
+def test_one_shared_object_per_id(server, connect, bob):
+    client = connect()
+
+    user = client.users.info(bob["id"])
+
+    assert client.users.info(bob["id"]) is user
+    assert User(client, {"id": bob["id"]}) is user
+    assert User(client, {"id": str(bob["id"])}) is user
+    assert client.identities.get(User, bob["id"]) is user
+    assert client.identities.stats()["hits"] == 3
+
+
+def test_partial_data_refreshes_after_the_ttl(server, connect, bob):
+    client = connect(identity_ttl=0.05)
+    user = client.users.info(bob["id"])
+    infos = server.requests["users/info"]
+
+    bob["status"] = "refreshed"
+    try:
+        assert User(client, {"id": bob["id"]}).status == ""
+        assert server.requests["users/info"] == infos
+
+        time.sleep(0.1)
+
+        assert User(client, {"id": bob["id"]}) is user
+        assert server.requests["users/info"] == infos + 1
+        assert user.status == "refreshed"
+    finally:
+        bob["status"] = ""
+
+
+def test_concurrent_misses_fetch_once(server, connect, bob):
+    client = connect(identity_ttl=0.05)
+    user = client.users.info(bob["id"])
+    time.sleep(0.1)
+
+    infos = server.requests["users/info"]
+    barrier = threading.Barrier(8)
+    results = []
+
+    def build():
+        barrier.wait()
+        results.append(User(client, {"id": bob["id"]}))
+
+    server.set_latency("users/info", 0.2)
+    try:
+        threads = [threading.Thread(target=build) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.endpoint_latency.pop("users/info")
+
+    assert server.requests["users/info"] == infos + 1
+    assert all(result is user for result in results)
+
+
+def test_unused_objects_are_collected(connect, bob):
+    client = connect()
+
+    user = client.users.info(bob["id"])
+    assert len(client.identities) == 1
+
+    del user
+    gc.collect()
+
+    assert client.identities.get(User, bob["id"]) is None
+    assert len(client.identities) == 0
@@ -0,0 +1,171 @@
+import os
+import time
+
+import pytest
+
+from stashconnect import CryptoUtils
+from stashconnect.crypto_utils import TimedCrypto
+from stashconnect.keycache import PublicKeyCache, decrypt_keys, wrap_keys
+from stashconnect.metrics import MetricsRegistry
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return CryptoUtils.generate_private_key()
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {str(target): os.urandom(32) for target in range(40)}
+
+
+@pytest.fixture(scope="module")
+def encrypted_keys(private_key, keys):
+    public_key = CryptoUtils.public_key(private_key)
+    return {
+        target: CryptoUtils.encrypt_key(key, public_key) for target, key in keys.items()
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_decrypt_keys(private_key, keys, encrypted_keys, workers):
+    assert decrypt_keys(encrypted_keys, private_key, workers=workers) == keys
+
+
+def test_decrypt_keys_skips_broken_keys(private_key, keys, encrypted_keys):
+    broken = dict(encrypted_keys)
+    broken["0"] = CryptoUtils.encrypt_key(
+        os.urandom(32), CryptoUtils.public_key(CryptoUtils.generate_private_key())
+    )
+
+    decrypted = decrypt_keys(broken, private_key, workers=4, min_pool_size=1)
+
+    assert "0" not in decrypted
+    assert len(decrypted) == len(keys) - 1
+
+
+def test_decrypt_keys_records_into_the_given_registry(private_key, encrypted_keys):
+    metrics = MetricsRegistry()
+
+    decrypt_keys(encrypted_keys, private_key, workers=4, crypto=TimedCrypto(metrics))
+
+    assert (
+        f'stashconnect_crypto_operations_total{{operation="rsa_decrypt"}} '
+        f"{len(encrypted_keys)}" in metrics.to_prometheus()
+    )
+
+
+def test_prefetch_keys(server, alice, bob, client):
+    chats = [server.add_conversation([alice["id"], bob["id"]]) for _ in range(3)]
+    targets = [chat["id"] for chat in chats]
+
+    assert client.prefetch_keys(targets, workers=2) == len(targets)
+    assert all(target in client.conversation_keys for target in targets)
+
+
+def test_run_warms_the_key_cache(server, alice, bob, connect):
+    chat = server.add_conversation([alice["id"], bob["id"]])
+    client = connect()
+
+    # without events or loops run() returns after the warm-up
+    client.run()
+
+    assert chat["id"] in client.conversation_keys
+
+
+def _pem(private_key):
+    return CryptoUtils.export_public_key(CryptoUtils.public_key(private_key))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_wrap_keys(private_key, workers):
+    key = os.urandom(32)
+    public_keys = {str(target): CryptoUtils.public_key(private_key) for target in range(8)}
+
+    wrapped = wrap_keys(key, public_keys, workers=workers, min_pool_size=1)
+
+    assert list(wrapped) == list(public_keys)
+    assert all(
+        CryptoUtils.decrypt_key(encrypted, private_key) == key
+        for encrypted in wrapped.values()
+    )
+
+
+def test_wrap_keys_records_into_the_given_registry(private_key):
+    metrics = MetricsRegistry()
+    public_keys = {"1": CryptoUtils.public_key(private_key)}
+
+    wrap_keys(os.urandom(32), public_keys, crypto=TimedCrypto(metrics))
+
+    assert (
+        'stashconnect_crypto_operations_total{operation="rsa_encrypt"} 1'
+        in metrics.to_prometheus()
+    )
+
+
+def test_public_key_cache_counts_hits_and_misses(private_key):
+    cache = PublicKeyCache()
+
+    assert cache.get(1) is None
+    parsed = cache.put(1, _pem(private_key))
+
+    assert cache.get("1") is parsed
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_public_key_cache_expires(private_key):
+    cache = PublicKeyCache(ttl=0.05)
+    cache.put(1, _pem(private_key))
+
+    assert 1 in cache
+    time.sleep(0.1)
+    assert cache.get(1) is None
+
+
+def test_public_key_cache_is_bounded(private_key):
+    cache = PublicKeyCache(maxsize=2)
+    pem = _pem(private_key)
+    for user_id in range(3):
+        cache.put(user_id, pem)
+
+    assert cache.get(0) is None
+    assert cache.get(1) is not None and cache.get(2) is not None
+    assert len(cache) == 2
+
+
+def test_public_key_cache_keeps_an_unchanged_key_after_the_ttl(private_key, capsys):
+    cache = PublicKeyCache(ttl=0.05)
+    parsed = cache.put(1, _pem(private_key))
+
+    time.sleep(0.1)
+    assert cache.get(1) is None
+
+    assert cache.put(1, _pem(private_key)) is parsed
+    assert "changed" not in capsys.readouterr().out
+
+
+def test_public_key_cache_warns_on_a_changed_key(private_key, capsys):
+    cache = PublicKeyCache(ttl=0.05)
+    cache.put(1, _pem(private_key))
+
+    time.sleep(0.1)
+    assert cache.get(1) is None
+
+    other = CryptoUtils.generate_private_key()
+    cache.put(1, _pem(other))
+
+    assert "the public key of user 1 changed" in capsys.readouterr().out
+    assert CryptoUtils.export_public_key(cache.get(1)) == _pem(other)
+
+
+def test_public_keys_refetch_warns_on_a_changed_key(server, connect, capsys):
+    carol = server.add_user("carol@example.com", "pw", encryption_password="enc")
+    client = connect(public_key_ttl=0.05)
+
+    client.users.public_keys([carol["id"]])
+    time.sleep(0.1)
+    carol["public_key"] = _pem(CryptoUtils.generate_private_key())
+    keys = client.users.public_keys([carol["id"]])
+
+    assert f"the public key of user {carol['id']} changed" in capsys.readouterr().out
+    assert CryptoUtils.export_public_key(keys[carol["id"]]) == carol["public_key"]
@@ -0,0 +1,38 @@
+from stashconnect.session import SessionStore
+
+
+def test_lazy_client_logs_in_on_first_use(server, connect, alice):
+    logins = server.requests["auth/login"]
+
+    client = connect(lazy=True, encryption_password=None)
+    assert server.requests["auth/login"] == logins
+
+    assert str(client.user_id) == str(alice["id"])
+    assert server.requests["auth/login"] == logins + 1
+
+
+def test_lazy_client_imports_the_private_key_in_the_background(
+    server, connect, alice, bob
+):
+    chat = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", chat["id"], bob["id"], "secret")
+
+    client = connect(lazy=True)
+
+    assert client.wait_for_private_key(timeout=30)
+    assert [
+        message.content for message in client.messages.get_messages(chat["id"])
+    ] == ["secret"]
+
+
+def test_lazy_resume_with_stored_private_key(tmp_path, server, connect):
+    path = tmp_path / "session.json"
+    connect(session_store=SessionStore(path, store_private_key=True))
+
+    requests = server.requests.copy()
+    client = connect(
+        lazy=True, session_store=SessionStore(path, store_private_key=True)
+    )
+
+    assert client.wait_for_private_key(timeout=30)
+    assert server.requests - requests == {"users/me": 1}
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from stashconnect.models import Message
+
+
+@pytest.fixture(scope="module")
+def payloads(server, alice, bob):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    channel = server.add_channel("decode", [alice["id"], bob["id"]])
+
+    return [
+        server.post_message("conversation", conversation["id"], bob["id"], "to alice"),
+        server.post_message("channel", channel["id"], bob["id"], "to the channel"),
+    ]
+
+
+def test_decode_many(connect, payloads):
+    decoded = connect().messages.decode_many(payloads)
+
+    assert [payload["text"] for payload in decoded] == ["to alice", "to the channel"]
+    assert not any(payload["encrypted"] for payload in decoded)
+    assert [payload["ciphertext"]["text"] for payload in decoded] == [
+        payload["text"] for payload in payloads
+    ]
+
+
+def test_decode_many_with_string_ids(connect, payloads):
+    client = connect()
+    stringified = [
+        dict(
+            payload,
+            channel_id=str(payload["channel_id"]),
+            conversation_id=str(payload["conversation_id"]),
+        )
+        for payload in payloads
+    ]
+
+    decoded = client.messages.decode_many(stringified)
+
+    assert [payload["text"] for payload in decoded] == ["to alice", "to the channel"]
+    assert [Message(client, payload).type for payload in stringified] == [
+        "conversation",
+        "channel",
+    ]
+
+
+def test_async_received_message_with_string_ids(async_connect, payloads):
+    payload = dict(payloads[0], channel_id="0")
+
+    async def build():
+        async with async_connect() as client:
+            return await client._build_message(payload)
+
+    message = asyncio.run(build())
+
+    assert (message.type, message.content) == ("conversation", "to alice")
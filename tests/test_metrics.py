@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from stashconnect.metrics import MetricsRegistry
+
+
+def transfers(metrics, direction):
+    return (
+        f'stashconnect_file_transfer_bytes_total{{direction="{direction}"}}'
+        in metrics.to_prometheus()
+    )
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", conversation["id"], bob["id"], "secret")
+    return conversation
+
+
+def test_crypto_is_recorded_per_client(connect, chat):
+    first, second = MetricsRegistry(), MetricsRegistry()
+
+    client = connect(metrics=first)
+    connect(metrics=second)
+    assert [m.content for m in client.messages.get_messages(chat["id"])] == ["secret"]
+
+    assert 'operation="rsa_decrypt"' in first.to_prometheus()
+    assert 'operation="rsa_decrypt"' not in second.to_prometheus()
+
+
+def test_sync_transfers_are_recorded(connect, chat):
+    client = connect(metrics=True)
+
+    file = client.files.upload(chat["id"], b"content", "a.txt", preview=False)
+    client.files.download_bytes(file.id)
+
+    assert transfers(client.metrics, "upload")
+    assert transfers(client.metrics, "download")
+
+
+def test_async_transfers_are_recorded(async_connect, chat):
+    async def transfer():
+        async with async_connect(metrics=True) as client:
+            file = await client.files.upload(
+                chat["id"], b"content", "a.txt", preview=False
+            )
+            await client.files.download_bytes(file.id)
+            return client.metrics
+
+    metrics = asyncio.run(transfer())
+
+    assert transfers(metrics, "upload")
+    assert transfers(metrics, "download")
@@ -0,0 +1,119 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from stashconnect.models import Channel, Conversation, Message, User
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", conversation["id"], bob["id"], "secret hello")
+    return conversation
+
+
+@pytest.fixture(scope="module")
+def message(client, chat):
+    return next(client.messages.get_messages(chat["id"]))
+
+
+def test_message_to_dict(message):
+    data = message.to_dict()
+    json.dumps(data)
+
+    assert message.content == "secret hello"
+    assert data["encrypted"]
+    assert data["text"] != "secret hello"
+    assert "ciphertext" not in data
+
+
+def test_message_to_dict_decrypted(client, message):
+    data = message.to_dict()
+    decrypted = message.to_dict(decrypted=True)
+    json.dumps(decrypted)
+
+    assert decrypted["text"] == "secret hello"
+    assert not decrypted["encrypted"]
+    assert decrypted["ciphertext"]["text"] == data["text"]
+
+    restored = Message.from_dict(decrypted)
+    assert restored.client is None
+    assert restored.content == "secret hello"
+    assert restored.to_dict() == data
+
+    assert Message.from_dict(data, client).content == "secret hello"
+
+
+def test_message_pickle(client, message):
+    pickled = pickle.dumps(message)
+    restored = pickle.loads(pickled)
+
+    assert b"secret hello" not in pickled
+    assert restored is not message
+    assert restored.client is client
+    assert restored.content == "secret hello"
+    assert restored.to_dict() == message.to_dict()
+
+
+def test_conversation_round_trip(client, chat):
+    conversation = client.conversations.info(chat["id"])
+    data = conversation.to_dict()
+    json.dumps(data)
+
+    assert "conversation_key" not in data
+    assert "conversation_key" in conversation.to_dict(decrypted=True)
+
+    restored = Conversation.from_dict(data)
+    assert restored.client is None
+    assert restored.conversation_key is None
+    assert restored.members[0].client is None
+    assert restored.to_dict() == data
+
+    decrypted = Conversation.from_dict(conversation.to_dict(decrypted=True))
+    assert decrypted.conversation_key == conversation.conversation_key
+
+    unpickled = pickle.loads(pickle.dumps(conversation))
+    assert unpickled.client is client
+    assert unpickled.conversation_key == conversation.conversation_key
+
+
+def test_channel_round_trip(server, alice, bob, client):
+    created = server.add_channel("models", [alice["id"], bob["id"]])
+    channel = next(
+        channel
+        for channel in client.channels.joined(created["company"])
+        if str(channel.id) == str(created["id"])
+    )
+    data = channel.to_dict()
+    json.dumps(data)
+
+    assert Channel.from_dict(data).to_dict() == data
+
+    unpickled = pickle.loads(pickle.dumps(channel))
+    assert unpickled.client is client
+    assert unpickled.to_dict() == data
+
+
+def test_user_round_trip(message):
+    data = message.author.to_dict()
+
+    assert User.from_dict(data).to_dict() == data
+    assert copy.deepcopy(message.author).to_dict() == data
+    assert pickle.loads(pickle.dumps(message.author)).to_dict() == data
+
+
+def test_conversation_from_dict_sends_no_requests(server, client, connect, chat):
+    data = client.conversations.info(chat["id"]).to_dict()
+    other = connect()
+
+    requests = server.requests.copy()
+    restored = Conversation.from_dict(data, other)
+    unpickled = pickle.loads(pickle.dumps(restored))
+
+    assert server.requests == requests
+    assert restored.conversation_key == client.conversations.info(
+        chat["id"]
+    ).conversation_key
+    assert unpickled.to_dict(decrypted=True)["conversation_key"]
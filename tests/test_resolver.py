@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from stashconnect.models import File, User
+
+
+@pytest.fixture(scope="module")
+def chat(server, alice, bob):
+    return server.add_conversation([alice["id"], bob["id"]])
+
+
+@pytest.fixture(scope="module")
+def file_ids(tmp_path_factory, client, chat):
+    ids = []
+    for index in range(3):
+        path = tmp_path_factory.mktemp("resolver") / f"file{index}.txt"
+        path.write_bytes(b"content")
+        ids.append(client.files.upload(chat["id"], str(path), preview=False).id)
+
+    return ids
+
+
+@pytest.fixture(scope="module")
+def users(server):
+    return [
+        server.add_user(f"resolver{index}@example.com", "pw") for index in range(4)
+    ]
+
+
+def test_files_are_filled_with_one_bulk_request(server, connect, file_ids):
+    client = connect()
+    infos = server.requests["file/infos"]
+
+    with client.resolver.collect():
+        files = [File(client, {"id": file_id}) for file_id in file_ids]
+
+    assert server.requests["file/infos"] == infos + 1
+    assert client.resolver.requests == 1
+    assert [file.name for file in files] == [f"file{index}.txt" for index in range(3)]
+
+
+def test_users_are_filled_concurrently(server, connect, users):
+    client = connect()
+    infos = server.requests["users/info"]
+
+    server.set_latency("users/info", 0.3)
+    try:
+        start = time.perf_counter()
+        with client.resolver.collect():
+            stubs = [User(client, {"id": user["id"]}) for user in users]
+            # a second reference of an id is the shared stub, it is requested once
+            stubs.append(User(client, {"id": users[0]["id"]}))
+
+        elapsed = time.perf_counter() - start
+    finally:
+        server.endpoint_latency.pop("users/info")
+
+    assert server.requests["users/info"] == infos + len(users)
+    assert elapsed < 0.3 * len(users)
+    assert [stub.email for stub in stubs] == [user["email"] for user in users] + [
+        users[0]["email"]
+    ]
+
+
+def test_stubs_are_filled_on_first_access(server, connect, users):
+    client = connect()
+    infos = server.requests["users/info"]
+
+    stubs = [User(client, {"id": user["id"]}) for user in users[:2]]
+    assert server.requests["users/info"] == infos
+
+    # fills all pending stubs at once
+    assert stubs[1].email == users[1]["email"]
+    assert server.requests["users/info"] == infos + 2
+    assert stubs[0].email == users[0]["email"]
+
+
+def test_access_inside_collect_fills_the_stub(server, connect, users):
+    client = connect()
+    infos = server.requests["users/info"]
+
+    with client.resolver.collect():
+        stub = User(client, {"id": users[2]["id"]})
+        assert stub.email == users[2]["email"]
+
+    assert server.requests["users/info"] == infos + 1
+
+
+def test_stubs_of_a_failed_collect_stay_pending(server, connect, users):
+    client = connect()
+    infos = server.requests["users/info"]
+
+    with pytest.raises(RuntimeError):
+        with client.resolver.collect():
+            stub = User(client, {"id": users[3]["id"]})
+            raise RuntimeError
+
+    assert server.requests["users/info"] == infos
+    assert stub.email == users[3]["email"]
+
+
+def test_fetch_errors_leave_the_stubs_unfilled(server, connect, file_ids, capsys):
+    client = connect()
+    server.fail("file/infos", status=403)
+
+    with client.resolver.collect():
+        file = File(client, {"id": file_ids[0]})
+        user = User(client, {"id": 999999})
+
+    assert f"File {file_ids[0]}" in capsys.readouterr().out
+
+    with pytest.raises(AttributeError):
+        file.name
+    with pytest.raises(AttributeError):
+        user.email
@@ -0,0 +1,120 @@
+import pytest
+import requests
+
+import stashconnect
+
+from stashconnect import RequestScheduler
+from stashconnect.exceptions import (
+    ConnectError,
+    NetworkError,
+    RateLimitError,
+    ServerError,
+)
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(backoff_base=0.01)
+
+
+@pytest.fixture
+def retrying(connect, scheduler):
+    return connect(scheduler=scheduler)
+
+
+@pytest.fixture
+def chat(server, alice, bob):
+    return server.add_conversation([alice["id"], bob["id"]], encrypted=False)
+
+
+def test_retry_delay_policy(scheduler):
+    assert scheduler.retry_delay("message/send", 0, ServerError()) is None
+    assert scheduler.retry_delay("message/send", 0, NetworkError()) is None
+    assert scheduler.retry_delay("message/send", 0, RateLimitError()) is not None
+    assert scheduler.retry_delay("message/send", 0, ConnectError()) is not None
+    assert scheduler.retry_delay("message/content", 0, ServerError()) is not None
+    assert scheduler.retry_delay("message/send", 0, ServerError(), True) is not None
+    assert scheduler.retry_delay("message/content", 3, ServerError()) is None
+    assert scheduler.stats["unsafe_retries_skipped"] == 2
+
+
+def test_retry_after_is_respected(scheduler):
+    assert scheduler.retry_delay("message/send", 0, RateLimitError(retry_after=2)) >= 2
+
+
+def test_write_is_not_retried_on_server_error(server, retrying, chat):
+    sent = server.requests["message/send"]
+    server.fail("message/send", 503)
+
+    with pytest.raises(ServerError):
+        retrying.messages.send(chat["id"], "hello", encrypted=False)
+
+    assert server.requests["message/send"] - sent == 1
+
+
+def test_write_is_retried_on_rate_limit(server, retrying, chat):
+    sent = server.requests["message/send"]
+    server.fail("message/send", 429, retry_after=0.01)
+
+    retrying.messages.send(chat["id"], "hello", encrypted=False)
+
+    assert server.requests["message/send"] - sent == 2
+
+
+def test_read_is_retried_on_server_error(server, retrying, chat):
+    read = server.requests["message/content"]
+    server.fail("message/content", 503)
+
+    list(retrying.messages.get_messages(chat["id"], target_type="conversation"))
+
+    assert server.requests["message/content"] - read == 2
+
+
+def test_write_retries_are_opt_in(server, retrying, chat, scheduler):
+    retrying.messages.send(chat["id"], "hello", encrypted=False)
+    message = next(retrying.messages.get_messages(chat["id"]))
+    data = {"message_id": message.id}
+
+    server.fail("message/like", 503)
+    with pytest.raises(ServerError):
+        retrying._post("message/like", data=data)
+
+    server.fail("message/like", 503)
+    retrying._post("message/like", data=data, idempotent=True)
+
+    assert scheduler.stats["unsafe_retries_skipped"] == 1
+
+
+def test_http_errors_are_requests_http_errors(server, retrying, chat):
+    server.fail("message/send", 403)
+
+    with pytest.raises(requests.HTTPError) as error:
+        retrying.messages.send(chat["id"], "hello", encrypted=False)
+
+    assert isinstance(error.value, stashconnect.HTTPError)
+    assert error.value.response.status_code == error.value.status_code == 403
+
+
+def test_unreachable_server_raises_connect_error(server):
+    scheduler = RequestScheduler(backoff_base=0.01, max_retries=1)
+
+    with pytest.raises(requests.ConnectionError) as error:
+        stashconnect.Client(
+            email="alice@example.com",
+            password="pw",
+            api_url="http://127.0.0.1:9",
+            push_url=server.push_url,
+            scheduler=scheduler,
+        )
+
+    assert scheduler.stats["retries"] == 1
+    assert isinstance(error.value, ConnectError)
+
+
+def test_only_the_exceptions_are_exported():
+    from stashconnect import exceptions
+
+    for name in exceptions.__all__:
+        assert getattr(stashconnect, name) is getattr(exceptions, name)
+
+    assert not hasattr(stashconnect, "parse_retry_after")
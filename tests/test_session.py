@@ -0,0 +1,75 @@
+import asyncio
+import json
+import stat
+
+import pytest
+
+from stashconnect.session import SessionStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "sessions" / "session.json"
+
+
+def test_login_saves_a_private_session(path, connect):
+    client = connect(session_store=SessionStore(path))
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+    session = json.loads(path.read_text())
+    assert session["client_key"] == client.client_key
+    assert session["encrypted_private_key"]
+    assert "private_key" not in session
+
+
+def test_resume_skips_login_and_key_request(path, server, connect):
+    first = connect(session_store=SessionStore(path))
+
+    requests = server.requests.copy()
+    client = connect(session_store=SessionStore(path))
+
+    assert server.requests - requests == {"users/me": 1}
+    assert client.client_key == first.client_key
+    assert client.socket_id == first.socket_id
+    assert client._private_key is not None
+
+
+def test_stored_private_key(path, connect):
+    connect(session_store=SessionStore(path, store_private_key=True))
+    assert json.loads(path.read_text())["private_key"]
+
+    client = connect(session_store=SessionStore(path, store_private_key=True))
+    assert client._private_key is not None
+
+
+def test_async_stored_private_key(path, async_connect):
+    async def connect():
+        store = SessionStore(path, store_private_key=True)
+        async with async_connect(session_store=store) as client:
+            return client._private_key
+
+    assert asyncio.run(connect()) is not None
+    assert json.loads(path.read_text())["private_key"]
+    assert asyncio.run(connect()) is not None
+
+
+def test_revoked_session_logs_in_again(path, server, connect):
+    connect(session_store=SessionStore(path))
+    SessionStore(path).update(client_key="revoked")
+
+    logins = server.requests["auth/login"]
+    client = connect(session_store=SessionStore(path))
+
+    assert server.requests["auth/login"] == logins + 1
+    assert json.loads(path.read_text())["client_key"] == client.client_key
+
+
+def test_session_of_another_account_is_ignored(path, server, connect):
+    connect(session_store=SessionStore(path))
+
+    logins = server.requests["auth/login"]
+    client = connect("bob@example.com", session_store=SessionStore(path))
+
+    assert server.requests["auth/login"] == logins + 1
+    assert client.first_name == "bob"
@@ -0,0 +1,101 @@
+import pytest
+
+from stashconnect.store import MessageStore
+
+
+@pytest.fixture(scope="module")
+def chats(server, alice, bob):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    channel = server.add_channel("general", [alice["id"], bob["id"]])
+
+    for i in range(250):
+        text = "invoice due" if i % 50 == 0 else "chat"
+        server.post_message(
+            "conversation", conversation["id"], bob["id"], f"{text} {i}"
+        )
+    for i in range(5):
+        server.post_message("channel", channel["id"], bob["id"], f"channel text {i}")
+
+    return conversation, channel
+
+
+@pytest.fixture
+def store():
+    with MessageStore() as store:
+        yield store
+
+
+def test_fill(server, client, chats, store):
+    conversation, channel = chats
+
+    assert store.fill(client, conversation["id"], page_size=100) == 250
+    assert store.fill(client, channel["id"]) == 5
+    assert len(store) == 255
+
+    requests = server.requests["message/content"]
+    assert store.fill(client, conversation["id"]) == 0
+    assert server.requests["message/content"] - requests == 1
+
+
+def test_fill_is_incremental(server, alice, bob, client, store):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    for i in range(3):
+        server.post_message("conversation", conversation["id"], bob["id"], f"early {i}")
+    store.fill(client, conversation["id"])
+
+    server.post_message("conversation", conversation["id"], bob["id"], "late")
+
+    assert store.fill(client, conversation["id"]) == 1
+    assert store.fill(client, conversation["id"], full=True) == 4
+    assert len(store) == 4
+
+
+def test_search(client, chats, store):
+    conversation, channel = chats
+    store.fill(client, conversation["id"])
+    store.fill(client, channel["id"])
+
+    results = store.search("invoice")
+
+    assert len(results) == 5
+    assert results[0]["text"] == "invoice due 200"
+    assert results[0]["sender_name"]
+    assert all(not result["encrypted"] for result in results)
+
+    assert (
+        len(store.search("invoice", target=channel["id"], target_type="channel")) == 0
+    )
+    assert len(store.search('"channel text"', order="rank")) == 5
+    assert len(store.search("chat", limit=10)) == 10
+
+
+def test_persisted(tmp_path, client, chats):
+    conversation, _ = chats
+    path = tmp_path / "messages.db"
+
+    with MessageStore(path) as store:
+        store.fill(client, conversation["id"])
+
+    assert (path.stat().st_mode & 0o777) == 0o600
+
+    with MessageStore(path) as store:
+        assert len(store) == 250
+        assert store.search("invoice")
+
+
+def test_payload_with_string_ids(server, alice, bob, client, store):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    payload = server.post_message(
+        "conversation", conversation["id"], bob["id"], "string ids"
+    )
+    (decoded,) = client.messages.decode_many(
+        [dict(payload, channel_id="0", conversation_id=str(conversation["id"]))]
+    )
+
+    store.add(decoded)
+
+    (row,) = store.messages(conversation["id"], "conversation")
+    assert (row["chat_type"], row["chat_id"]) == ("conversation", conversation["id"])
+    assert store.search(
+        '"string ids"', target=conversation["id"], target_type="conversation"
+    )
@@ -0,0 +1,62 @@
+import time
+
+from stashconnect.models import Message
+from stashconnect.tools import Tools, TypeCache
+
+
+def test_type_cache_expires():
+    cache = TypeCache(ttl=0.05)
+    cache.set(1, "channel")
+
+    assert cache.get("1") == "channel"
+    time.sleep(0.1)
+    assert cache.get(1) is None
+
+
+def test_type_cache_is_bounded():
+    cache = TypeCache(maxsize=2)
+    for type_id in range(3):
+        cache.set(type_id + 1, "conversation")
+
+    assert cache.get(1) is None
+    assert cache.get(2) == cache.get(3) == "conversation"
+    assert len(cache) == 2
+
+
+def test_remember_ignores_zero_ids():
+    tools = Tools(None)
+
+    tools.remember({"channel_id": "0", "conversation_id": "12"})
+    tools.remember({"channel_id": 5, "conversation_id": 0})
+
+    assert tools.types.get(12) == "conversation"
+    assert tools.types.get(5) == "channel"
+    assert tools.types.get(0) is None
+
+
+def test_get_type_probes_once(server, alice, bob, connect):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    channel = server.add_channel("types", [alice["id"], bob["id"]])
+    client = connect()
+
+    probes = server.requests["message/content"]
+    assert client.tools.get_type(conversation["id"]) == "conversation"
+    assert client.tools.get_type(channel["id"]) == "channel"
+    assert server.requests["message/content"] - probes == 3
+
+    assert client.tools.get_type(conversation["id"]) == "conversation"
+    assert client.tools.get_type(channel["id"]) == "channel"
+    assert client.tools.get_type(client.user_id) == "personal"
+    assert server.requests["message/content"] - probes == 3
+
+
+def test_messages_seed_the_type_cache(server, alice, bob, connect, client):
+    conversation = server.add_conversation([alice["id"], bob["id"]])
+    server.post_message("conversation", conversation["id"], bob["id"], "hello")
+    payloads = list(client.messages.get_messages(conversation["id"], raw=True))
+
+    fresh = connect()
+    Message(fresh, payloads[0])
+
+    assert fresh.tools.types.get(conversation["id"]) == "conversation"
+    assert fresh.tools.types.get(0) is None